@@ -17,6 +17,26 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///Asfalis.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # DATABASE_REPLICA_URL (read in app/database.py) enables read-replica routing
+    # for GET endpoints; after a user's own write their reads stay on the
+    # primary for this many seconds. See app/read_replica.py.
+    REPLICA_STICKY_SECONDS = get_env('REPLICA_STICKY_SECONDS', 10, float)
+    # Statements slower than this are logged with the request that issued them,
+    # and per-request query count / DB time go out in a Server-Timing header
+    # unless SERVER_TIMING_ENABLED is 'false'.  See app/query_stats.py.
+    SLOW_QUERY_MS = get_env('SLOW_QUERY_MS', 200, float)
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    # Bearer token required on GET /metrics when set (see app/metrics.py).
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # SOS pipeline tracing (see app/tracing.py): OTLP/JSON export to a file
+    # (one request per line) and/or an OTLP/HTTP collector endpoint, and
+    # per-alert stage timings stored in sos_stage_timings.
+    TRACE_EXPORT_PATH = os.environ.get('TRACE_EXPORT_PATH')
+    TRACE_EXPORT_URL = os.environ.get('TRACE_EXPORT_URL')
+    TRACE_STAGE_TIMINGS = os.environ.get('TRACE_STAGE_TIMINGS', 'true').lower() == 'true'
+    # Skip create_all at startup when the stored schema fingerprint (alembic
+    # head + model metadata hash) matches the code. See utils/schema.py.
+    SCHEMA_FINGERPRINT_CHECK = os.environ.get('SCHEMA_FINGERPRINT_CHECK', 'true').lower() == 'true'
     
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=get_env('JWT_ACCESS_TOKEN_EXPIRES', 900, int))
@@ -24,9 +44,63 @@ class Config:
     # Long-lived SOS token: issued at login, stored by the app, used ONLY for /sos/trigger
     # so that emergency alerts always work even when the regular access token has expired.
     JWT_SOS_TOKEN_EXPIRES_DAYS = get_env('JWT_SOS_TOKEN_EXPIRES_DAYS', 30, int)
+    # JWT backend: 'hs256' (stdlib fast path, default) or 'jose' (python-jose).
+    JWT_CODEC = os.environ.get('JWT_CODEC', 'hs256')
+    # Max verified tokens remembered by get_current_user (0 disables the cache).
+    JWT_VERIFY_CACHE_SIZE = get_env('JWT_VERIFY_CACHE_SIZE', 10000, int)
+    # Bloom filter of revoked refresh-token JTIs (see services/revocation_service.py).
+    # REVOKED_FILTER_PATH: optional mmap file shared by all workers on the host.
+    REVOKED_FILTER_CAPACITY = get_env('REVOKED_FILTER_CAPACITY', 200000, int)
+    REVOKED_FILTER_ERROR_RATE = get_env('REVOKED_FILTER_ERROR_RATE', 0.001, float)
+    REVOKED_FILTER_PATH = os.environ.get('REVOKED_FILTER_PATH')
+    REVOKED_FILTER_SYNC_SECONDS = get_env('REVOKED_FILTER_SYNC_SECONDS', 2.0, float)
+    # /auth/refresh still accepts a refresh token this long after its exp; after
+    # that it is rejected outright and its revoked_tokens row can be pruned.
+    REVOKED_TOKEN_GRACE_SECONDS = get_env('REVOKED_TOKEN_GRACE_SECONDS', 604800, int)
+    REVOKED_SWEEP_INTERVAL_SECONDS = get_env('REVOKED_SWEEP_INTERVAL_SECONDS', 3600, int)
+    REVOKED_SWEEP_BATCH_SIZE = get_env('REVOKED_SWEEP_BATCH_SIZE', 1000, int)
+    REVOKED_SWEEP_MAX_BATCHES = get_env('REVOKED_SWEEP_MAX_BATCHES', 100, int)
     
+    # Password hashing (see utils/passwords.py). BCRYPT_ROUNDS is the cost factor for
+    # new hashes; existing hashes with another cost are upgraded on next login.
+    BCRYPT_ROUNDS = get_env('BCRYPT_ROUNDS', 12, int)
+    BCRYPT_POOL_WORKERS = get_env('BCRYPT_POOL_WORKERS', 2, int)
+    # Hash requests allowed to wait for a worker before new ones get a 503.
+    BCRYPT_MAX_PENDING = get_env('BCRYPT_MAX_PENDING', 8, int)
+
+    # Priority lanes (see app/priority_lanes.py): concurrent requests per lane, and
+    # how many may wait for a permit before new ones get a 503 (0 = unbounded).
+    LANE_EMERGENCY_CONCURRENCY = get_env('LANE_EMERGENCY_CONCURRENCY', 16, int)
+    LANE_REALTIME_CONCURRENCY = get_env('LANE_REALTIME_CONCURRENCY', 12, int)
+    LANE_REALTIME_MAX_QUEUE = get_env('LANE_REALTIME_MAX_QUEUE', 200, int)
+    LANE_BULK_CONCURRENCY = get_env('LANE_BULK_CONCURRENCY', 8, int)
+    LANE_BULK_MAX_QUEUE = get_env('LANE_BULK_MAX_QUEUE', 100, int)
+
+    # Outbound SMS / WhatsApp / FCM delivery queue (see services/delivery_queue.py).
+    # Rates are messages per second per provider (Twilio long codes allow ~1 SMS/s).
+    DELIVERY_QUEUE_MAX = get_env('DELIVERY_QUEUE_MAX', 5000, int)
+    DELIVERY_WORKERS = get_env('DELIVERY_WORKERS', 4, int)
+    DELIVERY_MAX_ATTEMPTS = get_env('DELIVERY_MAX_ATTEMPTS', 4, int)
+    DELIVERY_RETRY_BASE_SECONDS = get_env('DELIVERY_RETRY_BASE_SECONDS', 1.0, float)
+    DELIVERY_RETRY_MAX_SECONDS = get_env('DELIVERY_RETRY_MAX_SECONDS', 30.0, float)
+    DELIVERY_RATE_SMS = get_env('DELIVERY_RATE_SMS', 1.0, float)
+    DELIVERY_RATE_WHATSAPP = get_env('DELIVERY_RATE_WHATSAPP', 1.0, float)
+    DELIVERY_RATE_FCM = get_env('DELIVERY_RATE_FCM', 100.0, float)
+    # Max pushes per FCM send_each batch (FCM allows up to 500).
+    FCM_BATCH_SIZE = get_env('FCM_BATCH_SIZE', 500, int)
+
     OTP_EXPIRY_SECONDS = get_env('OTP_EXPIRY_SECONDS', 300, int)
     MAX_OTP_ATTEMPTS = get_env('MAX_OTP_ATTEMPTS', 5, int)
+    # OTP_STORE: 'memory' (per-process TTL map, default) or 'db' (otp_records,
+    # needed when several workers must share OTP state). See utils/otp.py.
+    OTP_STORE = os.environ.get('OTP_STORE', 'memory')
+    OTP_CACHE_MAX_ENTRIES = get_env('OTP_CACHE_MAX_ENTRIES', 100000, int)
+    # Write verification outcomes of the memory store to otp_records (write-behind).
+    OTP_AUDIT = os.environ.get('OTP_AUDIT', 'true').lower() == 'true'
+    OTP_RECORD_RETENTION_DAYS = get_env('OTP_RECORD_RETENTION_DAYS', 7, int)
+    OTP_SWEEP_INTERVAL_SECONDS = get_env('OTP_SWEEP_INTERVAL_SECONDS', 600, int)
+    OTP_SWEEP_BATCH_SIZE = get_env('OTP_SWEEP_BATCH_SIZE', 1000, int)
+    OTP_SWEEP_MAX_BATCHES = get_env('OTP_SWEEP_MAX_BATCHES', 100, int)
     
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
@@ -51,6 +125,23 @@ class Config:
     # Returned in every POST /api/sos/trigger response so the app doesn't
     # hard-code it.  Android IotSosTracker and SosViewModel both read this value.
     SOS_COUNTDOWN_SECONDS = get_env('SOS_COUNTDOWN_SECONDS', 10, int)
+    # GET /api/sos/history page size (default when ?limit= is omitted, and the cap).
+    SOS_HISTORY_PAGE_SIZE = get_env('SOS_HISTORY_PAGE_SIZE', 50, int)
+    SOS_HISTORY_MAX_PAGE_SIZE = get_env('SOS_HISTORY_MAX_PAGE_SIZE', 200, int)
+    # Background expiry of countdown alerts nobody dispatched or cancelled
+    # (see sos_service.expire_stale_countdowns).
+    COUNTDOWN_SWEEP_INTERVAL_SECONDS = get_env('COUNTDOWN_SWEEP_INTERVAL_SECONDS', 10, int)
+    COUNTDOWN_SWEEP_BATCH_SIZE = get_env('COUNTDOWN_SWEEP_BATCH_SIZE', 500, int)
+    COUNTDOWN_SWEEP_MAX_BATCHES = get_env('COUNTDOWN_SWEEP_MAX_BATCHES', 20, int)
+    # Decrypted profile/contacts/settings snapshots kept per process
+    # (see services/user_snapshot.py).  0 disables the cache.  The TTL bounds
+    # how long another worker's write can go unnoticed.
+    USER_SNAPSHOT_CACHE_SIZE = get_env('USER_SNAPSHOT_CACHE_SIZE', 10000, int)
+    USER_SNAPSHOT_TTL_SECONDS = get_env('USER_SNAPSHOT_TTL_SECONDS', 60, float)
+    # Background SELECT 1 behind /health and /health/ready (see app/health.py);
+    # readiness fails once the last probe is older than the stale limit.
+    HEALTH_DB_PROBE_INTERVAL_SECONDS = get_env('HEALTH_DB_PROBE_INTERVAL_SECONDS', 15, int)
+    HEALTH_DB_PROBE_STALE_SECONDS = get_env('HEALTH_DB_PROBE_STALE_SECONDS', 60, int)
 
     # Set to 'true' to enforce per-device IMEI binding and the 12-hour
     # handset-transfer cooldown on login.  Set to 'false' (default) to
@@ -72,6 +163,8 @@ class Config:
     # Both keys MUST be set in production. Absence will raise at first write.
     FIELD_ENCRYPTION_KEY = os.environ.get('FIELD_ENCRYPTION_KEY')
     FIELD_HMAC_KEY = os.environ.get('FIELD_HMAC_KEY')
+    # Number of recent value → HMAC digests kept in memory by compute_hmac().
+    FIELD_HMAC_CACHE_SIZE = get_env('FIELD_HMAC_CACHE_SIZE', 4096, int)
 
 
 # Module-level singleton so services can do:
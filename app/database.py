@@ -7,9 +7,11 @@ in extensions.py (which wraps ScopedSession).
 """
 
 import os
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker, scoped_session, DeclarativeBase
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker, scoped_session, DeclarativeBase
 from sqlalchemy.pool import NullPool
 
 load_dotenv()
@@ -48,6 +50,27 @@ else:
         },
     )
 
+
+# ── Optional read replica ─────────────────────────────────────────────────────
+# When DATABASE_REPLICA_URL is set, sessions opened for replica-safe GET
+# requests read from it (see app/read_replica.py); everything else — writes,
+# background jobs, raw engine use — stays on the primary `engine`.
+REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL') or None
+if REPLICA_URL and REPLICA_URL.startswith("postgres://"):
+    REPLICA_URL = REPLICA_URL.replace("postgres://", "postgresql://", 1)
+
+if not REPLICA_URL:
+    replica_engine = None
+elif REPLICA_URL.startswith("sqlite"):
+    replica_engine = create_engine(REPLICA_URL, connect_args={"check_same_thread": False}, poolclass=NullPool)
+else:
+    replica_engine = create_engine(
+        REPLICA_URL,
+        pool_pre_ping=True,
+        poolclass=NullPool,
+        connect_args={"sslmode": "require", "connect_timeout": 10},
+    )
+
 from contextvars import ContextVar
 import uuid
 
@@ -64,7 +87,61 @@ def _get_session_id():
         _session_id.set(sid)
     return sid
 
-_SessionFactory = sessionmaker(bind=engine, autoflush=True, autocommit=False)
+# Set per request by the middleware in main.py (inherited by the route thread):
+# whether this request may read from the replica, and the caller's user id
+# (a routing hint only — never used for authorisation).
+_use_replica = ContextVar("use_replica", default=False)
+_request_user = ContextVar("request_user", default=None)
+
+# Read-your-writes: user id → monotonic time of that user's last commit,
+# oldest write first.  Per process, like the rest of the in-memory state.
+_recent_writers = OrderedDict()
+_RECENT_WRITERS_MAX = 100_000
+
+
+def wrote_recently(user_id, window: float) -> bool:
+    """True if *user_id* committed a write within the last *window* seconds."""
+    at = _recent_writers.get(user_id)
+    return at is not None and time.monotonic() - at < window
+
+
+def _mark_write(user_id):
+    _recent_writers.pop(user_id, None)  # re-insert at the newest end
+    _recent_writers[user_id] = time.monotonic()
+    while len(_recent_writers) > _RECENT_WRITERS_MAX:
+        # Evict the longest-ago writer: long out of its sticky window unless
+        # more than _RECENT_WRITERS_MAX users wrote within it.
+        try:
+            _recent_writers.popitem(last=False)
+        except KeyError:
+            break  # emptied by a concurrent commit
+
+
+class RoutingSession(Session):
+    """Reads go to the replica when the request allows it and this session hasn't written."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (replica_engine is not None and _use_replica.get()
+                and not self._flushing and not self.info.get("wrote")):
+            return replica_engine
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _after_commit(session):
+    # "wrote" stays set: later reads in this session must see the write too.
+    if session.info.get("wrote"):
+        user_id = _request_user.get()
+        if user_id:
+            _mark_write(user_id)
+
+
+_SessionFactory = sessionmaker(bind=engine, class_=RoutingSession, autoflush=True, autocommit=False)
 
 # Scoped session using our ContextVar scope — isolation per request.
 ScopedSession = scoped_session(_SessionFactory, scopefunc=_get_session_id)
@@ -9,36 +9,123 @@ Error codes match the originals so the Android app needs no changes:
   TOKEN_INVALID        — malformed / wrong signature
   UNAUTHORIZED         — Authorization header missing
   REFRESH_TOKEN_REUSED — token has been revoked (force logout)
+
+Verified tokens are remembered in a bounded LRU keyed by SHA-256(token), so
+repeat requests with the same bearer token (location / sensor uploads) skip
+the full JWT decode.  Entries are dropped once the token's `exp` passes, and
+refresh tokens still go through the revocation check on every request —
+answered from the revoked-JTI Bloom filter without a DB round trip in the
+common not-revoked case.
 """
 
+import time
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
 from fastapi import Header, HTTPException
-from jose import jwt, JWTError, ExpiredSignatureError
-from sqlalchemy import select
 
 from app.config import settings
-from app.models.revoked_token import RevokedToken
-from app.database import ScopedSession
+from app.services.revocation_service import is_revoked
+from app.utils.jwt_codec import decode_token, TokenExpired, TokenInvalid
 
 logger = logging.getLogger(__name__)
 
 
+class _TokenClaims(NamedTuple):
+    sub: Optional[str]
+    exp: float
+    type: str
+    jti: Optional[str]
+
+
+class _VerifiedTokenCache:
+    """
+    Thread-safe bounded LRU of SHA-256(token) → claims for verified JWTs.
+
+    Only tokens that passed signature and expiry verification are stored, so
+    a hit is equivalent to a successful decode until the cached `exp`.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, _TokenClaims]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[_TokenClaims]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                self.misses += 1
+                return None
+            if claims.exp <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: _TokenClaims) -> None:
+        if self.maxsize <= 0:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_token_cache = _VerifiedTokenCache(settings.JWT_VERIFY_CACHE_SIZE)
+
+
+def token_cache_stats() -> dict:
+    """Hit rate, evictions and size of the verified-token cache."""
+    return _token_cache.stats()
+
+
 def _decode_token(token: str) -> dict:
     """Decode and validate a JWT. Raises HTTPException on any failure."""
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=["HS256"],
-        )
-        return payload
-    except ExpiredSignatureError:
+        return decode_token(token)
+    except TokenExpired:
         raise HTTPException(
             status_code=401,
             detail={"code": "TOKEN_EXPIRED",
                     "message": "Your session has expired. Please refresh your token."},
         )
-    except JWTError:
+    except TokenInvalid:
         raise HTTPException(
             status_code=401,
             detail={"code": "TOKEN_INVALID",
@@ -51,21 +138,26 @@ def decode_token_lenient(token: str) -> dict:
     Decode a token WITHOUT enforcing expiry — used by the /refresh endpoint
     so it can extract the JTI/sub even from an already-expired refresh token
     and check whether it has been revoked before issuing a new pair.
+
+    Tokens more than REVOKED_TOKEN_GRACE_SECONDS past their exp are rejected:
+    their revoked_tokens rows may already have been pruned.
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=["HS256"],
-            options={"verify_exp": False},
-        )
-        return payload
-    except JWTError:
+        payload = decode_token(token, verify_exp=False)
+    except TokenInvalid:
         raise HTTPException(
             status_code=401,
             detail={"code": "REFRESH_TOKEN_INVALID",
                     "message": "Invalid refresh token."},
         )
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)) and exp < time.time() - settings.REVOKED_TOKEN_GRACE_SECONDS:
+        raise HTTPException(
+            status_code=401,
+            detail={"code": "REFRESH_TOKEN_INVALID",
+                    "message": "Refresh token has expired. Please log in again."},
+        )
+    return payload
 
 
 def get_current_user(authorization: str = Header(...)) -> str:
@@ -93,16 +185,27 @@ def get_current_user(authorization: str = Header(...)) -> str:
             detail={"code": "TOKEN_INVALID",
                     "message": "Invalid or malformed token. Please log in again."},
         )
-    payload = _decode_token(token)
+    claims = _token_cache.get(token)
+    if claims is None:
+        payload = _decode_token(token)
+        claims = _TokenClaims(
+            sub=payload.get("sub"),
+            exp=float(payload.get("exp") or 0),
+            type=payload.get("type", "access"),
+            jti=payload.get("jti"),
+        )
+        # Tokens without an exp claim are never cached — they would never expire.
+        if claims.exp:
+            _token_cache.put(token, claims)
 
     # Check revocation (only refresh tokens are stored — access tokens are
     # short-lived so we skip the DB lookup on every request).
-    token_type = payload.get("type", "access")
-    if token_type == "refresh":
-        jti = payload.get("jti")
+    # Runs on cache hits too: a refresh token can be revoked after it was cached.
+    if claims.type == "refresh":
+        jti = claims.jti
         if jti:
             try:
-                if ScopedSession.scalar(select(RevokedToken).where(RevokedToken.jti == jti)):
+                if is_revoked(jti):
                     raise HTTPException(
                         status_code=401,
                         detail={"code": "REFRESH_TOKEN_REUSED",
@@ -118,7 +221,7 @@ def get_current_user(authorization: str = Header(...)) -> str:
                             "message": "Authentication service temporarily unavailable."},
                 )
 
-    user_id = payload.get("sub")
+    user_id = claims.sub
     if not user_id:
         raise HTTPException(
             status_code=401,
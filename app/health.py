@@ -0,0 +1,135 @@
+"""
+Liveness and readiness without per-probe database I/O.
+
+GET /health/live answers from the event loop without touching anything, so
+it only fails when the process is wedged.  GET /health/ready and /health
+report the database status cached by run_db_probe(), which runs a SELECT 1
+against the primary (and the replica, when configured) every
+HEALTH_DB_PROBE_INTERVAL_SECONDS from the app lifespan.  Under NullPool each
+probe is a fresh connection with its TLS handshake, so load balancers,
+uptime monitors and the Render keepalive hitting the old /health created a
+connection per call; now the process makes one every interval, however many
+probes arrive.
+
+Readiness is 503 while the primary's last probe failed, or is older than
+HEALTH_DB_PROBE_STALE_SECONDS (the probe loop itself is stuck), or has not
+run yet.  The backlog section — background schedulers, the delivery queue
+and other write-behind outboxes — is reported for dashboards but does not
+affect readiness: taking an instance out of rotation would not drain them
+any faster.
+"""
+
+import time
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine, replica_engine
+
+logger = logging.getLogger(__name__)
+
+_probes = {}    # engine name → {"ok", "latency_ms", "checked_at", "error"?}
+
+
+def probe_database():
+    """SELECT 1 on each engine and cache the outcome."""
+    for name, probed in (("primary", engine), ("replica", replica_engine)):
+        if probed is None:
+            continue
+        started = time.perf_counter()
+        try:
+            with probed.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            result = {"ok": True}
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {e}"[:200]}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        result["checked_at"] = time.time()
+        previous = _probes.get(name)
+        if previous and previous["ok"] != result["ok"]:
+            log = logger.info if result["ok"] else logger.error
+            log(f"Database probe ({name}): {'recovered' if result['ok'] else result['error']}")
+        _probes[name] = result
+
+
+async def run_db_probe():
+    """Run probe_database() every HEALTH_DB_PROBE_INTERVAL_SECONDS."""
+    while True:
+        try:
+            await asyncio.to_thread(probe_database)
+        except Exception as e:
+            logger.warning(f"Database probe failed: {e}")
+        await asyncio.sleep(settings.HEALTH_DB_PROBE_INTERVAL_SECONDS)
+
+
+def db_probe_stats() -> dict:
+    """Cached probe results per engine, with their age and whether they are stale."""
+    now = time.time()
+    stats = {}
+    for name, result in list(_probes.items()):
+        entry = dict(result)
+        entry["age_seconds"] = round(now - entry.pop("checked_at"), 1)
+        entry["stale"] = entry["age_seconds"] > settings.HEALTH_DB_PROBE_STALE_SECONDS
+        stats[name] = entry
+    return stats
+
+
+def database_status(probes=None) -> str:
+    """'ok', 'stale', 'pending' (no probe yet) or 'error: …' for the primary."""
+    primary = (probes if probes is not None else db_probe_stats()).get("primary")
+    if primary is None:
+        return "pending"
+    if not primary["ok"]:
+        return f"error: {primary['error']}"
+    return "stale" if primary["stale"] else "ok"
+
+
+def backlog() -> dict:
+    """Background schedulers and outboxes, from in-memory stats only."""
+    from app.services.delivery_queue import delivery_stats
+    from app.services.fcm_service import push_stats
+    from app.services.revocation_service import sweeper_stats
+    from app.services.sos_service import countdown_sweeper_stats
+    from app.tracing import tracing_stats
+    from app.utils.otp import audit_backlog
+
+    delivery = delivery_stats()
+    countdown = countdown_sweeper_stats()
+    revoked = sweeper_stats()
+    return {
+        "schedulers": {
+            "countdown_sweep": {
+                "seconds_since_last_run": countdown.get("seconds_since_last_run"),
+                "lag_seconds": countdown.get("lag_seconds"),
+            },
+            "revoked_token_sweep": {
+                "finished_at": revoked.get("finished_at"),
+                "table_rows": revoked.get("table_rows"),
+            },
+        },
+        "outboxes": {
+            "delivery": {
+                "in_flight": delivery["in_flight"],
+                "max_depth": delivery["max_depth"],
+                "depth": {name: p["depth"] for name, p in delivery["providers"].items()},
+                "lag_ms_max": {name: p["lag_ms_max"] for name, p in delivery["providers"].items()},
+            },
+            "push_pending": push_stats()["pending"],
+            "trace_export": tracing_stats()["queued"],
+            "otp_audit": audit_backlog(),
+        },
+    }
+
+
+def readiness():
+    """(ready, body) for GET /health/ready."""
+    probes = db_probe_stats()
+    status = database_status(probes)
+    return status == "ok", {
+        "status": "ready" if status == "ok" else "not_ready",
+        "database": status,
+        "probes": probes,
+        "backlog": backlog(),
+    }
@@ -4,30 +4,34 @@ FastAPI application factory — replaces Flask's app/__init__.py create_app().
 Mounts:
   - CORSMiddleware
   - SlowAPI rate limiting
-  - DB session cleanup middleware
+  - Priority lanes (emergency / realtime / bulk admission control)
+  - DB session cleanup middleware (and read-replica routing)
   - Socket.IO ASGI app at /socket.io/
   - All 9 APIRouters under /api/
-  - /health endpoint
+  - /health, /health/live and /health/ready endpoints
   - Global HTTP exception handler that wraps errors in Asfalis JSON format
 """
 
+import time
 import asyncio
 import logging
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, contextmanager
+
+_import_started = time.perf_counter()
 
 import httpx
 
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 import socketio
 
 from app.config import Config
-from app.database import ScopedSession, engine, Base
+from app.responses import FastJSONResponse
+from app.database import ScopedSession
 
 # ── Logging ──────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -42,12 +46,12 @@ limiter = Limiter(key_func=get_remote_address)
 
 # ── Keepalive ping (prevents Render free-tier spin-down) ─────────────────────
 async def _keepalive_ping():
-    """Ping own /health every 30 s to prevent Render free-tier idle shutdown."""
+    """Ping own /health/live every 30 s to prevent Render free-tier idle shutdown."""
     await asyncio.sleep(15)  # let the server finish starting up first
     service_url = os.environ.get("RENDER_EXTERNAL_URL")  # injected automatically by Render
     if not service_url:
         return  # not running on Render — no-op locally
-    url = f"{service_url}/health"
+    url = f"{service_url}/health/live"
     logger.info(f"Keepalive ping active → {url}")
     async with httpx.AsyncClient() as client:
         while True:
@@ -59,16 +63,77 @@ async def _keepalive_ping():
 
 
 # ── Lifespan: startup / shutdown ─────────────────────────────────────────────
+_startup_report = {}
+
+
+@contextmanager
+def _timed(steps, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        steps[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+def startup_report() -> dict:
+    """Millisecond timings of the last startup (module import and each lifespan step)."""
+    return dict(_startup_report)
+
+
 @asynccontextmanager
 async def lifespan(application: FastAPI):
-    """Create tables on startup (Alembic handles production migrations)."""
-    try:
-        Base.metadata.create_all(bind=engine)
-        logger.info("Database tables verified.")
-    except Exception as e:
-        logger.warning(f"DB create_all skipped: {e}")
-    asyncio.create_task(_keepalive_ping())  # keeps Render free-tier awake
+    """Create tables on startup unless the schema fingerprint is current (Alembic handles production migrations)."""
+    started = time.perf_counter()
+    steps = {}
+    with _timed(steps, "schema"):
+        try:
+            from app.utils.schema import ensure_schema
+            if ensure_schema() == 'current':
+                logger.info("Database schema fingerprint matches — create_all skipped.")
+            else:
+                logger.info("Database tables verified.")
+        except Exception as e:
+            logger.warning(f"DB create_all skipped: {e}")
+    with _timed(steps, "revocation_filter"):
+        try:
+            from app.services.revocation_service import load_revocation_filter
+            load_revocation_filter()
+        except Exception as e:
+            # Revocation checks fall back to querying revoked_tokens directly.
+            logger.warning(f"Revocation filter not loaded: {e}")
+    with _timed(steps, "lanes"):
+        start_lanes()
+    with _timed(steps, "background_tasks"):
+        asyncio.create_task(_keepalive_ping())  # keeps Render free-tier awake
+        from app.health import run_db_probe
+        asyncio.create_task(run_db_probe())
+        from app.services.revocation_service import run_revoked_token_sweeper
+        asyncio.create_task(run_revoked_token_sweeper())
+        from app.utils.otp import run_otp_sweeper
+        asyncio.create_task(run_otp_sweeper())
+        from app.services.sos_service import run_countdown_sweeper
+        asyncio.create_task(run_countdown_sweeper())
+        from app.utils import passwords
+        asyncio.create_task(asyncio.to_thread(passwords.warm_up))  # spawn bcrypt workers
+        # Providers initialise lazily; warm Firebase off the startup path so the
+        # first SOS push doesn't pay for it.
+        from app.services import fcm_service
+        asyncio.create_task(asyncio.to_thread(fcm_service.warm_up))
+
+    _startup_report.clear()
+    _startup_report["import_ms"] = _import_ms
+    _startup_report["lifespan_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    _startup_report["steps_ms"] = steps
+    logger.info(
+        f"Startup: app import {_import_ms:.0f} ms, lifespan {_startup_report['lifespan_ms']:.0f} ms "
+        f"({', '.join(f'{k} {v:.0f} ms' for k, v in steps.items())})"
+    )
     yield
+    from app.services.delivery_queue import delivery_queue
+    # Let queued alerts go out before exit, off the event loop so Socket.IO
+    # and the rest of shutdown keep running meanwhile.
+    await asyncio.to_thread(delivery_queue.drain, timeout=5.0)
+    passwords.shutdown()
     ScopedSession.remove()
     logger.info("Application shutdown.")
 
@@ -103,6 +168,7 @@ app = FastAPI(
     ),
     version="2.1.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -111,6 +177,15 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
+# Priority lanes — added before CORS so CORS still wraps its 503 responses
+from app.priority_lanes import PriorityLaneMiddleware, start_lanes, lane_stats
+from app.read_replica import route_request, replica_stats
+from app.query_stats import begin_request, end_request, query_totals
+app.add_middleware(PriorityLaneMiddleware)
+# Metrics wraps the lanes so queue wait and 503s count toward route latency.
+from app.metrics import MetricsMiddleware
+app.add_middleware(MetricsMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -124,18 +199,29 @@ app.add_middleware(
 # ── DB session cleanup middleware ─────────────────────────────────────────────
 @app.middleware("http")
 async def db_session_middleware(request: Request, call_next):
-    from app.database import _session_id
+    from app.database import _session_id, _use_replica, _request_user
     import uuid
     # Set a unique session ID for this request context BEFORE running the route.
     # The synchronous route in the threadpool will inherit this ContextVar.
     token = _session_id.set(str(uuid.uuid4()))
+    query_stats, stats_token = begin_request(f"{request.method} {request.url.path}")
+    # Replica routing for this request's session (see app/read_replica.py).
+    use_replica, user_id = route_request(request.method, request.url.path,
+                                         request.headers.get("authorization"))
+    replica_token = _use_replica.set(use_replica)
+    user_token = _request_user.set(user_id)
     try:
         response = await call_next(request)
+        if Config.SERVER_TIMING_ENABLED:
+            response.headers.append("Server-Timing", query_stats.server_timing())
         return response
     finally:
         # Now remove() will target the exact session used by the route.
         ScopedSession.remove()
-        # Reset the ContextVar to prevent cross-request leakage in the event loop.
+        # Reset the ContextVars to prevent cross-request leakage in the event loop.
+        end_request(stats_token)
+        _request_user.reset(user_token)
+        _use_replica.reset(replica_token)
         _session_id.reset(token)
 
 
@@ -143,7 +229,7 @@ async def db_session_middleware(request: Request, call_next):
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception on {request.method} {request.url}: {exc}", exc_info=exc)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={"success": False, "error": {"code": "INTERNAL_SERVER_ERROR",
                                               "message": "An unexpected error occurred."}},
@@ -160,7 +246,7 @@ async def http_exception_handler(request: Request, exc: FastAPIHTTPException):
         content = {"success": False, "error": detail}
     else:
         content = {"success": False, "error": {"code": "HTTP_ERROR", "message": str(detail)}}
-    return JSONResponse(status_code=exc.status_code, content=content)
+    return FastJSONResponse(status_code=exc.status_code, content=content, headers=exc.headers)
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -175,23 +261,50 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         raw_msg = first.get('msg', 'Validation error')
         msg = f"Validation failed for '{field}': {raw_msg}"
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=422,
         content={"success": False, "error": {"code": "VALIDATION_ERROR", "message": msg}}
     )
 
 
-# ── Health endpoint ───────────────────────────────────────────────────────────
+# ── Health endpoints ──────────────────────────────────────────────────────────
+# None of them opens a database connection: the DB status is the cached
+# result of app/health.py's background probe.
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    from app.health import readiness
+    ready, body = readiness()
+    return FastJSONResponse(status_code=200 if ready else 503, content=body)
+
+
 @app.get("/health", tags=["Health"])
 def health_check():
-    try:
-        from sqlalchemy import text
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        db_status = "ok"
-    except Exception as e:
-        db_status = f"error: {e}"
-    return {"status": "healthy", "service": "Asfalis-backend", "database": db_status}
+    from app.health import database_status
+    from app.services.sos_service import countdown_sweeper_stats
+    from app.services.user_snapshot import snapshot_stats
+    from app.tracing import tracing_stats
+    return {"status": "healthy", "service": "Asfalis-backend", "database": database_status(),
+            "lanes": lane_stats(), "startup": startup_report(),
+            "countdown_sweeper": countdown_sweeper_stats(), "read_replica": replica_stats(),
+            "user_snapshots": snapshot_stats(), "queries": query_totals(), "tracing": tracing_stats()}
+
+
+# ── Metrics endpoint ──────────────────────────────────────────────────────────
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    # async: rendering reads AnyIO and Socket.IO state owned by the event loop.
+    import hmac
+    from starlette.responses import PlainTextResponse
+    from app.metrics import render
+    if Config.METRICS_TOKEN and not hmac.compare_digest(
+            request.headers.get("authorization", ""), f"Bearer {Config.METRICS_TOKEN}"):
+        return PlainTextResponse("unauthorized\n", status_code=401)
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ── Socket.IO ASGI mount ──────────────────────────────────────────────────────
@@ -204,13 +317,20 @@ socketio_app = socketio.ASGIApp(sio, other_asgi_app=app)
 from app import models as _all_models  # ensure all models are registered for Base.metadata.create_all()
 from app.routes import auth, user, contacts, sos, protection, location, settings, device, support
 
-app.include_router(auth.router,        prefix="/api/auth",       tags=["Auth"])
-app.include_router(user.router,        prefix="/api/user",       tags=["User"])
-app.include_router(contacts.router,    prefix="/api/contacts",  tags=["Contacts"])
-app.include_router(sos.router,         prefix="/api/sos",        tags=["SOS"])
-app.include_router(protection.router,  prefix="/api/protection", tags=["Protection"])
-app.include_router(location.router,    prefix="/api/location",   tags=["Location"])
-app.include_router(settings.router,    prefix="/api/settings",   tags=["Settings"])
-app.include_router(device.router,      prefix="/api/device",     tags=["Device"])
-app.include_router(support.router,     prefix="/api/support",    tags=["Support"])
+from app.metrics import label_routes
+
+for _router, _prefix, _tag in (
+    (auth.router,        "/api/auth",       "Auth"),
+    (user.router,        "/api/user",       "User"),
+    (contacts.router,    "/api/contacts",   "Contacts"),
+    (sos.router,         "/api/sos",        "SOS"),
+    (protection.router,  "/api/protection", "Protection"),
+    (location.router,    "/api/location",   "Location"),
+    (settings.router,    "/api/settings",   "Settings"),
+    (device.router,      "/api/device",     "Device"),
+    (support.router,     "/api/support",    "Support"),
+):
+    app.include_router(_router, prefix=_prefix, tags=[_tag])
+    label_routes(_router, _prefix)  # full route templates for /metrics labels
 
+_import_ms = round((time.perf_counter() - _import_started) * 1000, 1)
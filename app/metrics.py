@@ -0,0 +1,253 @@
+"""
+Prometheus text-format metrics at GET /metrics.
+
+Recorded continuously, in process memory:
+
+  asfalis_http_request_duration_seconds   histogram per method + route template
+                                          (unmatched paths share route="unmatched"
+                                          so scanners can't blow up cardinality)
+  asfalis_http_requests_total             counter per method + route + status
+  asfalis_http_requests_in_flight         gauge
+  asfalis_db_connect_seconds              histogram of connection acquisition per
+                                          engine (NullPool: every session pays a
+                                          connect, TLS handshake included)
+  asfalis_sos_stage_seconds               histogram per SOS operation + span
+                                          (sos.trigger/insert_commit,
+                                          sos.dispatch/whatsapp.send, … — see
+                                          tracing.py)
+
+Read at scrape time from state the app already keeps: AnyIO thread-pool
+saturation, Socket.IO connections per namespace, and the existing stats
+helpers (priority lanes, delivery queue, FCM, bcrypt pool, token and HMAC
+caches, revocation filter and sweepers, read replica, user snapshots, query
+totals, tracing, the cached DB probe), flattened into asfalis_<source>_<key>
+samples.
+
+A scrape never touches the database — every sweeper stat is the cached
+result of its last run.  Counters are plain ints without locks: HTTP metrics
+are updated only from the event loop, and the rare lost increment from two
+worker threads racing on a DB or SOS histogram is an acceptable price for
+keeping locks off the request path.
+
+Set METRICS_TOKEN to require "Authorization: Bearer <token>" on /metrics.
+"""
+
+import time
+import bisect
+
+from sqlalchemy import event
+
+from app.database import engine, replica_engine
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_SOS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, label_names, buckets=_LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}   # label values → [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels, seconds):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-1] += seconds
+
+    def render(self, lines):
+        lines.append(f"# HELP {self.name} {self.help}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labels, series in list(self._series.items()):
+            base = _labels(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(zip(self.label_names, labels), le=bound)} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs, **extra):
+    items = [*pairs, *extra.items()]
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+
+http_latency = Histogram("asfalis_http_request_duration_seconds",
+                         "HTTP request latency by route template.", ("method", "route"))
+db_connect = Histogram("asfalis_db_connect_seconds",
+                       "Time to open a database connection.", ("engine",))
+sos_stage = Histogram("asfalis_sos_stage_seconds",
+                      "SOS pipeline span duration.", ("operation", "stage"), _SOS_BUCKETS)
+
+_requests_total = {}    # (method, route, status) → count
+_in_flight = [0]
+_route_templates = {}   # id(APIRoute) → full path template, for routes on included routers
+
+
+def label_routes(router, prefix):
+    """Remember the full template of *router*'s routes once it is included under *prefix*.
+
+    The matched route in the ASGI scope carries only its router-relative path.
+    """
+    for route in router.routes:
+        _route_templates[id(route)] = prefix + getattr(route, "path", "")
+
+
+# ── HTTP ─────────────────────────────────────────────────────────────────────
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency histogram, request counter and in-flight gauge."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        _in_flight[0] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight[0] -= 1
+            route = scope.get("route")
+            template = _route_templates.get(id(route)) or getattr(route, "path", None) or "unmatched"
+            http_latency.observe((scope["method"], template), time.perf_counter() - started)
+            key = (scope["method"], template, status[0])
+            _requests_total[key] = _requests_total.get(key, 0) + 1
+
+
+# ── Database connect time ────────────────────────────────────────────────────
+
+def _timed_connect(engine_name):
+    def do_connect(dialect, conn_rec, cargs, cparams):
+        started = time.perf_counter()
+        try:
+            return dialect.connect(*cargs, **cparams)
+        finally:
+            db_connect.observe((engine_name,), time.perf_counter() - started)
+    return do_connect
+
+
+event.listen(engine, "do_connect", _timed_connect("primary"))
+if replica_engine is not None:
+    event.listen(replica_engine, "do_connect", _timed_connect("replica"))
+
+
+# ── Scrape-time gauges ───────────────────────────────────────────────────────
+
+def _stat_sources():
+    from app.dependencies import token_cache_stats
+    from app.health import db_probe_stats
+    from app.priority_lanes import lane_stats
+    from app.query_stats import query_totals
+    from app.read_replica import replica_stats
+    from app.services.delivery_queue import delivery_stats
+    from app.services.fcm_service import push_stats
+    from app.services.revocation_service import revocation_filter_stats, sweeper_stats
+    from app.services.sos_service import countdown_sweeper_stats
+    from app.services.user_snapshot import snapshot_stats
+    from app.tracing import tracing_stats
+    from app.utils.encryption import hmac_cache_info
+    from app.utils.passwords import pool_stats
+    # (metric prefix, stats function, label name for each nested dict level)
+    return (
+        ("lane", lane_stats, ("lane",)),
+        ("delivery", delivery_stats, ("provider",)),
+        ("push", push_stats, ()),
+        ("bcrypt_pool", pool_stats, ()),
+        ("token_cache", token_cache_stats, ()),
+        ("hmac_cache", lambda: hmac_cache_info()._asdict(), ()),
+        ("revocation_filter", revocation_filter_stats, ()),
+        ("revoked_token_sweep", sweeper_stats, ()),
+        ("countdown_sweep", countdown_sweeper_stats, ()),
+        ("replica_routing", replica_stats, ()),
+        ("user_snapshot", snapshot_stats, ()),
+        ("sql", query_totals, ()),
+        ("tracing", tracing_stats, ()),
+        ("db_probe", db_probe_stats, ("engine",)),
+    )
+
+
+def _flatten(prefix, stats, label_names, labels, out):
+    """Numeric leaves → out[metric name]; a dict of dicts becomes the next label level."""
+    if label_names and stats and all(isinstance(v, dict) for v in stats.values()):
+        for key, child in stats.items():
+            _flatten(prefix, child, label_names[1:], labels + ((label_names[0], key),), out)
+        return
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            _flatten(f"{prefix}_{key}", value, label_names, labels, out)
+        elif isinstance(value, (bool, int, float)):
+            out.setdefault(f"asfalis_{prefix}_{key}", []).append((labels, float(value)))
+
+
+def _thread_pool(lines):
+    try:
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter()
+    except Exception:
+        return
+    lines.append("# TYPE asfalis_thread_pool_size gauge")
+    lines.append(f"asfalis_thread_pool_size {limiter.total_tokens}")
+    lines.append("# TYPE asfalis_thread_pool_busy gauge")
+    lines.append(f"asfalis_thread_pool_busy {limiter.borrowed_tokens}")
+    lines.append("# TYPE asfalis_thread_pool_waiting gauge")
+    lines.append(f"asfalis_thread_pool_waiting {limiter.statistics().tasks_waiting}")
+
+
+def _sockets(lines):
+    from app.extensions import sio
+    lines.append("# HELP asfalis_socketio_connections Connected Socket.IO clients per namespace.")
+    lines.append("# TYPE asfalis_socketio_connections gauge")
+    for namespace, rooms in list(getattr(sio.manager, "rooms", {}).items()):
+        lines.append(f"asfalis_socketio_connections{_labels([('namespace', namespace)])} {len(rooms.get(None, ()))}")
+
+
+def render() -> str:
+    """The full exposition.  Call from the event loop (reads AnyIO and Socket.IO state)."""
+    lines = [
+        "# HELP asfalis_http_requests_in_flight Requests currently being handled.",
+        "# TYPE asfalis_http_requests_in_flight gauge",
+        f"asfalis_http_requests_in_flight {_in_flight[0]}",
+        "# HELP asfalis_http_requests_total Requests by route template and status.",
+        "# TYPE asfalis_http_requests_total counter",
+    ]
+    for (method, route, status), count in list(_requests_total.items()):
+        lines.append(f"asfalis_http_requests_total"
+                     f"{_labels([('method', method), ('route', route), ('status', status)])} {count}")
+    for histogram in (http_latency, db_connect, sos_stage):
+        histogram.render(lines)
+    _thread_pool(lines)
+    _sockets(lines)
+
+    samples = {}
+    for prefix, fn, label_names in _stat_sources():
+        try:
+            _flatten(prefix, fn(), label_names, (), samples)
+        except Exception:
+            continue  # one broken source must not take down the scrape
+    for name, series in samples.items():
+        lines.append(f"# TYPE {name} untyped")
+        for labels, value in series:
+            lines.append(f"{name}{_labels(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
@@ -10,3 +10,5 @@ from app.models.support import SupportTicket
 
 from app.models.revoked_token import RevokedToken
 from app.models.device_security import UserDeviceBinding, HandsetChangeRequest
+from app.models.schema_fingerprint import SchemaFingerprint
+from app.models.sos_stage_timing import SOSStageTiming
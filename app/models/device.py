@@ -3,7 +3,7 @@ from datetime import datetime
 import uuid
 
 from app.database import Base
-from app.utils.encryption import EncryptedString
+from app.utils.encryption import EncryptedString, HMACDigest
 
 
 class ConnectedDevice(Base):
@@ -15,7 +15,7 @@ class ConnectedDevice(Base):
     device_name = Column(EncryptedString(), nullable=False)
     device_mac = Column(EncryptedString(), nullable=False)
     # ── HMAC index for MAC equality lookups (pairing, button events) ───────────
-    mac_hmac = Column(String(64), nullable=True, index=True)
+    mac_hmac = Column(HMACDigest(), nullable=True, index=True)
     # ── Non-sensitive operational fields ──────────────────────────────────────
     is_connected = Column(Boolean, default=False)
     firmware_version = Column(String(20), nullable=True)
@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 import uuid
 
 from app.database import Base
-from app.utils.encryption import EncryptedString
+from app.utils.encryption import EncryptedString, HMACDigest
 
 
 class UserDeviceBinding(Base):
@@ -14,7 +14,7 @@ class UserDeviceBinding(Base):
     # ── Encrypted hardware identifier ─────────────────────────────────────────
     device_imei = Column(EncryptedString(), nullable=False)
     # ── HMAC index for IMEI equality lookups (login device-mismatch checks) ───
-    imei_hmac = Column(String(64), nullable=True, index=True)
+    imei_hmac = Column(HMACDigest(), nullable=True, index=True)
     # ── Timestamps ────────────────────────────────────────────────────────────
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -30,7 +30,7 @@ class HandsetChangeRequest(Base):
     old_device_imei = Column(EncryptedString(), nullable=True)
     new_device_imei = Column(EncryptedString(), nullable=False)
     # ── HMAC index for new_device_imei lookup (pending transfer checks) ───────
-    new_imei_hmac = Column(String(64), nullable=True, index=True)
+    new_imei_hmac = Column(HMACDigest(), nullable=True, index=True)
     # ── Non-sensitive operational fields ──────────────────────────────────────
     status = Column(String(20), nullable=False, default='pending')
     requested_at = Column(DateTime, nullable=False, default=datetime.utcnow)
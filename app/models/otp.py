@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Enum, ForeignKey, Index
 from datetime import datetime
 import uuid
 
@@ -7,6 +7,12 @@ from app.database import Base
 
 class OTPRecord(Base):
     __tablename__ = 'otp_records'
+    __table_args__ = (
+        # Latest-unused-OTP lookup: filter_by(phone, purpose, is_used) ORDER BY created_at DESC
+        Index('ix_otp_records_phone_purpose_created', 'phone', 'purpose', 'created_at'),
+        # Retention sweeper: expires_at < cutoff
+        Index('ix_otp_records_expires_at', 'expires_at'),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     phone = Column(String(20), nullable=True)
@@ -13,6 +13,8 @@ class RevokedToken(Base):
     jti = Column(String(36), nullable=False, unique=True, index=True)
     token_type = Column(String(20), nullable=False, default='refresh')
     revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # The revoked token's own `exp` (naive UTC); rows are pruned once it has passed.
+    expires_at = Column(DateTime, nullable=True, index=True)
 
     def __repr__(self):
         return f'<RevokedToken jti={self.jti} type={self.token_type}>'
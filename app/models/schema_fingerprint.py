@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+
+from app.database import Base
+
+
+class SchemaFingerprint(Base):
+    """Single row recording the schema the database was last verified against (see utils/schema.py)."""
+
+    __tablename__ = 'schema_fingerprint'
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+    alembic_head = Column(String(64), nullable=True)
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<SchemaFingerprint {self.fingerprint[:12]} head={self.alembic_head}>'
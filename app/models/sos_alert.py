@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, Enum, ForeignKey, Index
 from datetime import datetime
 import uuid
 
@@ -8,6 +8,12 @@ from app.utils.encryption import EncryptedString, EncryptedFloat, EncryptedJSON
 
 class SOSAlert(Base):
     __tablename__ = 'sos_alerts'
+    __table_args__ = (
+        # History keyset pagination: user_id = ? ORDER BY triggered_at DESC, id DESC
+        Index('ix_sos_alerts_user_triggered', 'user_id', 'triggered_at', 'id'),
+        # Countdown sweeper: status = 'countdown' AND triggered_at < cutoff
+        Index('ix_sos_alerts_status_triggered', 'status', 'triggered_at'),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String(36), ForeignKey('users.id'), nullable=False)
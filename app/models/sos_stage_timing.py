@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, Float, DateTime, ForeignKey, Index
+from datetime import datetime
+import uuid
+
+from app.database import Base
+
+
+class SOSStageTiming(Base):
+    """One timed stage of an SOS operation (see app/tracing.py), kept for post-incident review."""
+
+    __tablename__ = 'sos_stage_timings'
+    __table_args__ = (
+        Index('ix_sos_stage_timings_alert_started', 'alert_id', 'started_at'),
+    )
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    alert_id = Column(String(36), ForeignKey('sos_alerts.id', ondelete='CASCADE'), nullable=False)
+    trace_id = Column(String(32), nullable=False)
+    span_id = Column(String(16), nullable=False)
+    parent_span_id = Column(String(16), nullable=True)
+    # The SOS operation the stage ran under ('sos.trigger', 'sos.dispatch', …)
+    # and the stage itself ('user_lookup', 'whatsapp.send', …).
+    operation = Column(String(50), nullable=False)
+    stage = Column(String(50), nullable=False)
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    duration_ms = Column(Float, nullable=False)
+    status = Column(String(20), nullable=False, default='ok')
+
+    def to_dict(self):
+        return {
+            'operation': self.operation,
+            'stage': self.stage,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': self.duration_ms,
+            'status': self.status,
+            'trace_id': self.trace_id,
+        }
@@ -4,7 +4,7 @@ from datetime import datetime
 import uuid
 
 from app.database import Base
-from app.utils.encryption import EncryptedString
+from app.utils.encryption import EncryptedString, HMACDigest
 
 
 class TrustedContact(Base):
@@ -17,7 +17,7 @@ class TrustedContact(Base):
     phone = Column(EncryptedString(), nullable=False)
     email = Column(EncryptedString(), nullable=True)
     # ── HMAC index for phone equality lookups (duplicate-check, OTP lookup) ───
-    phone_hmac = Column(String(64), nullable=True, index=True)
+    phone_hmac = Column(HMACDigest(), nullable=True, index=True)
     # ── Non-sensitive fields ───────────────────────────────────────────────────
     relationship = Column(String(50), nullable=True)
     is_primary = Column(Boolean, default=False)
@@ -4,7 +4,7 @@ from datetime import datetime
 import uuid
 
 from app.database import Base
-from app.utils.encryption import EncryptedString
+from app.utils.encryption import EncryptedString, HMACDigest
 
 
 class User(Base):
@@ -20,8 +20,8 @@ class User(Base):
     profile_image_url = Column(EncryptedString(), nullable=True)
     # ── HMAC index columns — enable equality lookups on encrypted fields ────────
     # Use phone_hmac / email_hmac in filter_by() instead of the plaintext columns.
-    phone_hmac = Column(String(64), unique=True, nullable=True, index=True)
-    email_hmac = Column(String(64), unique=True, nullable=True, index=True)
+    phone_hmac = Column(HMACDigest(), unique=True, nullable=True, index=True)
+    email_hmac = Column(HMACDigest(), unique=True, nullable=True, index=True)
     # ── Non-sensitive fields — stored in plaintext ─────────────────────────────
     country = Column(String(100), nullable=True)
     password_hash = Column(String(255), nullable=True)
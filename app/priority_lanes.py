@@ -0,0 +1,175 @@
+"""
+Priority lanes — per-class admission control for HTTP requests.
+
+Every sync route runs on AnyIO's default thread pool, so a burst of profile
+fetches or history listings can occupy every thread while /sos/trigger waits
+for one.  PriorityLaneMiddleware classifies each request into a lane and
+makes it take one of that lane's permits before it reaches the app:
+
+  emergency — SOS trigger / send-now / cancel / safe, IoT button and alerts
+  realtime  — location and protection (sensor) traffic, active SOS polling
+  bulk      — everything else under /api/ (auth, profile, history, …)
+
+Each lane has its own concurrency limit, and the AnyIO thread limiter is
+sized to the sum of the lane limits (plus a little headroom for unclassified
+paths such as /health), so bulk traffic can saturate its own permits but
+never the threads reserved for emergency requests.  Lanes with a max_queue
+answer 503 SERVICE_BUSY immediately once that many requests are already
+waiting, instead of letting the backlog grow; the emergency lane never sheds.
+
+lane_stats() reports per-lane active/waiting counts, admissions, rejections
+and queue wait times (mean, p50, p99 over the recent window).
+"""
+
+import time
+import asyncio
+from collections import deque
+
+from starlette.responses import JSONResponse
+
+from app.config import settings
+
+EMERGENCY, REALTIME, BULK = "emergency", "realtime", "bulk"
+
+_EMERGENCY_PATHS = {
+    ("POST", "/api/sos/trigger"),
+    ("POST", "/api/sos/send-now"),
+    ("POST", "/api/sos/cancel"),
+    ("POST", "/api/sos/safe"),
+    ("POST", "/api/device/button-event"),
+    ("POST", "/api/device/alert"),
+    ("POST", "/api/device/cancel-sos"),
+}
+_REALTIME_PREFIXES = ("/api/location/", "/api/protection/", "/api/sos/countdown/", "/api/sos/active")
+
+# Threads left outside every lane, for unclassified paths (/health, /docs).
+_UNCLASSIFIED_THREADS = 4
+
+
+def classify(method: str, path: str):
+    """Return the lane name for a request, or None for paths outside /api/."""
+    path = path.rstrip("/") or "/"
+    if (method, path) in _EMERGENCY_PATHS:
+        return EMERGENCY
+    if path.startswith(_REALTIME_PREFIXES):
+        return REALTIME
+    if path.startswith("/api/"):
+        return BULK
+    return None
+
+
+class Lane:
+    """A concurrency limit plus its queue statistics. Used from the event loop only."""
+
+    def __init__(self, name: str, limit: int, max_queue: int = 0):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue      # 0 = unbounded
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=1024)
+        self._sem = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.limit)
+        return self._sem
+
+    def is_full(self) -> bool:
+        return bool(self.max_queue) and self.semaphore.locked() and self.waiting >= self.max_queue
+
+    async def acquire(self) -> None:
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.perf_counter() - started
+        self.active += 1
+        self.admitted += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.recent_waits.append(waited)
+
+    def release(self) -> None:
+        self.active -= 1
+        self.semaphore.release()
+
+    def stats(self) -> dict:
+        waits = sorted(self.recent_waits)
+        pct = lambda q: round(waits[min(int(len(waits) * q), len(waits) - 1)] * 1000, 2) if waits else 0.0
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_mean": round(self.wait_total / self.admitted * 1000, 2) if self.admitted else 0.0,
+            "wait_ms_p50": pct(0.50),
+            "wait_ms_p99": pct(0.99),
+            "wait_ms_max": round(self.wait_max * 1000, 2),
+        }
+
+
+LANES = {
+    EMERGENCY: Lane(EMERGENCY, settings.LANE_EMERGENCY_CONCURRENCY),
+    REALTIME: Lane(REALTIME, settings.LANE_REALTIME_CONCURRENCY, settings.LANE_REALTIME_MAX_QUEUE),
+    BULK: Lane(BULK, settings.LANE_BULK_CONCURRENCY, settings.LANE_BULK_MAX_QUEUE),
+}
+
+
+def thread_pool_size() -> int:
+    """AnyIO thread limiter size that backs every lane's permits with a thread."""
+    return sum(lane.limit for lane in LANES.values()) + _UNCLASSIFIED_THREADS
+
+
+def start_lanes() -> None:
+    """Called from lifespan: fresh semaphores for this event loop, and the AnyIO
+    thread pool sized so every lane permit is backed by a thread."""
+    import anyio.to_thread
+    for lane in LANES.values():
+        lane._sem = None
+    anyio.to_thread.current_default_thread_limiter().total_tokens = thread_pool_size()
+
+
+def lane_stats() -> dict:
+    return {name: lane.stats() for name, lane in LANES.items()}
+
+
+class PriorityLaneMiddleware:
+    """Pure ASGI middleware: admits each /api/ request through its lane."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        name = classify(scope["method"], scope["path"])
+        if name is None:
+            return await self.app(scope, receive, send)
+
+        lane = LANES[name]
+        if lane.is_full():
+            lane.rejected += 1
+            response = JSONResponse(
+                status_code=503,
+                headers={"Retry-After": "1"},
+                content={"success": False, "error": {
+                    "code": "SERVICE_BUSY",
+                    "message": "Server is busy. Please retry shortly."}},
+            )
+            return await response(scope, receive, send)
+
+        await lane.acquire()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lane.release()
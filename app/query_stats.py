@@ -0,0 +1,98 @@
+"""
+Per-request SQL statement accounting and slow-query log.
+
+The session middleware in main.py calls begin_request() before the route
+runs and end_request() after it.  In between, cursor-execute events on the
+primary and replica engines add every statement's count and duration to the
+request's QueryStats (the ContextVar is inherited by the route's threadpool
+thread), and the middleware reports them in a Server-Timing header:
+
+    Server-Timing: db;dur=4.21;desc="3 queries, slowest 2.87ms", app;dur=9.80
+
+so per-route query counts and DB time show up in browser dev tools, curl -v
+and any proxy that logs response headers.
+
+A statement slower than SLOW_QUERY_MS is logged at WARNING with the request
+that issued it ("background" outside a request).  Only the SQL text is
+logged, never the bound parameters — they carry phone numbers, tokens and
+ciphertext.
+"""
+
+import time
+import logging
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine, replica_engine
+
+logger = logging.getLogger(__name__)
+
+_STATEMENT_LOG_CHARS = 500
+
+
+class QueryStats:
+    __slots__ = ('route', 'started', 'count', 'total_ms', 'slowest_ms', 'slowest_statement')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+
+    def server_timing(self) -> str:
+        app_ms = (time.perf_counter() - self.started) * 1000
+        return (f'db;dur={self.total_ms:.2f};desc="{self.count} queries, slowest {self.slowest_ms:.2f}ms", '
+                f'app;dur={app_ms:.2f}')
+
+
+_current = ContextVar("query_stats", default=None)
+_totals = {"statements": 0, "slow": 0}
+
+
+def begin_request(route):
+    """Start counting for the current request; returns (stats, token for end_request())."""
+    stats = QueryStats(route)
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def query_totals() -> dict:
+    return {**_totals, "slow_query_ms": settings.SLOW_QUERY_MS}
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _totals["statements"] += 1
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        if elapsed_ms > stats.slowest_ms:
+            stats.slowest_ms = elapsed_ms
+            stats.slowest_statement = statement
+    if elapsed_ms >= settings.SLOW_QUERY_MS:
+        _totals["slow"] += 1
+        logger.warning(
+            f"Slow query ({elapsed_ms:.1f} ms) in {stats.route if stats else 'background'}: "
+            f"{' '.join(statement.split())[:_STATEMENT_LOG_CHARS]}"
+        )
+
+
+for _engine in filter(None, (engine, replica_engine)):
+    event.listen(_engine, "before_cursor_execute", _before_execute)
+    event.listen(_engine, "after_cursor_execute", _after_execute)
@@ -0,0 +1,76 @@
+"""
+Read-replica routing for replica-safe GET endpoints.
+
+With DATABASE_REPLICA_URL set, the session middleware in main.py asks
+route_request() whether a request may read from the replica.  It may if
+
+  • it is a GET to one of REPLICA_READ_PATHS — pure reads whose results
+    tolerate replication lag (profile, contacts, settings, SOS history,
+    last location, device status), and
+  • the caller has not committed a write in the last REPLICA_STICKY_SECONDS
+    (read-your-writes: after updating their settings a user reads them back
+    from the primary until the replica has caught up).
+
+The session then routes its reads via database.RoutingSession.get_bind; any
+flush or commit still goes to the primary, and a session that has written
+keeps reading from the primary.  Everything else — emergency and realtime
+traffic, writes, background jobs — always uses the primary.
+
+The caller's user id for stickiness is read from the bearer token's payload
+without verifying it: it only chooses which database serves the read, while
+authentication still happens in get_current_user.  Stickiness is tracked per
+process, so it assumes a single worker or sticky load balancing.
+"""
+
+import json
+import base64
+
+from app.config import settings
+from app.database import replica_engine, wrote_recently, _recent_writers
+
+REPLICA_READ_PATHS = {
+    "/api/user/profile",
+    "/api/contacts",
+    "/api/settings",
+    "/api/sos/history",
+    "/api/location/current",
+    "/api/device/status",
+}
+
+_stats = {"replica": 0, "primary": 0, "sticky": 0}
+
+
+def token_subject(authorization):
+    """`sub` claim of a bearer token, unverified (routing hint only)."""
+    if not authorization or not authorization.startswith("Bearer "):
+        return None
+    try:
+        payload = authorization[7:].split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        sub = claims.get("sub")
+        return sub if isinstance(sub, str) else None
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+def route_request(method, path, authorization):
+    """Return (use_replica, user_id) for a request."""
+    user_id = token_subject(authorization)
+    if replica_engine is None or method != "GET" or path.rstrip("/") not in REPLICA_READ_PATHS:
+        return False, user_id
+    if user_id and wrote_recently(user_id, settings.REPLICA_STICKY_SECONDS):
+        _stats["sticky"] += 1
+        _stats["primary"] += 1
+        return False, user_id
+    _stats["replica"] += 1
+    return True, user_id
+
+
+def replica_stats() -> dict:
+    return {
+        "enabled": replica_engine is not None,
+        "replica_reads": _stats["replica"],
+        "primary_reads": _stats["primary"],
+        "sticky_reads": _stats["sticky"],
+        "recent_writers": len(_recent_writers),
+    }
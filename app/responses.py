@@ -0,0 +1,88 @@
+"""
+orjson-backed JSON responses.
+
+Routes return plain dicts in the {"success": ..., "data": ...} envelope.
+Without a response_model FastAPI first walks the whole payload with
+jsonable_encoder (recursively rebuilding every dict and list) and then
+renders it with stdlib json — both in pure Python, which dominates the cost
+of large payloads such as /sos/history and /contacts.
+
+  FastJSONResponse — JSONResponse rendered with orjson, which handles
+                     datetime, date, UUID and Enum values natively.  Used as
+                     the app's default_response_class and by the exception
+                     handlers in main.py, so errors keep the same envelope.
+
+  FastJSONRoute    — APIRoute that renders a dict or list returned by an
+                     endpoint straight into a FastJSONResponse, skipping
+                     jsonable_encoder.  Rendering happens in the endpoint's
+                     own worker thread for sync routes.  Anything orjson
+                     cannot encode (pydantic models, Decimal, sets, bytes …)
+                     is handed back to FastAPI unchanged and takes the usual
+                     jsonable_encoder path.  Routes with a response_model,
+                     return annotation or explicit response_class are left
+                     alone.
+
+Without orjson installed both fall back to the stock JSONResponse behaviour.
+"""
+
+import inspect
+import functools
+
+from fastapi.datastructures import DefaultPlaceholder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def _unset(value) -> bool:
+    if isinstance(value, DefaultPlaceholder):
+        value = value.value
+    return value is None
+
+
+def _render(result, status_code):
+    if isinstance(result, (dict, list)):
+        try:
+            return FastJSONResponse(result, status_code=status_code)
+        except TypeError:  # orjson.JSONEncodeError — not plain data
+            pass
+    return result
+
+
+def _fast_endpoint(endpoint, status_code):
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            return _render(await endpoint(*args, **kwargs), status_code)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            return _render(endpoint(*args, **kwargs), status_code)
+    wrapper._fast_json = True
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    def __init__(self, path, endpoint, **kwargs):
+        if (
+            orjson is not None
+            and not getattr(endpoint, "_fast_json", False)  # include_router re-adds routes
+            and _unset(kwargs.get("response_model"))
+            and isinstance(kwargs.get("response_class", DefaultPlaceholder(None)), DefaultPlaceholder)
+            and inspect.signature(endpoint).return_annotation is inspect.Signature.empty
+        ):
+            endpoint = _fast_endpoint(endpoint, kwargs.get("status_code") or 200)
+        super().__init__(path, endpoint, **kwargs)
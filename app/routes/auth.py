@@ -17,13 +17,12 @@ from datetime import datetime, timezone, timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Request, HTTPException
-from jose import jwt as jose_jwt
+from app.responses import FastJSONRoute
 
 from app.config import settings
 from app.extensions import db
 from app.models.user import User
 from app.models.settings import UserSettings
-from app.models.revoked_token import RevokedToken
 from app.models.device_security import UserDeviceBinding, HandsetChangeRequest
 from app.schemas.auth_schema import (
     PhoneRegisterRequest, PhoneLoginRequest, VerifyPhoneOTPRequest,
@@ -34,13 +33,17 @@ from app.dependencies import get_current_user, decode_token_lenient
 from app.utils.validators import validate_password
 from app.utils.otp import store_otp, verify_otp, generate_otp
 from app.utils.encryption import compute_hmac
+from app.utils.jwt_codec import encode_token
+from app.utils.passwords import (
+    hash_password, check_password, needs_rehash, PasswordHasherBusy,
+)
 from app.services.sms_service import send_otp_sms
+from app.services.revocation_service import is_revoked, revoke_token
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-import bcrypt
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 limiter = Limiter(key_func=get_remote_address)
 
 
@@ -53,31 +56,43 @@ def _make_tokens(user_id: str):
         "sub": user_id, "type": "access", "jti": str(uuid.uuid4()),
         "iat": now, "exp": now + settings.JWT_ACCESS_TOKEN_EXPIRES,
     }
-    access_token = jose_jwt.encode(access_payload, settings.JWT_SECRET_KEY, algorithm="HS256")
+    access_token = encode_token(access_payload)
 
     refresh_payload = {
         "sub": user_id, "type": "refresh", "jti": str(uuid.uuid4()),
         "iat": now, "exp": now + settings.JWT_REFRESH_TOKEN_EXPIRES,
     }
-    refresh_token = jose_jwt.encode(refresh_payload, settings.JWT_SECRET_KEY, algorithm="HS256")
+    refresh_token = encode_token(refresh_payload)
 
     sos_payload = {
         "sub": user_id, "type": "access", "token_purpose": "sos",
         "jti": str(uuid.uuid4()), "iat": now,
         "exp": now + timedelta(days=settings.JWT_SOS_TOKEN_EXPIRES_DAYS),
     }
-    sos_token = jose_jwt.encode(sos_payload, settings.JWT_SECRET_KEY, algorithm="HS256")
+    sos_token = encode_token(sos_payload)
 
     expires_in = int(settings.JWT_ACCESS_TOKEN_EXPIRES.total_seconds())
     return access_token, refresh_token, sos_token, expires_in
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(503, headers={"Retry-After": "2"},
+                         detail={"code": "SERVICE_BUSY",
+                                 "message": "Too many sign-in requests right now. Please retry shortly."})
+
+
 def _hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    try:
+        return hash_password(password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 
 def _check_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+    try:
+        return check_password(password, hashed)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
 
 
 # ─── Health / validate ──────────────────────────────────────────────────────
@@ -215,6 +230,14 @@ def login_phone(request: Request, data: PhoneLoginRequest):
         raise HTTPException(403, detail={"code": "UNVERIFIED_PHONE",
                                          "message": "Please verify your phone number first."})
 
+    # BCRYPT_ROUNDS changed since this hash was made — upgrade it while we have
+    # the plaintext. Committed with the rest of the login below.
+    if needs_rehash(user.password_hash):
+        try:
+            user.password_hash = hash_password(data.password)
+        except PasswordHasherBusy:
+            pass  # not worth failing the login; retried on the next one
+
     # IMEI binding check
     if settings.IMEI_BINDING_ENABLED and data.device_imei:
         binding = UserDeviceBinding.query.filter_by(user_id=user.id).first()
@@ -306,18 +329,19 @@ def refresh_token(data: RefreshTokenRequest):
         raise HTTPException(401, detail={"code": "REFRESH_TOKEN_INVALID",
                                          "message": "Token missing JTI."})
 
-    if RevokedToken.query.filter_by(jti=jti).first():
-        raise HTTPException(401, detail={"code": "REFRESH_TOKEN_REUSED",
-                                         "message": "Refresh token already used. Please log in again."})
+    reused = HTTPException(401, detail={"code": "REFRESH_TOKEN_REUSED",
+                                        "message": "Refresh token already used. Please log in again."})
+    if is_revoked(jti):
+        raise reused
 
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(401, detail={"code": "REFRESH_TOKEN_INVALID",
                                          "message": "Invalid refresh token."})
 
-    # Revoke old token
-    db.session.add(RevokedToken(jti=jti, token_type='refresh'))
-    db.session.commit()
+    # Revoke old token — a concurrent refresh with the same token loses here
+    if not revoke_token(jti, 'refresh', exp=payload.get("exp")):
+        raise reused
 
     access_token, refresh_token_new, sos_token, expires_in = _make_tokens(user_id)
     return {
@@ -337,9 +361,8 @@ def logout(data: RefreshTokenRequest):
     try:
         payload = decode_token_lenient(data.refresh_token)
         jti = payload.get("jti")
-        if jti and not RevokedToken.query.filter_by(jti=jti).first():
-            db.session.add(RevokedToken(jti=jti, token_type='refresh'))
-            db.session.commit()
+        if jti and not is_revoked(jti):
+            revoke_token(jti, 'refresh', exp=payload.get("exp"))
     except Exception:
         pass
     return {"success": True, "message": "Logged out successfully."}
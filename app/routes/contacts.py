@@ -7,27 +7,33 @@ Encryption note:
 
 import random
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Request
+from app.responses import FastJSONRoute
 
 from app.extensions import db
 from app.models.trusted_contact import TrustedContact
-from app.models.otp import OTPRecord
 from app.models.user import User
 from app.schemas.contact_schema import ContactRequest
 from app.config import Config, settings
 from app.dependencies import get_current_user
 from app.utils.encryption import compute_hmac
+from app.utils.otp import (
+    store_otp, check_otp, restore_otp, OTP_NOT_FOUND, OTP_EXPIRED, OTP_TOO_MANY_ATTEMPTS, OTP_INVALID,
+)
+from app.services.user_snapshot import get_snapshot, snapshot_response
 from app.services.sms_service import send_contact_verification_otp, send_contact_welcome_sms
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get("")
-def get_contacts(user_id: str = Depends(get_current_user)):
-    contacts = TrustedContact.query.filter_by(user_id=user_id).all()
-    return {"success": True, "data": [c.to_dict() for c in contacts], "count": len(contacts)}
+def get_contacts(request: Request, user_id: str = Depends(get_current_user)):
+    snap = get_snapshot(user_id)
+    if not snap:
+        return {"success": True, "data": [], "count": 0}
+    return snapshot_response(request, snap, 'contacts', count=len(snap.contacts))
 
 
 @router.post("", status_code=200)
@@ -43,17 +49,6 @@ def add_contact(data: ContactRequest, user_id: str = Depends(get_current_user)):
         raise HTTPException(400, detail={"code": "DUPLICATE", "message": "This contact already exists."})
 
     otp_code = str(random.randint(100000, 999999))
-    expires_at = datetime.utcnow() + timedelta(seconds=Config.OTP_EXPIRY_SECONDS)
-
-    # OTPRecord still stores phone in plaintext (OTP excluded from encryption per requirements)
-    OTPRecord.query.filter_by(
-        phone=phone, purpose='trusted_contact_verification', is_used=False
-    ).update({'is_used': True}, synchronize_session=False)
-
-    db.session.add(OTPRecord(
-        phone=phone, otp_code=otp_code,
-        purpose='trusted_contact_verification', expires_at=expires_at
-    ))
 
     new_contact = TrustedContact(
         user_id=user_id,
@@ -68,6 +63,10 @@ def add_contact(data: ContactRequest, user_id: str = Depends(get_current_user)):
     db.session.add(new_contact)
 
     try:
+        # The OTP is issued before the contact commits (and with the db store,
+        # in the same transaction), so a contact never exists without its code.
+        # OTP phone is kept in plaintext (OTP excluded from encryption per requirements)
+        store_otp(phone=phone, otp_code=otp_code, purpose='trusted_contact_verification', commit=False)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -110,25 +109,21 @@ def verify_contact_otp(body: dict, user_id: str = Depends(get_current_user)):
     if contact.is_verified:
         return {"success": True, "message": "Already verified.", "data": contact.to_dict(), "already_verified": True}
 
-    # OTPRecord.phone is stored in plaintext (OTP excluded from encryption per requirements)
-    # contact.phone is decrypted transparently by the TypeDecorator
-    otp_record = OTPRecord.query.filter_by(
-        phone=contact.phone, purpose='trusted_contact_verification', is_used=False
-    ).order_by(OTPRecord.created_at.desc()).first()
-
-    if not otp_record:
+    # contact.phone is decrypted transparently by the TypeDecorator.
+    # commit=False: the OTP is marked used in the same commit that verifies
+    # the contact, so a failed commit leaves both untouched.
+    contact_phone = contact.phone  # still readable after a rollback expires the contact
+    outcome = check_otp(phone=contact_phone, otp_code=otp_code, purpose='trusted_contact_verification',
+                        commit=False)
+    if outcome == OTP_NOT_FOUND:
         raise HTTPException(404, detail={"code": "OTP_NOT_FOUND", "message": "No OTP found for this contact."})
-    if datetime.utcnow() > otp_record.expires_at:
+    if outcome == OTP_EXPIRED:
         raise HTTPException(400, detail={"code": "OTP_EXPIRED", "message": "OTP has expired."})
-    if otp_record.attempts >= Config.MAX_OTP_ATTEMPTS:
+    if outcome == OTP_TOO_MANY_ATTEMPTS:
         raise HTTPException(400, detail={"code": "MAX_ATTEMPTS", "message": "Maximum OTP attempts exceeded."})
-
-    otp_record.attempts += 1
-    if otp_record.otp_code != otp_code:
-        db.session.commit()
+    if outcome == OTP_INVALID:
         raise HTTPException(400, detail={"code": "INVALID_OTP", "message": "Invalid OTP code."})
 
-    otp_record.is_used = True
     contact.is_verified = True
     contact.verified_at = datetime.utcnow()
 
@@ -141,6 +136,7 @@ def verify_contact_otp(body: dict, user_id: str = Depends(get_current_user)):
         db.session.commit()
     except Exception as e:
         db.session.rollback()
+        restore_otp(contact_phone, otp_code, 'trusted_contact_verification')
         raise HTTPException(500, detail={"code": "INTERNAL_ERROR", "message": "Failed to verify contact."})
 
     user = db.session.get(User, user_id)
@@ -165,19 +161,10 @@ def resend_contact_otp(body: dict, user_id: str = Depends(get_current_user)):
         raise HTTPException(404, detail={"code": "NOT_FOUND",
                                          "message": "Pending contact not found or already verified."})
 
-    # OTPRecord.phone is plaintext — contact.phone is decrypted by TypeDecorator
-    OTPRecord.query.filter_by(
-        phone=contact.phone, purpose='trusted_contact_verification', is_used=False
-    ).update({'is_used': True}, synchronize_session=False)
-
+    # contact.phone is decrypted by TypeDecorator; the new code replaces any earlier one
     otp_code = str(random.randint(100000, 999999))
-    expires_at = datetime.utcnow() + timedelta(seconds=Config.OTP_EXPIRY_SECONDS)
-    db.session.add(OTPRecord(
-        phone=contact.phone, otp_code=otp_code,
-        purpose='trusted_contact_verification', expires_at=expires_at
-    ))
     try:
-        db.session.commit()
+        store_otp(phone=contact.phone, otp_code=otp_code, purpose='trusted_contact_verification')
     except Exception as e:
         db.session.rollback()
         raise HTTPException(500, detail={"code": "INTERNAL_ERROR", "message": "Failed to resend OTP."})
@@ -10,6 +10,7 @@ from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.responses import FastJSONRoute
 
 from app.extensions import db
 from app.models.user import User
@@ -21,7 +22,7 @@ from app.utils.encryption import compute_hmac
 from app.services.sos_service import trigger_sos
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 class DeviceRegisterRequest(BaseModel):
@@ -4,10 +4,11 @@ import uuid
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.responses import FastJSONRoute
 from app.services.location_service import update_location, get_last_location, start_sharing, stop_sharing
 from app.dependencies import get_current_user
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 class LocationUpdateRequest(BaseModel):
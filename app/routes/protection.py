@@ -2,13 +2,14 @@
 
 import logging
 from fastapi import APIRouter, Depends, HTTPException
+from app.responses import FastJSONRoute
 from app.dependencies import get_current_user
 from app.schemas.protection_schema import (
     ToggleProtectionRequest, SensorDataRequest, SensorWindowRequest,
 )
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.post(
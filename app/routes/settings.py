@@ -1,20 +1,22 @@
 """Settings routes — converted to FastAPI."""
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.responses import FastJSONRoute
 from app.extensions import db
 from app.models.settings import UserSettings
 from app.schemas.settings_schema import SettingsUpdateRequest
 from app.dependencies import get_current_user
+from app.services.user_snapshot import get_snapshot, snapshot_response
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get("")
-def get_settings(user_id: str = Depends(get_current_user)):
-    settings_obj = UserSettings.query.filter_by(user_id=user_id).first()
-    if not settings_obj:
+def get_settings(request: Request, user_id: str = Depends(get_current_user)):
+    snap = get_snapshot(user_id)
+    if not snap or snap.settings is None:
         raise HTTPException(404, detail={"code": "NOT_FOUND", "message": "Settings not found."})
-    return {"success": True, "data": settings_obj.to_dict()}
+    return snapshot_response(request, snap, 'settings')
 
 
 @router.put("")
@@ -4,19 +4,20 @@ import logging
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
+from app.responses import FastJSONRoute
 
-from app.extensions import db
 from app.models.sos_alert import SOSAlert
-from app.models.user import User
 from app.dependencies import get_current_user
 from app.services.sos_service import (
     trigger_sos, dispatch_sos, cancel_sos, mark_user_safe,
-    COUNTDOWN_SECONDS, COUNTDOWN_EXPIRY_SECONDS,
+    get_sos_history_page, InvalidHistoryQuery, live_alert_filter,
+    COUNTDOWN_SECONDS,
 )
+from app.services.user_snapshot import get_snapshot
 from app.utils.timezone_utils import format_datetime_for_response, get_timezone_for_country
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 class TriggerSOSRequest(BaseModel):
@@ -34,22 +35,6 @@ class WhatsAppTestRequest(BaseModel):
     message: Optional[str] = "This is a test message from Asfalis."
 
 
-def _expire_stale_countdowns(user_id: str):
-    """Auto-expire countdown alerts older than COUNTDOWN_EXPIRY_SECONDS."""
-    from datetime import datetime, timedelta
-    cutoff = datetime.utcnow() - timedelta(seconds=COUNTDOWN_EXPIRY_SECONDS)
-    try:
-        SOSAlert.query.filter(
-            SOSAlert.user_id == user_id,
-            SOSAlert.status == 'countdown',
-            SOSAlert.triggered_at < cutoff
-        ).update({'status': 'cancelled', 'resolution_type': 'expired'}, synchronize_session=False)
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        logger.warning(f"Failed to expire stale countdowns for user {user_id}: {e}")
-
-
 @router.post(
     "/trigger",
     status_code=201,
@@ -70,8 +55,8 @@ def _expire_stale_countdowns(user_id: str):
     ),
 )
 def trigger_sos_route(data: TriggerSOSRequest, user_id: str = Depends(get_current_user)):
-    from app.models.trusted_contact import TrustedContact
-    if TrustedContact.query.filter_by(user_id=user_id).count() == 0:
+    snap = get_snapshot(user_id)
+    if not snap or not snap.contacts:
         raise HTTPException(400, detail={"code": "NO_CONTACTS",
                                          "message": "Add at least one emergency contact before sending an SOS."})
 
@@ -82,8 +67,8 @@ def trigger_sos_route(data: TriggerSOSRequest, user_id: str = Depends(get_curren
         raise HTTPException(400, detail={"code": "SOS_ERROR", "message": msg})
 
     from datetime import datetime, timedelta
-    user = db.session.get(User, user_id)
-    tz = get_timezone_for_country(user.country).zone if user and user.country else 'UTC'
+    country = snap.profile['country']
+    tz = get_timezone_for_country(country).zone if country else 'UTC'
     countdown_expires_at = (
         alert.triggered_at + timedelta(seconds=countdown_seconds)
     ).isoformat() + 'Z'
@@ -92,7 +77,7 @@ def trigger_sos_route(data: TriggerSOSRequest, user_id: str = Depends(get_curren
         "alert_id": alert.id,
         "trigger_type": alert.trigger_type,
         "status": alert.status,
-        "triggered_at": format_datetime_for_response(alert.triggered_at, user.country if user else None),
+        "triggered_at": format_datetime_for_response(alert.triggered_at, country),
         "timezone": tz,
         "countdown_seconds": countdown_seconds,
         "countdown_expires_at": countdown_expires_at,
@@ -167,21 +152,24 @@ def mark_safe_route(body: dict, user_id: str = Depends(get_current_user)):
     "/history",
     summary="Get SOS Alert History",
     description=(
-        "Returns all SOS alerts for the user in reverse chronological order. "
-        "Stale `countdown` alerts older than the expiry window are auto-cancelled before returning. "
-        "Each alert includes `status`, `trigger_type`, `triggered_at` (localized), and `resolution_type`."
+        "Returns the user's SOS alerts in reverse chronological order, one page at a time. "
+        "`countdown` alerts older than the expiry window are reported as cancelled/expired. "
+        "Each alert includes `status`, `trigger_type`, `triggered_at` (localized), and `resolution_type`.\n\n"
+        "- `limit` — page size (default and maximum set by SOS_HISTORY_PAGE_SIZE / SOS_HISTORY_MAX_PAGE_SIZE)\n"
+        "- `cursor` — `pagination.next_cursor` from the previous page; omit for the newest alerts\n"
+        "- `fields` — comma-separated subset of `alert_id,trigger_type,address,status,triggered_at,"
+        "resolved_at,resolution_type` (default: all)"
     ),
 )
-def get_sos_history(user_id: str = Depends(get_current_user)):
-    _expire_stale_countdowns(user_id)
-    alerts = SOSAlert.query.filter_by(user_id=user_id)\
-        .order_by(SOSAlert.triggered_at.desc()).all()
-    user = db.session.get(User, user_id)
-    country = user.country if user else None
-    return {"success": True, "data": [
-        {**alert.to_dict(), "triggered_at": format_datetime_for_response(alert.triggered_at, country)}
-        for alert in alerts
-    ]}
+def get_sos_history(limit: Optional[int] = None, cursor: Optional[str] = None,
+                    fields: Optional[str] = None, user_id: str = Depends(get_current_user)):
+    wanted = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+    try:
+        alerts, next_cursor = get_sos_history_page(user_id, limit, cursor, wanted)
+    except InvalidHistoryQuery as e:
+        raise HTTPException(400, detail={"code": "INVALID_QUERY", "message": str(e)})
+    return {"success": True, "data": alerts,
+            "pagination": {"next_cursor": next_cursor, "has_more": next_cursor is not None}}
 
 
 @router.get("/countdown/{alert_id}")
@@ -257,25 +245,24 @@ def get_countdown_status(alert_id: str, user_id: str = Depends(get_current_user)
 def get_active_sos(user_id: str = Depends(get_current_user)):
     from datetime import datetime, timedelta
 
-    _expire_stale_countdowns(user_id)
-
     alert = SOSAlert.query.filter(
         SOSAlert.user_id == user_id,
-        SOSAlert.status.in_(['countdown', 'sent'])
+        live_alert_filter(),
     ).order_by(SOSAlert.triggered_at.desc()).first()
 
     if not alert:
         raise HTTPException(404, detail={"code": "NO_ACTIVE_SOS",
                                          "message": "No active SOS alert found."})
 
-    user = db.session.get(User, user_id)
-    tz = get_timezone_for_country(user.country).zone if user and user.country else 'UTC'
+    snap = get_snapshot(user_id)
+    country = snap.profile['country'] if snap else None
+    tz = get_timezone_for_country(country).zone if country else 'UTC'
 
     response = {
         "alert_id": alert.id,
         "status": alert.status,
         "trigger_type": alert.trigger_type,
-        "triggered_at": format_datetime_for_response(alert.triggered_at, user.country if user else None),
+        "triggered_at": format_datetime_for_response(alert.triggered_at, country),
         "timezone": tz,
         "countdown_seconds": COUNTDOWN_SECONDS,
         "seconds_remaining": 0,
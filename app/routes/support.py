@@ -3,11 +3,12 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
+from app.responses import FastJSONRoute
 from app.extensions import db
 from app.models.support import SupportTicket
 from app.dependencies import get_current_user
 
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 class TicketRequest(BaseModel):
@@ -1,16 +1,17 @@
 """User profile routes — converted to FastAPI."""
 
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.responses import FastJSONRoute
 
 from app.extensions import db
 from app.models.user import User
-from app.models.trusted_contact import TrustedContact
 from app.schemas.user_schema import UpdateProfileRequest, FCMTokenRequest
 from app.dependencies import get_current_user
+from app.services.user_snapshot import get_snapshot, snapshot_response
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(route_class=FastJSONRoute)
 
 
 @router.get("/security-policy")
@@ -24,32 +25,16 @@ def get_security_policy(user_id: str = Depends(get_current_user)):
 
 
 @router.get("/profile")
-def get_profile(user_id: str = Depends(get_current_user)):
-    user = db.session.get(User, user_id)
-    if not user:
-        raise HTTPException(404, detail={"code": "NOT_FOUND", "message": "User not found."})
-
+def get_profile(request: Request, user_id: str = Depends(get_current_user)):
     try:
-        contacts = TrustedContact.query.filter_by(user_id=user_id).all()
-        return {"success": True, "data": {
-            "user_id": user.id,
-            "full_name": user.full_name,
-            "email": user.email,
-            "country": user.country,
-            "phone": user.phone,
-            "sos_message": user.sos_message,
-            "profile_image_url": user.profile_image_url,
-            "emergency_contact": user.settings.emergency_number if user.settings else None,
-            "trusted_contacts": [c.to_dict() for c in contacts],
-            "trusted_contacts_count": len(contacts),
-            "member_since": user.created_at.strftime('%B %Y'),
-            "is_protection_active": True,
-            "auth_provider": user.auth_provider,
-        }}
+        snap = get_snapshot(user_id)
     except Exception as e:
         logger.error(f"Profile fetch failed for user {user_id}: {e}")
         db.session.rollback()
         raise HTTPException(500, detail={"code": "INTERNAL_ERROR", "message": "Failed to fetch profile."})
+    if not snap:
+        raise HTTPException(404, detail={"code": "NOT_FOUND", "message": "User not found."})
+    return snapshot_response(request, snap, 'profile')
 
 
 @router.put("/profile")
@@ -0,0 +1,253 @@
+"""
+Shared outbound delivery queue for SMS, WhatsApp and push notifications.
+
+send_sms, send_whatsapp_alert and send_push_notification used to start one
+thread per message, so a registration spike or a large SOS fan-out created
+an unbounded number of threads.  They now submit a job here instead.
+
+Architecture
+────────────
+• One queue, bounded at DELIVERY_QUEUE_MAX jobs in flight (queued, sending or
+  waiting to retry) across all providers.  submit() returns False when full.
+• Per-provider channels ('sms', 'whatsapp', 'fcm'), each with
+    – DELIVERY_WORKERS concurrent senders, and
+    – a token bucket (DELIVERY_RATE_<PROVIDER> messages/second) so bursts
+      stay under Twilio's per-sender caps instead of being rejected with
+      20429s.  A slow provider never holds up the others.
+• The queue runs its own asyncio loop on a daemon thread, so it can be fed
+  from sync routes, the SOS auto-dispatch thread or scripts alike; the
+  blocking provider SDK calls run on a small thread pool sized to the
+  total worker count.
+• A job is a zero-argument callable.  Returning means delivered; raising
+  PermanentFailure means give up (invalid number, unregistered token, …);
+  any other exception is retried up to DELIVERY_MAX_ATTEMPTS times with
+  full-jitter exponential backoff (DELIVERY_RETRY_BASE_SECONDS doubling,
+  capped at DELIVERY_RETRY_MAX_SECONDS).
+
+A job submitted inside an SOS trace keeps it (tracing.bind), so its sender
+spans land under the operation that queued it.
+
+delivery_stats() reports per-provider queue depth, counters and lag (time
+from enqueue, or from a retry becoming due, to the send starting).
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import settings
+from app.tracing import bind
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentFailure(Exception):
+    """Raised by a delivery job when retrying cannot help."""
+
+
+class _Job:
+    __slots__ = ('provider', 'fn', 'label', 'attempts', 'ready_at')
+
+    def __init__(self, provider, fn, label):
+        self.provider = provider
+        self.fn = fn
+        self.label = label
+        self.attempts = 0
+        self.ready_at = time.monotonic()
+
+
+class TokenBucket:
+    """Async token bucket: *rate* tokens per second, holding at most *burst*."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _Channel:
+    def __init__(self, name, rate):
+        self.name = name
+        self.rate = rate
+        self.queue = asyncio.Queue()
+        self.bucket = TokenBucket(rate, max(rate, 1.0))
+        self.depth = 0            # jobs queued or waiting to retry
+        self.sending = 0
+        self.enqueued = self.sent = self.failed = self.retried = self.dropped = 0
+        self.lag_max = 0.0
+        self.recent_lags = deque(maxlen=1024)
+
+    def stats(self) -> dict:
+        lags = sorted(self.recent_lags)
+        pct = lambda q: round(lags[min(int(len(lags) * q), len(lags) - 1)] * 1000, 1) if lags else 0.0
+        return {
+            "rate_per_sec": self.rate,
+            "depth": self.depth,
+            "sending": self.sending,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "dropped": self.dropped,
+            "lag_ms_p50": pct(0.50),
+            "lag_ms_p99": pct(0.99),
+            "lag_ms_max": round(self.lag_max * 1000, 1),
+        }
+
+
+class DeliveryQueue:
+    def __init__(self, rates: dict, max_depth: int, workers: int,
+                 max_attempts: int, retry_base: float, retry_max: float):
+        self.rates = rates
+        self.max_depth = max_depth
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self._channels = {}
+        self._loop = None
+        self._executor = None
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                for name, rate in self.rates.items():
+                    channel = _Channel(name, rate)
+                    self._channels[name] = channel
+                    for _ in range(self.workers):
+                        loop.create_task(self._worker(channel))
+                ready.set()
+                loop.run_forever()
+
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers * len(self.rates), thread_name_prefix="delivery")
+            threading.Thread(target=_run, name="delivery-loop", daemon=True).start()
+            ready.wait()
+            self._loop = loop
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """Wait up to *timeout* seconds for in-flight jobs to finish. True if drained."""
+        deadline = time.monotonic() + timeout
+        while self._in_flight and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return not self._in_flight
+
+    # ── Producer side (any thread) ───────────────────────────────────────────
+
+    def submit(self, provider: str, fn, label: str = "") -> bool:
+        """Queue *fn* for delivery through *provider*. False if the queue is full."""
+        self._ensure_started()
+        channel = self._channels[provider]
+        with self._lock:
+            if self._in_flight >= self.max_depth:
+                channel.dropped += 1
+                logger.error(f"Delivery queue full ({self.max_depth}) — dropping {provider} message {label}")
+                return False
+            self._in_flight += 1
+            channel.depth += 1
+            channel.enqueued += 1
+        self._loop.call_soon_threadsafe(channel.queue.put_nowait, _Job(provider, bind(fn), label))
+        return True
+
+    # ── Consumer side (delivery loop) ────────────────────────────────────────
+
+    def _backoff(self, attempts: int) -> float:
+        return random.uniform(0, min(self.retry_max, self.retry_base * 2 ** (attempts - 1)))
+
+    def _finish(self, channel):
+        with self._lock:
+            self._in_flight -= 1
+            channel.depth -= 1
+
+    async def _worker(self, channel):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await channel.queue.get()
+            await channel.bucket.acquire()
+            lag = time.monotonic() - job.ready_at
+            channel.lag_max = max(channel.lag_max, lag)
+            channel.recent_lags.append(lag)
+
+            job.attempts += 1
+            channel.sending += 1
+            try:
+                await loop.run_in_executor(self._executor, job.fn)
+            except PermanentFailure as e:
+                channel.failed += 1
+                logger.warning(f"{channel.name} delivery {job.label} failed permanently: {e}")
+                self._finish(channel)
+            except Exception as e:
+                if job.attempts >= self.max_attempts:
+                    channel.failed += 1
+                    logger.error(f"{channel.name} delivery {job.label} failed after {job.attempts} attempts: {e}")
+                    self._finish(channel)
+                else:
+                    channel.retried += 1
+                    delay = self._backoff(job.attempts)
+                    logger.warning(f"{channel.name} delivery {job.label} attempt {job.attempts} failed: {e} "
+                                   f"— retrying in {delay:.1f}s")
+                    job.ready_at = time.monotonic() + delay
+                    loop.call_later(delay, channel.queue.put_nowait, job)
+            else:
+                channel.sent += 1
+                self._finish(channel)
+            finally:
+                channel.sending -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_depth": self.max_depth,
+            "providers": {name: ch.stats() for name, ch in self._channels.items()},
+        }
+
+
+delivery_queue = DeliveryQueue(
+    rates={
+        "sms": settings.DELIVERY_RATE_SMS,
+        "whatsapp": settings.DELIVERY_RATE_WHATSAPP,
+        "fcm": settings.DELIVERY_RATE_FCM,
+    },
+    max_depth=settings.DELIVERY_QUEUE_MAX,
+    workers=settings.DELIVERY_WORKERS,
+    max_attempts=settings.DELIVERY_MAX_ATTEMPTS,
+    retry_base=settings.DELIVERY_RETRY_BASE_SECONDS,
+    retry_max=settings.DELIVERY_RETRY_MAX_SECONDS,
+)
+
+
+def submit(provider: str, fn, label: str = "") -> bool:
+    return delivery_queue.submit(provider, fn, label)
+
+
+def delivery_stats() -> dict:
+    return delivery_queue.stats()
@@ -1,38 +1,221 @@
-import firebase_admin
-from firebase_admin import credentials, messaging
+"""
+FCM push notifications, coalesced into send_each batches.
+
+send_push_notification() does not send anything itself: it appends the
+message to a pending buffer and, if no flush is already waiting, queues one
+flush job on the shared delivery queue ('fcm' channel).  When that job runs
+it takes up to FCM_BATCH_SIZE (max 500, FCM's limit) pending messages and
+sends them in a single messaging.send_each() call; anything left over
+schedules another flush.  Under load, pushes that arrive while a flush is
+waiting ride along with it; when idle, a push goes out as soon as the
+delivery queue gets to it.
+
+send_each() goes through the default Firebase app, whose messaging service
+and authorised HTTP session are created once and reused by every batch.
+
+Per-token results:
+  • Unregistered / sender-mismatch errors mean the token is stale.  The
+    generic INVALID_ARGUMENT is not one of them: FCM also returns it for a
+    bad payload (oversized data, invalid field), which says nothing about
+    the token.  When the message carried a user_id, that user's fcm_token is
+    cleared — but only if it still holds the failed token, so a token the
+    app re-registered in the meantime survives.
+  • INVALID_ARGUMENT is logged and dropped: re-sending the same message
+    would fail the same way.
+  • Other failures (quota, unavailable, internal) are retried by the delivery
+    queue, re-sending only the messages that failed.
+"""
+
 from app.config import Config
 import os
 import json
 import logging
 import threading
 
+from app.services.delivery_queue import submit
+from app.tracing import span
+
 logger = logging.getLogger(__name__)
 
-# Initialize Firebase App
-cred_path = Config.FIREBASE_CREDENTIALS_PATH
-cred_json = Config.FIREBASE_CREDENTIALS_JSON
-
-try:
-    if cred_path and os.path.exists(cred_path):
-        cred = credentials.Certificate(cred_path)
-        firebase_admin.initialize_app(cred)
-    elif cred_json:
-        cred = credentials.Certificate(json.loads(cred_json))
-        firebase_admin.initialize_app(cred)
-    else:
-        logger.warning("Firebase credentials not found (PATH or JSON). Push notifications will not work.")
-except ValueError:
-    pass  # App already initialized
-except Exception as e:
-    logger.error(f"Error initializing Firebase: {e}")
+# firebase_admin (and google.auth behind it) costs ~70 ms to import and reads
+# the service-account credentials, so it is loaded on the first push — or by
+# warm_up() once the server is already answering requests — not at import.
+_messaging = None
+_firebase_ready = None
+_firebase_lock = threading.Lock()
+_STALE_TOKEN_ERRORS = ()
+_REJECTED_ERRORS = ()
 
 
-def _is_firebase_ready():
+def _init_firebase():
+    global _messaging, _STALE_TOKEN_ERRORS, _REJECTED_ERRORS
+    import firebase_admin
+    from firebase_admin import credentials, messaging
+    from firebase_admin.exceptions import InvalidArgumentError
+
+    _messaging = messaging
+    _STALE_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+    _REJECTED_ERRORS = (InvalidArgumentError,)
+
+    cred_path = Config.FIREBASE_CREDENTIALS_PATH
+    cred_json = Config.FIREBASE_CREDENTIALS_JSON
+    try:
+        if cred_path and os.path.exists(cred_path):
+            firebase_admin.initialize_app(credentials.Certificate(cred_path))
+        elif cred_json:
+            firebase_admin.initialize_app(credentials.Certificate(json.loads(cred_json)))
+        else:
+            logger.warning("Firebase credentials not found (PATH or JSON). Push notifications will not work.")
+    except ValueError:
+        pass  # App already initialized
+    except Exception as e:
+        logger.error(f"Error initializing Firebase: {e}")
     return bool(firebase_admin._apps)
 
 
-def send_push_notification(fcm_token, title, body, data=None):
-    """Send a push notification via FCM in a background thread."""
+def _is_firebase_ready():
+    """Initialise Firebase on first call; True if push notifications can be sent."""
+    global _firebase_ready
+    if _firebase_ready is None:
+        with _firebase_lock:
+            if _firebase_ready is None:
+                try:
+                    _firebase_ready = _init_firebase()
+                except ImportError as e:
+                    logger.error(f"firebase_admin unavailable: {e}")
+                    _firebase_ready = False
+    return _firebase_ready
+
+
+def warm_up():
+    """Import and initialise Firebase ahead of the first push."""
+    _is_firebase_ready()
+
+
+_MAX_BATCH = 500
+
+
+class _Push:
+    __slots__ = ('message', 'token', 'user_id')
+
+    def __init__(self, message, token, user_id):
+        self.message = message
+        self.token = token
+        self.user_id = user_id
+
+
+_pending = []
+_flush_queued = False
+_pending_lock = threading.Lock()
+_stats = {"batches": 0, "sent": 0, "failed": 0, "stale_tokens_pruned": 0}
+
+
+def _build_message(fcm_token, title, body, data):
+    messaging = _messaging
+    return messaging.Message(
+        notification=messaging.Notification(title=title, body=body),
+        data=data or {},
+        token=fcm_token,
+        android=messaging.AndroidConfig(
+            priority='high',
+            notification=messaging.AndroidNotification(
+                channel_id='sos_channel',
+                priority='max',
+                sound='alarm'
+            )
+        )
+    )
+
+
+def _prune_stale_tokens(stale):
+    """Clear User.fcm_token for (user_id, token) pairs FCM reported as stale."""
+    from sqlalchemy.orm import Session
+    from app.database import engine
+    from app.models.user import User
+    pruned = 0
+    with Session(engine) as session:
+        for user_id, token in stale:
+            user = session.get(User, user_id)
+            if user and user.fcm_token == token:  # fcm_token is encrypted — compare decrypted
+                user.fcm_token = None
+                pruned += 1
+        session.commit()
+    if pruned:
+        _stats["stale_tokens_pruned"] += pruned
+        logger.info(f"Pruned {pruned} stale FCM token(s)")
+
+
+def _send_batch(batch):
+    """send_each *batch*, prune stale tokens, and return the pushes worth retrying."""
+    with span('fcm.send_batch', batch_size=len(batch)):
+        response = _messaging.send_each([p.message for p in batch])
+    _stats["batches"] += 1
+    _stats["sent"] += response.success_count
+    stale, retry, rejected = [], [], 0
+    for push, result in zip(batch, response.responses):
+        if result.success:
+            continue
+        if isinstance(result.exception, _STALE_TOKEN_ERRORS):
+            _stats["failed"] += 1
+            if push.user_id:
+                stale.append((push.user_id, push.token))
+        elif isinstance(result.exception, _REJECTED_ERRORS):
+            _stats["failed"] += 1
+            rejected += 1
+            logger.warning(f"FCM rejected a push to {push.token[:20]}...: {result.exception}")
+        else:
+            retry.append((push, result.exception))
+    if stale:
+        try:
+            _prune_stale_tokens(stale)
+        except Exception as e:
+            logger.error(f"Failed to prune stale FCM tokens: {e}")
+    logger.info(f"Push batch: {response.success_count}/{len(batch)} sent, "
+                f"{len(stale)} stale, {rejected} rejected, {len(retry)} to retry")
+    return retry
+
+
+def _take_batch():
+    global _flush_queued
+    size = max(1, min(Config.FCM_BATCH_SIZE, _MAX_BATCH))
+    with _pending_lock:
+        batch, _pending[:] = _pending[:size], _pending[size:]
+        more = bool(_pending)
+        if not more:
+            _flush_queued = False
+    if more:
+        submit("fcm", _FlushJob(), label="push flush")
+    return batch
+
+
+class _FlushJob:
+    """
+    Delivery-queue job for one batch.  The first run takes up to one batch of
+    pending pushes; if some fail transiently it raises, and the queue's retry
+    (with backoff) calls it again to re-send only those.
+    """
+
+    def __init__(self):
+        self.batch = None
+
+    def __call__(self):
+        if self.batch is None:
+            self.batch = _take_batch()
+        if not self.batch:
+            return
+        retry = _send_batch(self.batch)
+        self.batch = [push for push, _ in retry]
+        if retry:
+            raise RuntimeError(f"{len(retry)} push(es) failed transiently, e.g. {retry[0][1]}")
+
+
+def send_push_notification(fcm_token, title, body, data=None, user_id=None):
+    """
+    Queue a push notification (see module docstring for batching).
+
+    Pass *user_id* (the owner of *fcm_token*) so the token can be cleared if
+    FCM reports it stale.
+    """
     if not fcm_token:
         logger.error("No FCM token provided")
         return None
@@ -41,27 +224,29 @@ def send_push_notification(fcm_token, title, body, data=None):
         logger.warning("Firebase not configured, skipping push notification.")
         return None
 
-    def _send():
-        try:
-            message = messaging.Message(
-                notification=messaging.Notification(title=title, body=body),
-                data=data or {},
-                token=fcm_token,
-                android=messaging.AndroidConfig(
-                    priority='high',
-                    notification=messaging.AndroidNotification(
-                        channel_id='sos_channel',
-                        priority='max',
-                        sound='alarm'
-                    )
-                )
-            )
-            response = messaging.send(message)
-            logger.info(f"Push notification sent: {response}")
-        except Exception as e:
-            logger.error(f"Error sending push notification: {e}")
-
-    t = threading.Thread(target=_send, daemon=True)
-    t.start()
-    logger.info(f"Push notification dispatch started for token: {fcm_token[:20]}...")
+    global _flush_queued
+    push = _Push(_build_message(fcm_token, title, body, data), fcm_token, user_id)
+    with _pending_lock:
+        _pending.append(push)
+        start_flush = not _flush_queued
+        _flush_queued = True
+    if start_flush and not submit("fcm", _FlushJob(), label="push flush"):
+        with _pending_lock:
+            _flush_queued = False
+            if push in _pending:
+                _pending.remove(push)
+        return None
+    logger.info(f"Push notification queued for token: {fcm_token[:20]}...")
     return "dispatched"
+
+
+def send_push_multicast(recipients, title, body, data=None):
+    """Queue the same notification for several (fcm_token, user_id) pairs."""
+    return [send_push_notification(token, title, body, data, user_id=user_id)
+            for token, user_id in recipients if token]
+
+
+def push_stats():
+    with _pending_lock:
+        pending = len(_pending)
+    return {"pending": pending, **_stats}
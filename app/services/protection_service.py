@@ -4,6 +4,7 @@ import math
 from app.config import settings
 from app.extensions import db
 from app.services.sos_service import trigger_sos
+from app.tracing import span
 
 active_protection_users = {}
 _sos_cooldown = {}
@@ -135,25 +136,26 @@ def analyze_sensor_data(user_id, sensor_type, readings, sensitivity):
         trigger_reason = "Unusual fall detected" if sensor_type == "accelerometer" else "Unusual shake/motion detected"
         trigger_prefix = f"⚠️ AUTO-SOS: {trigger_reason} ({int(confidence_danger * 100)}% confidence)\nSensor: {sensor_type} | System was armed at time of trigger"
         
-        alert, msg, countdown_seconds = trigger_sos(
-            user_id, lat, lng, trigger_type=trigger_type,
-            trigger_prefix=trigger_prefix, trigger_reason=trigger_reason,
-        )
-        _mark_sos_triggered(user_id)
-
-        if alert:
-            try:
-                from app.services.fcm_service import send_push_notification
-                from app.models.user import User
-                user = db.session.get(User, user_id)
-                if user and user.fcm_token:
-                    send_push_notification(
-                        fcm_token=user.fcm_token, title="⚠️ Auto SOS Triggered",
-                        body=f"{trigger_reason} — tap to cancel within {countdown_seconds}s",
-                        data={"type": "AUTO_SOS_COUNTDOWN", "alert_id": str(alert.id), "countdown_seconds": str(countdown_seconds)},
-                    )
-            except Exception:
-                pass
+        with span('sos.auto_trigger', operation=True, sensor_type=sensor_type):
+            alert, msg, countdown_seconds = trigger_sos(
+                user_id, lat, lng, trigger_type=trigger_type,
+                trigger_prefix=trigger_prefix, trigger_reason=trigger_reason,
+            )
+            _mark_sos_triggered(user_id)
+
+            if alert:
+                try:
+                    from app.services.fcm_service import send_push_notification
+                    from app.models.user import User
+                    user = db.session.get(User, user_id)
+                    if user and user.fcm_token:
+                        send_push_notification(
+                            fcm_token=user.fcm_token, user_id=user.id, title="⚠️ Auto SOS Triggered",
+                            body=f"{trigger_reason} — tap to cancel within {countdown_seconds}s",
+                            data={"type": "AUTO_SOS_COUNTDOWN", "alert_id": str(alert.id), "countdown_seconds": str(countdown_seconds)},
+                        )
+                except Exception:
+                    pass
 
         return {
             "alert_triggered": True, "alert_id": alert.id if alert else None,
@@ -199,25 +201,26 @@ def predict_from_window(user_id, window_data, sensor_type='accelerometer', locat
         trigger_reason = "Unusual fall detected" if sensor_type == "accelerometer" else "Unusual shake/motion detected"
         trigger_prefix = f"⚠️ AUTO-SOS: {trigger_reason} ({int(confidence * 100)}% confidence)\nSensor: {sensor_type} | Location: {location} | System was armed"
         
-        alert, msg, countdown_seconds = trigger_sos(
-            user_id, lat, lng, trigger_type=trigger_type,
-            trigger_prefix=trigger_prefix, trigger_reason=trigger_reason,
-        )
-        _mark_sos_triggered(user_id)
-
-        if alert:
-            try:
-                from app.services.fcm_service import send_push_notification
-                from app.models.user import User
-                user = db.session.get(User, user_id)
-                if user and user.fcm_token:
-                    send_push_notification(
-                        fcm_token=user.fcm_token, title="⚠️ Auto SOS Triggered",
-                        body=f"{trigger_reason} — tap to cancel within {countdown_seconds}s",
-                        data={"type": "AUTO_SOS_COUNTDOWN", "alert_id": str(alert.id), "countdown_seconds": str(countdown_seconds)},
-                    )
-            except Exception:
-                pass
+        with span('sos.auto_trigger', operation=True, sensor_type=sensor_type):
+            alert, msg, countdown_seconds = trigger_sos(
+                user_id, lat, lng, trigger_type=trigger_type,
+                trigger_prefix=trigger_prefix, trigger_reason=trigger_reason,
+            )
+            _mark_sos_triggered(user_id)
+
+            if alert:
+                try:
+                    from app.services.fcm_service import send_push_notification
+                    from app.models.user import User
+                    user = db.session.get(User, user_id)
+                    if user and user.fcm_token:
+                        send_push_notification(
+                            fcm_token=user.fcm_token, user_id=user.id, title="⚠️ Auto SOS Triggered",
+                            body=f"{trigger_reason} — tap to cancel within {countdown_seconds}s",
+                            data={"type": "AUTO_SOS_COUNTDOWN", "alert_id": str(alert.id), "countdown_seconds": str(countdown_seconds)},
+                        )
+                except Exception:
+                    pass
 
         response["sos_sent"] = True
         response["alert_id"] = alert.id if alert else None
@@ -0,0 +1,302 @@
+"""
+Refresh-token revocation checks backed by a Bloom filter.
+
+Every revoked refresh-token JTI lives in the revoked_tokens table.  Checking
+that table on each /refresh and each refresh-typed bearer request costs a DB
+round trip even though the answer is almost always "not revoked".  This
+module keeps a Bloom filter of all revoked JTIs in front of the table:
+
+  • JTI not in the filter  → definitely not revoked, no DB access.
+  • JTI in the filter      → confirmed against revoked_tokens (the filter
+                             only has false positives, never false negatives).
+
+Keeping workers in agreement
+────────────────────────────
+• Through the DB — every worker periodically (REVOKED_FILTER_SYNC_SECONDS)
+  pulls the rows inserted since the highest revoked_tokens.id it has seen.
+  This is a single indexed primary-key range scan, and it is the only DB
+  access on the "not revoked" path.
+• Through a shared file — when REVOKED_FILTER_PATH is set, the filter cells
+  live in a memory-mapped file, so a revocation recorded by one worker on the
+  host is visible to the others immediately, without waiting for a sync.
+
+Refresh-token rotation does not rely on the filter for correctness:
+revoke_token() inserts the JTI, and the unique constraint on
+revoked_tokens.jti rejects a second use even if two workers race.
+
+Rebuild path
+────────────
+Bloom filters cannot delete.  rebuild_revocation_filter() builds a fresh
+filter from the table, sized for the current row count, and atomically swaps
+it in (replacing the shared file when one is configured; the other workers
+re-map it on their next sync).  Call it after pruning revoked_tokens, or when
+the filter's fill ratio grows high.
+
+Pruning
+───────
+Each row carries the revoked token's own `exp` in expires_at.  /auth/refresh
+rejects refresh tokens more than REVOKED_TOKEN_GRACE_SECONDS past their exp,
+so after that point a row protects nothing.  run_revoked_token_sweeper()
+(started from the app lifespan) deletes such rows every
+REVOKED_SWEEP_INTERVAL_SECONDS in batches of REVOKED_SWEEP_BATCH_SIZE, each
+in its own short transaction, then rebuilds the filter.  Table size and batch
+latency of the last sweep are logged and available from sweeper_stats().
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import engine
+from app.extensions import db
+from app.models.revoked_token import RevokedToken
+from app.utils.bloom import BloomFilter
+from app.utils.sweep import delete_in_batches
+
+logger = logging.getLogger(__name__)
+
+_LOAD_CHUNK = 10_000
+
+_filter = None          # BloomFilter, or None until loaded (DB-only fallback)
+_last_id = 0            # highest revoked_tokens.id folded into _filter
+_last_sync = 0.0
+_file_stat = None       # (st_dev, st_ino) of the mapped file, to detect rebuilds
+_lock = threading.Lock()
+
+
+def _capacity_for(count: int) -> int:
+    # Leave headroom so the error rate holds until the next rebuild.
+    return max(settings.REVOKED_FILTER_CAPACITY, count * 2)
+
+
+def _fold_rows(bloom: BloomFilter, conn, after_id: int) -> int:
+    """Add every JTI with id > *after_id* to *bloom*; return the highest id seen."""
+    last = after_id
+    while True:
+        rows = conn.execute(
+            select(RevokedToken.id, RevokedToken.jti)
+            .where(RevokedToken.id > last)
+            .order_by(RevokedToken.id)
+            .limit(_LOAD_CHUNK)
+        ).all()
+        for row_id, jti in rows:
+            bloom.add(jti)
+        if rows:
+            last = rows[-1][0]
+        if len(rows) < _LOAD_CHUNK:
+            return last
+
+
+def _build() -> BloomFilter:
+    with engine.connect() as conn:
+        count = conn.execute(select(func.count()).select_from(RevokedToken)).scalar() or 0
+        bloom = BloomFilter.for_capacity(_capacity_for(count), settings.REVOKED_FILTER_ERROR_RATE)
+        bloom.watermark = _fold_rows(bloom, conn, 0)
+    return bloom
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_dev, st.st_ino
+
+
+def _install(bloom: BloomFilter) -> None:
+    global _filter, _last_id, _last_sync, _file_stat
+    _filter = bloom
+    _last_id = bloom.watermark
+    _last_sync = time.monotonic()
+    _file_stat = _stat(bloom.path) if bloom.path else None
+    # A replaced mapping is not closed here: a concurrent is_revoked() may still
+    # be reading it.  It is unmapped when the last reference goes away.
+
+
+def _open_shared(path: str) -> BloomFilter:
+    """Attach to the shared filter file, creating it if no worker has yet."""
+    if not os.path.exists(path):
+        _build().save_as(path, replace=False)  # loses harmlessly to a concurrent creator
+    return BloomFilter.open_file(path)
+
+
+def load_revocation_filter() -> None:
+    """Build (or attach to) the filter and catch up with revoked_tokens. Called at startup."""
+    global _last_id
+    started = time.perf_counter()
+    with _lock:
+        path = settings.REVOKED_FILTER_PATH
+        if path:
+            _install(_open_shared(path))
+            # The file may predate this database (e.g. a restored backup), so
+            # its watermark is not trusted at startup: fold in every row.
+            _last_id = 0
+            _sync_locked()
+        else:
+            _install(_build())
+    logger.info(
+        f"Revocation filter loaded: {_filter.cells:,} cells, {_filter.hashes} hashes, "
+        f"watermark id {_last_id}{' (shared: ' + path + ')' if path else ''} "
+        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+    )
+
+
+def rebuild_revocation_filter() -> None:
+    """Rebuild the filter from revoked_tokens and swap it in (see module docstring)."""
+    with _lock:
+        bloom = _build()
+        path = settings.REVOKED_FILTER_PATH
+        if path:
+            bloom.save_as(path)
+            bloom = BloomFilter.open_file(path)
+        _install(bloom)
+    logger.info(f"Revocation filter rebuilt: {bloom.cells:,} cells, watermark id {bloom.watermark}")
+
+
+def _sync_locked() -> None:
+    global _last_id, _last_sync
+    path = settings.REVOKED_FILTER_PATH
+    if path and _file_stat is not None:
+        try:
+            if _stat(path) != _file_stat:
+                # Another worker rebuilt the shared file — re-map it and catch up
+                # from its watermark.
+                _install(BloomFilter.open_file(path))
+        except FileNotFoundError:
+            pass  # keep using the mapping we have; the next rebuild recreates it
+    with engine.connect() as conn:
+        _last_id = _fold_rows(_filter, conn, _last_id)
+    _last_sync = time.monotonic()
+
+
+def _maybe_sync() -> None:
+    global _last_sync
+    if time.monotonic() - _last_sync < settings.REVOKED_FILTER_SYNC_SECONDS:
+        return
+    # Never queue behind a sync in progress — the current filter is good enough.
+    if not _lock.acquire(blocking=False):
+        return
+    try:
+        if time.monotonic() - _last_sync >= settings.REVOKED_FILTER_SYNC_SECONDS:
+            _sync_locked()
+    except Exception as e:
+        # Stale for a little longer is acceptable; retry after the next interval.
+        logger.warning(f"Revocation filter sync failed: {e}")
+        _last_sync = time.monotonic()
+    finally:
+        _lock.release()
+
+
+def is_revoked(jti: str) -> bool:
+    """True if *jti* has been revoked. Usually answered without touching the DB."""
+    if _filter is not None:
+        _maybe_sync()
+        if jti not in _filter:
+            return False
+    return db.session.scalar(select(RevokedToken.id).where(RevokedToken.jti == jti)) is not None
+
+
+def revoke_token(jti: str, token_type: str = 'refresh', exp=None) -> bool:
+    """
+    Record *jti* as revoked and commit.  *exp* is the token's `exp` claim
+    (epoch seconds); without it the row is never pruned.
+
+    Returns False if it was already revoked — including when a concurrent
+    request revoked it first, which the unique constraint on jti reports.
+    """
+    expires_at = datetime.utcfromtimestamp(int(exp)) if exp else None
+    db.session.add(RevokedToken(jti=jti, token_type=token_type, expires_at=expires_at))
+    try:
+        db.session.commit()
+        inserted = True
+    except IntegrityError:
+        db.session.rollback()
+        inserted = False
+    if _filter is not None:
+        _filter.add(jti)
+    return inserted
+
+
+def revocation_filter_stats() -> dict:
+    """Filter size, saturation and sync state, for diagnostics."""
+    if _filter is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "cells": _filter.cells,
+        "hashes": _filter.hashes,
+        "fill_ratio": round(_filter.fill_ratio, 4),
+        "last_id": _last_id,
+        "seconds_since_sync": round(time.monotonic() - _last_sync, 1),
+        "shared_file": _filter.path,
+    }
+
+
+# ── Expired-row sweeper ───────────────────────────────────────────────────────
+
+_last_sweep = {}
+
+
+def _table_size(conn) -> dict:
+    size = {"rows": conn.execute(select(func.count()).select_from(RevokedToken)).scalar() or 0}
+    if conn.dialect.name == 'postgresql':
+        size["bytes"] = conn.execute(text("SELECT pg_total_relation_size('revoked_tokens')")).scalar()
+    return size
+
+
+def prune_expired_tokens(batch_size: int = None, max_batches: int = None) -> dict:
+    """
+    Delete rows whose token expired more than the grace period ago, at most
+    *batch_size* per transaction and *max_batches* per call.  Returns (and
+    remembers for sweeper_stats()) the rows deleted, batch latencies and the
+    table size afterwards.
+    """
+    global _last_sweep
+    batch_size = batch_size or settings.REVOKED_SWEEP_BATCH_SIZE
+    max_batches = max_batches or settings.REVOKED_SWEEP_MAX_BATCHES
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.REVOKED_TOKEN_GRACE_SECONDS)
+
+    deleted, latencies = delete_in_batches(
+        RevokedToken, RevokedToken.expires_at < cutoff, batch_size, max_batches
+    )
+
+    with engine.connect() as conn:
+        size = _table_size(conn)
+    latencies.sort()
+    _last_sweep = {
+        "finished_at": datetime.utcnow().isoformat() + "Z",
+        "deleted": deleted,
+        "batches": len(latencies),
+        "batch_ms_p50": round(latencies[len(latencies) // 2], 2),
+        "batch_ms_max": round(latencies[-1], 2),
+        "table_rows": size["rows"],
+        "table_bytes": size.get("bytes"),
+    }
+    return _last_sweep
+
+
+def sweeper_stats() -> dict:
+    """Result of the most recent prune_expired_tokens() run (empty before the first)."""
+    return dict(_last_sweep)
+
+
+async def run_revoked_token_sweeper():
+    """Prune expired revoked_tokens rows every REVOKED_SWEEP_INTERVAL_SECONDS."""
+    while True:
+        try:
+            stats = await asyncio.to_thread(prune_expired_tokens)
+            logger.info(
+                f"revoked_tokens sweep: deleted {stats['deleted']} in {stats['batches']} batch(es) "
+                f"(p50 {stats['batch_ms_p50']} ms, max {stats['batch_ms_max']} ms); "
+                f"table now {stats['table_rows']} rows"
+                + (f", {stats['table_bytes']} bytes" if stats['table_bytes'] is not None else "")
+            )
+            if stats["deleted"] and _filter is not None:
+                await asyncio.to_thread(rebuild_revocation_filter)
+        except Exception as e:
+            logger.warning(f"revoked_tokens sweep failed: {e}")
+        await asyncio.sleep(settings.REVOKED_SWEEP_INTERVAL_SECONDS)
@@ -1,13 +1,15 @@
-from twilio.rest import Client
 from app.config import settings
 import logging
-import threading
+
+from app.services.delivery_queue import submit
+from app.services.twilio_client import get_client
+from app.tracing import traced
 
 logger = logging.getLogger(__name__)
 
 
 def send_sms(to, body):
-    """Send an SMS via Twilio in a background thread."""
+    """Queue an SMS for delivery via Twilio (see services/delivery_queue.py)."""
     try:
         account_sid = settings.TWILIO_ACCOUNT_SID
         auth_token = settings.TWILIO_AUTH_TOKEN
@@ -19,18 +21,15 @@ def send_sms(to, body):
             return "mock-sid"
 
         def _send():
-            try:
-                # client = Client(account_sid, auth_token)
-                # message = client.messages.create(body=body, from_=twilio_phone, to=to)
-                # logger.info(f"SMS sent to {to}: SID={message.sid}")
-                logger.info(f"[SMS DISABLED] To={to} | Body={body}")
-            except Exception as e:
-                logger.error(f"Twilio failed to send SMS to {to}: {e}")
-                logger.warning(f"[DEV FALLBACK] SMS body for {to}: {body}")
-
-        t = threading.Thread(target=_send, daemon=True)
-        t.start()
-        logger.info(f"SMS dispatch started for {to}")
+            # client = get_client(account_sid, auth_token)
+            # message = client.messages.create(body=body, from_=twilio_phone, to=to)
+            # logger.info(f"SMS sent to {to}: SID={message.sid}")
+            logger.info(f"[SMS DISABLED] To={to} | Body={body}")
+
+        if not submit("sms", _send, label=f"to {to}"):
+            logger.warning(f"[DEV FALLBACK] SMS body for {to}: {body}")
+            return None
+        logger.info(f"SMS queued for {to}")
         return "dispatched"
 
     except Exception as e:
@@ -56,7 +55,7 @@ def send_otp_via_verify(phone: str):
         return True, "mock"
 
     try:
-        # client = Client(account_sid, auth_token)
+        # client = get_client(account_sid, auth_token)
         # verification = client.verify.v2.services(service_sid).verifications.create(
         #     to=phone, channel='sms'
         # )
@@ -78,7 +77,7 @@ def check_otp_via_verify(phone: str, code: str):
         return True, "OTP verified (mock)"
 
     try:
-        client = Client(account_sid, auth_token)
+        client = get_client(account_sid, auth_token)
         check = client.verify.v2.services(service_sid).verification_checks.create(
             to=phone, code=code
         )
@@ -101,6 +100,7 @@ def send_sos_sms(contact_phone, user_name, message_text, location_url):
     return send_sms(contact_phone, body)
 
 
+@traced('sms.send')
 def send_sms_sync(to, body):
     """Send SMS synchronously. Returns (True, sid) or (False, error_str)."""
     try:
@@ -113,7 +113,7 @@ def send_sms_sync(to, body):
             logger.info(f"[MOCK SMS] To={to} | Body={body}")
             return False, "twilio_not_configured"
 
-        # client = Client(account_sid, auth_token)
+        # client = get_client(account_sid, auth_token)
         # message = client.messages.create(body=body, from_=twilio_phone, to=to)
         # logger.info(f"SMS sent to {to}: SID={message.sid}")
         logger.info(f"[SMS SYNC DISABLED] To={to} | Body={body}")
@@ -1,16 +1,24 @@
 from app.config import settings
 from app.extensions import db
 from app.models.sos_alert import SOSAlert
-from app.models.trusted_contact import TrustedContact
 from app.models.user import User
 from app.services.fcm_service import send_push_notification
-from app.utils.timezone_utils import format_datetime_for_display
-from datetime import datetime
+from app.services.user_snapshot import get_snapshot
+from app.tracing import bind, set_alert, span, traced
+from app.utils.timezone_utils import format_datetime_for_display, format_datetime_for_response
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, or_, tuple_
+import time
+import uuid
+import base64
+import asyncio
 import logging
 
 COUNTDOWN_SECONDS = 10          # The live countdown window the app displays (seconds)
 COUNTDOWN_EXPIRY_SECONDS = 60  # Backend stale-cleanup guard — cancel if still 'countdown' after 60s
 
+logger = logging.getLogger(__name__)
+
 
 def _get_configured_cooldown():
     """Fetch SOS cooldown from settings."""
@@ -22,6 +30,7 @@ def _get_configured_cooldown():
     except (TypeError, ValueError):
         return None
 
+@traced('sos.trigger', operation=True)
 def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, trigger_reason=None):
     # Auto-SOS (sensor-based): 10-minute cooldown via _sos_cooldown.
     # Manual SOS: 20-second double-tap guard via _manual_sos_cooldown.
@@ -34,23 +43,24 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
     is_auto = trigger_type.startswith('auto')
     is_iot  = trigger_type == 'iot_button'
 
-    if is_auto:
-        from app.services.protection_service import (
-            _is_on_cooldown, _mark_sos_triggered
-        )
-        on_cooldown, secs_left = _is_on_cooldown(user_id)
-        mark_triggered = lambda: _mark_sos_triggered(user_id)
-    elif is_iot:
-        # Hardware cooldown is enforced by IotSosTracker (Android side).
-        # Backend applies no additional rate-limit for iot_button.
-        on_cooldown, secs_left = False, 0
-        mark_triggered = lambda: None  # no-op
-    else:
-        from app.services.protection_service import (
-            _is_manual_on_cooldown, _mark_manual_sos_triggered
-        )
-        on_cooldown, secs_left = _is_manual_on_cooldown(user_id)
-        mark_triggered = lambda: _mark_manual_sos_triggered(user_id)
+    with span('cooldown_check', trigger_type=trigger_type):
+        if is_auto:
+            from app.services.protection_service import (
+                _is_on_cooldown, _mark_sos_triggered
+            )
+            on_cooldown, secs_left = _is_on_cooldown(user_id)
+            mark_triggered = lambda: _mark_sos_triggered(user_id)
+        elif is_iot:
+            # Hardware cooldown is enforced by IotSosTracker (Android side).
+            # Backend applies no additional rate-limit for iot_button.
+            on_cooldown, secs_left = False, 0
+            mark_triggered = lambda: None  # no-op
+        else:
+            from app.services.protection_service import (
+                _is_manual_on_cooldown, _mark_manual_sos_triggered
+            )
+            on_cooldown, secs_left = _is_manual_on_cooldown(user_id)
+            mark_triggered = lambda: _mark_manual_sos_triggered(user_id)
 
     if on_cooldown:
         existing = SOSAlert.query.filter_by(user_id=user_id, status='countdown').first()
@@ -58,31 +68,33 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
             return existing, f"SOS on cooldown — please wait {secs_left}s before triggering again.", COUNTDOWN_SECONDS
         return None, f"SOS on cooldown — please wait {secs_left}s before triggering again.", COUNTDOWN_SECONDS
 
-    user = db.session.get(User, user_id)
-    if not user:
+    with span('user_lookup'):
+        snap = get_snapshot(user_id)
+    if not snap:
         return None, "User not found", COUNTDOWN_SECONDS
 
     # Check for existing countdown alert
-    existing_alert = SOSAlert.query.filter_by(
-        user_id=user_id, status='countdown'
-    ).first()
-    
-    if existing_alert:
-        # Auto-cancel stale countdowns (older than 60s)
-        if existing_alert.triggered_at and \
-           (datetime.utcnow() - existing_alert.triggered_at).total_seconds() > COUNTDOWN_EXPIRY_SECONDS:
-            existing_alert.status = 'cancelled'
-            existing_alert.resolved_at = datetime.utcnow()
-            db.session.commit()
-        else:
-            return existing_alert, "Alert already in countdown", COUNTDOWN_SECONDS
+    with span('countdown_check'):
+        existing_alert = SOSAlert.query.filter_by(
+            user_id=user_id, status='countdown'
+        ).first()
+        
+        if existing_alert:
+            # Auto-cancel stale countdowns (older than 60s)
+            if existing_alert.triggered_at and \
+               (datetime.utcnow() - existing_alert.triggered_at).total_seconds() > COUNTDOWN_EXPIRY_SECONDS:
+                existing_alert.status = 'cancelled'
+                existing_alert.resolved_at = datetime.utcnow()
+                db.session.commit()
+            else:
+                return existing_alert, "Alert already in countdown", COUNTDOWN_SECONDS
 
     # Prioritize the new sos_message on User model, fallback to Settings or Default
     start_message = "Emergency!"
-    if user.sos_message:
-        start_message = user.sos_message
-    elif user.settings and user.settings.sos_message:
-        start_message = user.settings.sos_message
+    if snap.profile['sos_message']:
+        start_message = snap.profile['sos_message']
+    elif snap.settings and snap.settings['sos_message']:
+        start_message = snap.settings['sos_message']
 
     # Auto-SOS paths pass a trigger_prefix (reason + confidence) that is
     # prepended to the user's normal SOS message.  This surfaces in the
@@ -90,7 +102,12 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
     # triggered the alert.
     sos_message = f"{trigger_prefix}\n\n{start_message}" if trigger_prefix else start_message
 
+    # The id is assigned here rather than at flush so the trace can be tied to
+    # the alert before the insert and its timings stored with it.
+    alert_id = str(uuid.uuid4())
+    set_alert(alert_id)
     new_alert = SOSAlert(
+        id=alert_id,
         user_id=user_id,
         trigger_type=trigger_type,
         trigger_reason=trigger_reason,
@@ -100,8 +117,9 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
         sos_message=sos_message,
         contacted_numbers=[]
     )
-    db.session.add(new_alert)
-    db.session.commit()
+    with span('insert_commit'):
+        db.session.add(new_alert)
+        db.session.commit()
 
     # Mark cooldown for this user (auto or manual store depending on trigger_type)
     mark_triggered()
@@ -111,7 +129,7 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
     # This background thread is a safety net: if the app is killed, crashes, or
     # (during Postman testing) never calls /send-now, the backend will auto-
     # dispatch after COUNTDOWN_SECONDS + a small grace period.
-    alert_id_snapshot = new_alert.id
+    alert_id_snapshot = alert_id
 
     def _auto_dispatch_after_countdown(aid, delay):
         import time
@@ -123,7 +141,8 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
             if alert_obj and alert_obj.status == 'countdown':
                 logger = logging.getLogger(__name__)
                 logger.info(f"[auto-dispatch] Alert {aid} still in countdown after {delay}s — dispatching now.")
-                dispatch_sos(aid)
+                with span('sos.auto_dispatch', operation=True, delay_s=delay):
+                    dispatch_sos(aid)
         except Exception as exc:
             logging.getLogger(__name__).error(f"[auto-dispatch] Failed for alert {aid}: {exc}")
         finally:
@@ -136,7 +155,7 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
     import threading
     grace = COUNTDOWN_SECONDS + 2   # 2-second grace for network latency
     t = threading.Thread(
-        target=_auto_dispatch_after_countdown,
+        target=bind(_auto_dispatch_after_countdown),
         args=(alert_id_snapshot, grace),
         daemon=True,
         name=f"sos-auto-{alert_id_snapshot[:8]}",
@@ -145,13 +164,16 @@ def trigger_sos(user_id, lat, lng, trigger_type='manual', trigger_prefix=None, t
 
     return new_alert, "SOS countdown started", COUNTDOWN_SECONDS
 
+@traced('sos.dispatch', operation=True)
 def dispatch_sos(alert_id, user_id=None):
-    alert = db.session.get(SOSAlert, alert_id)
+    with span('alert_lookup'):
+        alert = db.session.get(SOSAlert, alert_id)
     if not alert:
         return False, "Alert not found", []
 
     if user_id and alert.user_id != user_id:
         return False, "Unauthorized: This alert does not belong to you", []
+    set_alert(alert.id)
 
     if alert.status in ['resolved', 'cancelled']:
         return False, "Alert already resolved/cancelled", []
@@ -162,15 +184,16 @@ def dispatch_sos(alert_id, user_id=None):
     if alert.status != 'countdown':
         return False, f"Alert cannot be dispatched from state: {alert.status}", []
 
-    user = db.session.get(User, alert.user_id)
-    contacts = TrustedContact.query.filter_by(user_id=user.id).all()
+    with span('user_lookup'):
+        snap = get_snapshot(alert.user_id)
+    contacts = snap.contacts if snap else []
 
     # Warn if none are app-verified (contact joined Twilio sandbox ≠ app OTP verified)
-    unverified = [c for c in contacts if not c.is_verified]
+    unverified = [c for c in contacts if not c['is_verified']]
     if unverified:
         logger = logging.getLogger(__name__)
         logger.warning(
-            f"{len(unverified)} contact(s) for user {user.id} are not app-verified "
+            f"{len(unverified)} contact(s) for user {alert.user_id} are not app-verified "
             "but will still receive the SOS alert."
         )
 
@@ -184,7 +207,7 @@ def dispatch_sos(alert_id, user_id=None):
     )
     from app.services.whatsapp_service import send_whatsapp_sync, _build_sos_body
     full_message = _build_sos_body(
-        user_name=user.full_name or "Someone",
+        user_name=(snap.profile['full_name'] if snap else None) or "Someone",
         trigger_type=alert.trigger_type,
         trigger_reason=alert.trigger_reason,
         maps_link=maps_link,
@@ -193,25 +216,28 @@ def dispatch_sos(alert_id, user_id=None):
     contacted = []
     delivery_report = []  # per-contact Twilio delivery status
 
-    for contact in contacts:
-        contacted.append(contact.phone)
-        result = send_whatsapp_sync(contact.phone, full_message)
-        delivery_report.append({
-            "phone":      contact.phone,
-            "success":    result["success"],
-            "status":     result["status"],
-            "error_code": result["error_code"],
-            "error_msg":  result["error_msg"],
-        })
-        if not result["success"]:
-            _log = logging.getLogger(__name__)
-            _log.warning(
-                f"SOS delivery failed for {contact.phone} "
-                f"[{result['status']}] code={result['error_code']}: {result['error_msg']}"
-            )
+    with span('whatsapp_fanout', contacts=len(contacts)):
+        for contact in contacts:
+            phone = contact['phone']
+            contacted.append(phone)
+            result = send_whatsapp_sync(phone, full_message)
+            delivery_report.append({
+                "phone":      phone,
+                "success":    result["success"],
+                "status":     result["status"],
+                "error_code": result["error_code"],
+                "error_msg":  result["error_msg"],
+            })
+            if not result["success"]:
+                _log = logging.getLogger(__name__)
+                _log.warning(
+                    f"SOS delivery failed for {phone} "
+                    f"[{result['status']}] code={result['error_code']}: {result['error_msg']}"
+                )
 
     alert.contacted_numbers = contacted
-    db.session.commit()
+    with span('commit'):
+        db.session.commit()
 
     failed = [r for r in delivery_report if not r["success"]]
     sandbox_issues = [r for r in failed if r["status"] in ("not_in_sandbox", "not_opted_in")]
@@ -227,30 +253,35 @@ def dispatch_sos(alert_id, user_id=None):
 
     return True, summary, delivery_report
 
+@traced('sos.cancel', operation=True)
 def cancel_sos(alert_id, user_id=None):
-    alert = db.session.get(SOSAlert, alert_id)
+    with span('alert_lookup'):
+        alert = db.session.get(SOSAlert, alert_id)
     if not alert:
         return False, "Alert not found"
 
     if user_id and alert.user_id != user_id:
         return False, "Unauthorized: This alert does not belong to you"
+    set_alert(alert.id)
 
     if alert.status in ('cancelled', 'resolved'):
         return False, f"This alert has already been resolved (status: {alert.status})"
 
     trigger_type = alert.trigger_type or ''
+    owner_id = alert.user_id  # read before commit expires the alert
 
     alert.status = 'cancelled'
     alert.resolved_at = datetime.utcnow()
     alert.resolution_type = 'cancelled'
-    db.session.commit()
+    with span('commit'):
+        db.session.commit()
 
     # ── Flow 2: Auto ML Trigger ──────────────────────────────────────────────
     # Cancel Received → Mark window as SAFE → Store in DB → Improve ML dataset
     if trigger_type.startswith('auto') and user_id:
         try:
             from app.services.protection_service import submit_sos_feedback
-            submit_sos_feedback(user_id, alert.id, is_false_alarm=True)
+            submit_sos_feedback(user_id, alert_id, is_false_alarm=True)
         except Exception as e:
             logger = logging.getLogger(__name__)
             logger.error(f"Failed to auto-submit feedback for cancelled auto-sos: {e}")
@@ -261,7 +292,7 @@ def cancel_sos(alert_id, user_id=None):
     elif trigger_type == 'hardware_distress' and user_id:
         try:
             from app.services.protection_service import submit_sos_feedback
-            submit_sos_feedback(user_id, alert.id, is_false_alarm=True)
+            submit_sos_feedback(user_id, alert_id, is_false_alarm=True)
         except Exception as e:
             logger = logging.getLogger(__name__)
             logger.error(f"Failed to submit feedback for cancelled hardware_distress: {e}")
@@ -269,20 +300,21 @@ def cancel_sos(alert_id, user_id=None):
     # ── Flow 1: Manual SOS / IoT button ─────────────────────────────────────
     # Cancel Received → Mark Safe → Send 'I am Safe' via WhatsApp
     elif trigger_type in ['manual', 'iot_button']:
-        user = db.session.get(User, alert.user_id)
-        if user:
-            contacts = TrustedContact.query.filter_by(user_id=alert.user_id).all()
+        snap = get_snapshot(owner_id)
+        if snap:
+            contacts = snap.contacts
             if contacts:
                 from app.services.whatsapp_service import send_safe_notification
                 from app.utils.timezone_utils import format_datetime_for_display
-                display_time, tz_label = format_datetime_for_display(datetime.utcnow(), user.country)
-                user_full_name = user.full_name if user.full_name else "Someone"
-                for contact in contacts:
-                    try:
-                        send_safe_notification(user_full_name, contact.phone, display_time, tz_label)
-                    except Exception as e:
-                        logger = logging.getLogger(__name__)
-                        logger.error(f"Failed to send safe notification to {contact.phone}: {e}")
+                display_time, tz_label = format_datetime_for_display(datetime.utcnow(), snap.profile['country'])
+                user_full_name = snap.profile['full_name'] or "Someone"
+                with span('safe_notify', contacts=len(contacts)):
+                    for contact in contacts:
+                        try:
+                            send_safe_notification(user_full_name, contact['phone'], display_time, tz_label)
+                        except Exception as e:
+                            logger = logging.getLogger(__name__)
+                            logger.error(f"Failed to send safe notification to {contact['phone']}: {e}")
 
     # Clear the manual cooldown so the user can re-trigger immediately after cancel.
     # This is a no-op when user_id is None.
@@ -296,6 +328,7 @@ def cancel_sos(alert_id, user_id=None):
     return True, "SOS Cancelled"
 
 
+@traced('sos.safe', operation=True)
 def mark_user_safe(alert_id, user_id):
     """
     Mark user as safe and send WhatsApp notifications to all verified contacts.
@@ -307,7 +340,8 @@ def mark_user_safe(alert_id, user_id):
     Returns:
         tuple: (success: bool, message: str, contacts_notified: int)
     """
-    alert = db.session.get(SOSAlert, alert_id)
+    with span('alert_lookup'):
+        alert = db.session.get(SOSAlert, alert_id)
     
     # Validation checks
     if not alert:
@@ -316,6 +350,7 @@ def mark_user_safe(alert_id, user_id):
     # Verify alert belongs to the authenticated user
     if alert.user_id != user_id:
         return False, "Unauthorized: This alert does not belong to you", 0
+    set_alert(alert.id)
     
     # Check if alert is already resolved
     if alert.status in ['cancelled', 'resolved']:
@@ -337,16 +372,15 @@ def mark_user_safe(alert_id, user_id):
     alert.status = 'cancelled'
     alert.resolved_at = datetime.utcnow()
     alert.resolution_type = resolution
-    db.session.commit()
+    with span('commit'):
+        db.session.commit()
     
     # Get user and verified contacts
-    user = db.session.get(User, user_id)
-    if not user:
+    snap = get_snapshot(user_id)
+    if not snap:
         return False, "User not found", 0
     
-    contacts = TrustedContact.query.filter_by(
-        user_id=user_id
-    ).all()
+    contacts = snap.contacts
     
     if not notify_contacts:
         return True, "SOS cancelled as false alarm before dispatch", 0
@@ -355,28 +389,203 @@ def mark_user_safe(alert_id, user_id):
         return True, "Safe status updated (no verified contacts to notify)", 0
     
     # Send WhatsApp safe notifications to all verified contacts
-    user_full_name = user.full_name if user.full_name else "Someone"
+    user_full_name = snap.profile['full_name'] or "Someone"
     contacts_notified = 0
     
     from app.services.whatsapp_service import send_safe_notification
     
     # Ensure the timestamp is localized before sending the notification
-    display_time, tz_label = format_datetime_for_display(datetime.utcnow(), user.country)
+    display_time, tz_label = format_datetime_for_display(datetime.utcnow(), snap.profile['country'])
 
-    for contact in contacts:
-        try:
-            success, sid = send_safe_notification(
-                user_full_name,
-                contact.phone,
-                display_time,  # Localized time
-                tz_label,      # Timezone label
-            )
-            if success:
-                contacts_notified += 1
-        except Exception as e:
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to send safe notification to {contact.phone}: {e}")
-            # Don't fail the entire request, just log and continue
+    with span('safe_notify', contacts=len(contacts)):
+        for contact in contacts:
+            try:
+                success, sid = send_safe_notification(
+                    user_full_name,
+                    contact['phone'],
+                    display_time,  # Localized time
+                    tz_label,      # Timezone label
+                )
+                if success:
+                    contacts_notified += 1
+            except Exception as e:
+                logger = logging.getLogger(__name__)
+                logger.error(f"Failed to send safe notification to {contact['phone']}: {e}")
+                # Don't fail the entire request, just log and continue
     
     return True, f"Safe notification sent to {contacts_notified} contact(s)", contacts_notified
 
+
+
+# ── History (keyset pagination + projection) ─────────────────────────────────
+
+class InvalidHistoryQuery(ValueError):
+    """Bad cursor or unknown field in a history request."""
+
+
+# Response field → column.  Only the requested columns are selected, so
+# encrypted ones (address) are neither loaded nor decrypted unless asked for.
+HISTORY_FIELDS = {
+    'alert_id': SOSAlert.id,
+    'trigger_type': SOSAlert.trigger_type,
+    'address': SOSAlert.address,
+    'status': SOSAlert.status,
+    'triggered_at': SOSAlert.triggered_at,
+    'resolved_at': SOSAlert.resolved_at,
+    'resolution_type': SOSAlert.resolution_type,
+}
+
+
+def encode_history_cursor(triggered_at, alert_id):
+    raw = f"{triggered_at.isoformat()}|{alert_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_history_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        at, alert_id = raw.split('|', 1)
+        return datetime.fromisoformat(at), alert_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidHistoryQuery("Invalid cursor.") from e
+
+
+def get_sos_history_page(user_id, limit=None, cursor=None, fields=None):
+    """
+    One page of a user's alerts, newest first, ordered by (triggered_at, id).
+
+    *cursor* is the next_cursor of the previous page; *fields* restricts the
+    returned keys (alert_id and triggered_at are always read for the cursor).
+    Countdowns past COUNTDOWN_EXPIRY_SECONDS are reported as expired even if
+    the sweeper has not updated them yet.
+    Returns (alerts, next_cursor) — next_cursor is None on the last page.
+    Raises InvalidHistoryQuery.
+    """
+    limit = max(1, min(limit or settings.SOS_HISTORY_PAGE_SIZE, settings.SOS_HISTORY_MAX_PAGE_SIZE))
+    wanted = list(HISTORY_FIELDS) if fields is None else fields
+    unknown = [f for f in wanted if f not in HISTORY_FIELDS]
+    if unknown:
+        raise InvalidHistoryQuery(f"Unknown field(s): {', '.join(unknown)}.")
+
+    columns = [SOSAlert.id, SOSAlert.triggered_at, SOSAlert.status, SOSAlert.resolution_type] + [
+        HISTORY_FIELDS[f] for f in wanted
+        if f not in ('alert_id', 'triggered_at', 'status', 'resolution_type')]
+    query = db.session.query(*columns).filter(SOSAlert.user_id == user_id)
+    if cursor:
+        at, alert_id = decode_history_cursor(cursor)
+        query = query.filter(tuple_(SOSAlert.triggered_at, SOSAlert.id) < tuple_(at, alert_id))
+    rows = query.order_by(SOSAlert.triggered_at.desc(), SOSAlert.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    country = None
+    if 'triggered_at' in wanted and rows:
+        country = db.session.query(User.country).filter(User.id == user_id).scalar()
+
+    alerts = []
+    for row in rows:
+        status, resolution_type = effective_status(row.status, row.resolution_type, row.triggered_at)
+        alert = {}
+        for f in wanted:
+            if f == 'status':
+                alert[f] = status
+            elif f == 'resolution_type':
+                alert[f] = resolution_type
+            elif f == 'alert_id':
+                alert[f] = row.id
+            elif f == 'triggered_at':
+                alert[f] = format_datetime_for_response(row.triggered_at, country)
+            elif f == 'resolved_at':
+                alert[f] = row.resolved_at.isoformat() if row.resolved_at else None
+            else:
+                alert[f] = getattr(row, HISTORY_FIELDS[f].key)
+        alerts.append(alert)
+
+    next_cursor = encode_history_cursor(rows[-1].triggered_at, rows[-1].id) if has_more else None
+    return alerts, next_cursor
+
+
+# ── Stale countdown sweeper ──────────────────────────────────────────────────
+#
+# A countdown alert that is neither dispatched nor cancelled within
+# COUNTDOWN_EXPIRY_SECONDS is cancelled with resolution_type 'expired'.  The
+# history and active-alert reads used to run that UPDATE + COMMIT for the
+# caller on every request; it now runs here, globally, every
+# COUNTDOWN_SWEEP_INTERVAL_SECONDS in bounded batches over
+# ix_sos_alerts_status_triggered, so those reads are plain SELECTs.  Between
+# sweeps, readers apply the same rule themselves (stale_countdown_cutoff /
+# effective_status), so responses don't depend on sweeper timing.
+
+_countdown_sweep = {"runs": 0, "expired_total": 0}
+
+
+def stale_countdown_cutoff():
+    """Countdowns triggered before this (naive UTC) instant count as expired."""
+    return datetime.utcnow() - timedelta(seconds=COUNTDOWN_EXPIRY_SECONDS)
+
+
+def effective_status(status, resolution_type, triggered_at, cutoff=None):
+    """(status, resolution_type) as the sweeper will leave them."""
+    if status == 'countdown' and triggered_at and triggered_at < (cutoff or stale_countdown_cutoff()):
+        return 'cancelled', 'expired'
+    return status, resolution_type
+
+
+def live_alert_filter(cutoff=None):
+    """SQL filter for active alerts: sent, or a countdown that has not gone stale."""
+    cutoff = cutoff or stale_countdown_cutoff()
+    return or_(SOSAlert.status == 'sent',
+               and_(SOSAlert.status == 'countdown', SOSAlert.triggered_at >= cutoff))
+
+
+def expire_stale_countdowns():
+    """Cancel every stale countdown (bounded batches). Returns this run's stats."""
+    from app.database import engine
+    from app.utils.sweep import update_in_batches
+
+    started = time.perf_counter()
+    cutoff = stale_countdown_cutoff()
+    stale = and_(SOSAlert.status == 'countdown', SOSAlert.triggered_at < cutoff)
+    with engine.connect() as conn:
+        oldest = conn.execute(func.min(SOSAlert.triggered_at).select().where(stale)).scalar()
+    expired, latencies = 0, []
+    if oldest is not None:
+        expired, latencies = update_in_batches(
+            SOSAlert, stale, {'status': 'cancelled', 'resolution_type': 'expired'},
+            settings.COUNTDOWN_SWEEP_BATCH_SIZE, settings.COUNTDOWN_SWEEP_MAX_BATCHES,
+        )
+
+    # Lag: how long the oldest alert had been overdue when this run reached it.
+    lag = (cutoff - oldest).total_seconds() if oldest is not None else 0.0
+    _countdown_sweep.update({
+        "runs": _countdown_sweep["runs"] + 1,
+        "last_run_at": time.time(),
+        "expired": expired,
+        "expired_total": _countdown_sweep["expired_total"] + expired,
+        "batches": len(latencies),
+        "lag_seconds": round(lag, 1),
+        "lag_seconds_max": round(max(lag, _countdown_sweep.get("lag_seconds_max", 0.0)), 1),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    })
+    return dict(_countdown_sweep)
+
+
+def countdown_sweeper_stats():
+    """Stats of the last expire_stale_countdowns() run plus seconds since it ran."""
+    stats = dict(_countdown_sweep)
+    if "last_run_at" in stats:
+        stats["seconds_since_last_run"] = round(time.time() - stats.pop("last_run_at"), 1)
+    return stats
+
+
+async def run_countdown_sweeper():
+    """Run expire_stale_countdowns() every COUNTDOWN_SWEEP_INTERVAL_SECONDS."""
+    while True:
+        try:
+            stats = await asyncio.to_thread(expire_stale_countdowns)
+            if stats["expired"]:
+                logger.info(f"Countdown sweep: expired {stats['expired']} stale alert(s), "
+                            f"lag {stats['lag_seconds']}s, {stats['duration_ms']} ms")
+        except Exception as e:
+            logger.warning(f"Countdown sweep failed: {e}")
+        await asyncio.sleep(settings.COUNTDOWN_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,25 @@
+"""
+Lazily created, shared Twilio REST clients.
+
+twilio.rest is imported on the first send rather than when the service
+modules load, keeping it off the cold-start path.  Clients are cached per
+(account_sid, auth_token) so consecutive messages reuse the same HTTP session
+(and its kept-alive connection) instead of opening a new one each time.
+"""
+
+import threading
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(account_sid, auth_token):
+    key = (account_sid, auth_token)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                from twilio.rest import Client
+                client = _clients[key] = Client(account_sid, auth_token)
+    return client
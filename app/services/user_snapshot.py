@@ -0,0 +1,192 @@
+"""
+Per-user snapshot of profile, trusted contacts and settings.
+
+GET /user/profile loaded the User, lazily its settings, queried the trusted
+contacts and decrypted ~15 fields; /contacts, /settings, dispatch_sos and
+cancel_sos re-fetched overlapping pieces of the same data.  get_snapshot()
+builds all of it once per user and keeps the decrypted result in a bounded
+in-process LRU (USER_SNAPSHOT_CACHE_SIZE entries, USER_SNAPSHOT_TTL_SECONDS
+max age).
+
+Invalidation is driven by SQLAlchemy session events rather than by each
+route: any committed ORM write to a User, TrustedContact or UserSettings row
+(including bulk query.update()/delete() on them) drops that user's snapshot
+and bumps their version.  A snapshot whose build started before the latest
+version for that user is discarded instead of cached, so a read racing a
+write can never re-cache stale data.
+
+Each part (profile, contacts, settings) has an ETag derived from its
+content, so it is stable across restarts and workers; snapshot_response()
+answers If-None-Match with 304 Not Modified.
+
+The cache and versions are per process.  With several workers a write in
+one leaves the others' snapshots live until their TTL expires.
+"""
+
+import time
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+
+import orjson
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.config import settings
+from app.extensions import db
+from app.models.settings import UserSettings
+from app.models.trusted_contact import TrustedContact
+from app.models.user import User
+from app.responses import FastJSONResponse
+
+
+class UserSnapshot:
+    __slots__ = ('user_id', 'profile', 'contacts', 'settings', 'built_at', '_etags')
+
+    def __init__(self, user_id, profile, contacts, user_settings):
+        self.user_id = user_id
+        self.profile = profile
+        self.contacts = contacts
+        self.settings = user_settings
+        self.built_at = time.monotonic()
+        self._etags = {}
+
+    def etag(self, part):
+        tag = self._etags.get(part)
+        if tag is None:
+            digest = hashlib.blake2b(orjson.dumps(getattr(self, part)), digest_size=12).hexdigest()
+            tag = self._etags[part] = f'W/"{part[0]}{digest}"'
+        return tag
+
+
+# ── Cache ────────────────────────────────────────────────────────────────────
+
+_cache = OrderedDict()          # user_id → UserSnapshot, least recently used first
+_versions = {}                  # user_id → generation of the last invalidation
+_generation = itertools.count(1)
+_floor = 0                      # builds started before this are never cached
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "invalidations": 0, "discarded": 0}
+
+
+def invalidate_user(user_id):
+    """Forget *user_id*'s snapshot; builds already in flight won't be cached."""
+    global _floor
+    with _lock:
+        _stats["invalidations"] += 1
+        _cache.pop(user_id, None)
+        if len(_versions) >= max(settings.USER_SNAPSHOT_CACHE_SIZE, 1) * 2:
+            _versions.clear()
+            _floor = next(_generation)
+        _versions[user_id] = next(_generation)
+
+
+def _build(user_id):
+    # Two statements: user LEFT JOIN settings, then the contacts IN-load.
+    user = db.session.get(User, user_id, options=[
+        joinedload(User.settings), selectinload(User.trusted_contacts)])
+    if not user:
+        return None
+    contacts = [c.to_dict() for c in user.trusted_contacts]
+    settings_obj = user.settings
+    profile = {
+        "user_id": user.id,
+        "full_name": user.full_name,
+        "email": user.email,
+        "country": user.country,
+        "phone": user.phone,
+        "sos_message": user.sos_message,
+        "profile_image_url": user.profile_image_url,
+        "emergency_contact": settings_obj.emergency_number if settings_obj else None,
+        "trusted_contacts": contacts,
+        "trusted_contacts_count": len(contacts),
+        "member_since": user.created_at.strftime('%B %Y'),
+        "is_protection_active": True,
+        "auth_provider": user.auth_provider,
+    }
+    return UserSnapshot(user_id, profile, contacts, settings_obj.to_dict() if settings_obj else None)
+
+
+def get_snapshot(user_id):
+    """The user's snapshot, built in the current session on a miss. None if the user doesn't exist."""
+    if settings.USER_SNAPSHOT_CACHE_SIZE <= 0:
+        return _build(user_id)
+    with _lock:
+        snap = _cache.get(user_id)
+        if snap is not None and time.monotonic() - snap.built_at < settings.USER_SNAPSHOT_TTL_SECONDS:
+            _cache.move_to_end(user_id)
+            _stats["hits"] += 1
+            return snap
+        _stats["misses"] += 1
+        started = next(_generation)
+
+    snap = _build(user_id)
+    if snap is None:
+        return None
+    with _lock:
+        if started < _floor or _versions.get(user_id, 0) > started:
+            _stats["discarded"] += 1  # a write committed while we were reading
+        else:
+            _cache[user_id] = snap
+            _cache.move_to_end(user_id)
+            while len(_cache) > settings.USER_SNAPSHOT_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return snap
+
+
+def snapshot_response(request, snap, part, **extra):
+    """{"success": True, "data": <part>, **extra} with an ETag, or 304 if the client has it."""
+    etag = snap.etag(part)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({"success": True, "data": getattr(snap, part), **extra}, headers=headers)
+
+
+def snapshot_stats() -> dict:
+    with _lock:
+        return {"size": len(_cache), "maxsize": settings.USER_SNAPSHOT_CACHE_SIZE, **_stats}
+
+
+# ── Invalidation from session events ─────────────────────────────────────────
+
+def _owner(obj):
+    if isinstance(obj, User):
+        return obj.id
+    if isinstance(obj, (TrustedContact, UserSettings)):
+        return obj.user_id
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session, flush_context):
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        user_id = _owner(obj)
+        if user_id:
+            session.info.setdefault("snapshot_users", set()).add(user_id)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk(state):
+    # Bulk query.update()/delete() bypass the flush; attribute them to the
+    # requesting user (the routes only bulk-modify the caller's own rows).
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ in (User, TrustedContact, UserSettings):
+        from app.database import _request_user
+        user_id = _request_user.get()
+        if user_id:
+            state.session.info.setdefault("snapshot_users", set()).add(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    for user_id in session.info.pop("snapshot_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("snapshot_users", None)
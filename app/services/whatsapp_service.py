@@ -1,9 +1,10 @@
 # whatsapp_service.py — no Flask dependencies; JWT handling lives in app/routes/auth.py
 from app.config import settings
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 import logging
-import threading
+
+from app.services.delivery_queue import submit, PermanentFailure
+from app.services.twilio_client import get_client
+from app.tracing import traced
 
 logger = logging.getLogger(__name__)
 
@@ -47,6 +48,7 @@ def _build_sos_body(user_name, trigger_type, trigger_reason, maps_link):
     return "\n".join(lines)
 
 
+@traced('whatsapp.send')
 def send_whatsapp_sync(to_number, message, app_ctx=None):
     """Send a WhatsApp message synchronously and return a delivery report."""
     account_sid = settings.TWILIO_WA_ACCOUNT_SID or settings.TWILIO_ACCOUNT_SID
@@ -59,9 +61,10 @@ def send_whatsapp_sync(to_number, message, app_ctx=None):
                 "error_code": None, "error_msg": "Twilio credentials missing"}
 
     to_wa = to_number if to_number.startswith('whatsapp:') else f'whatsapp:{to_number}'
+    from twilio.base.exceptions import TwilioRestException
 
     try:
-        client = Client(account_sid, auth_token)
+        client = get_client(account_sid, auth_token)
         msg = client.messages.create(from_=whatsapp_from, body=message, to=to_wa)
         logger.info(f"WhatsApp sent to {to_number}: {msg.sid} (status={msg.status})")
         return {"success": True, "sid": msg.sid, "status": "sent",
@@ -79,20 +82,25 @@ def send_whatsapp_sync(to_number, message, app_ctx=None):
                 "error_code": None, "error_msg": str(e)}
 
 
-def send_whatsapp_alert(to_number, message):
-    """Fire-and-forget WhatsApp alert (non-blocking)."""
-    try:
-        def _send():
-            send_whatsapp_sync(to_number, message)
+# Twilio statuses worth retrying; everything else (sandbox opt-in, bad number,
+# suspended account) will fail the same way again.
+_RETRYABLE_STATUSES = {"rate_limited", "delivery_failed", "unknown_error"}
 
-        t = threading.Thread(target=_send, daemon=True)
-        t.start()
-        logger.info(f"WhatsApp alert dispatch started for {to_number}")
-        return "dispatched"
 
-    except Exception as e:
-        logger.error(f"Failed to dispatch WhatsApp alert: {e}")
+def send_whatsapp_alert(to_number, message):
+    """Fire-and-forget WhatsApp alert (queued, non-blocking)."""
+    def _send():
+        result = send_whatsapp_sync(to_number, message)
+        if result["success"] or result["status"] == "not_configured":
+            return
+        if result["status"] in _RETRYABLE_STATUSES:
+            raise RuntimeError(f"{result['status']}: {result['error_msg']}")
+        raise PermanentFailure(result["status"])
+
+    if not submit("whatsapp", _send, label=f"to {to_number}"):
         return None
+    logger.info(f"WhatsApp alert queued for {to_number}")
+    return "dispatched"
 
 
 def send_safe_notification(user_full_name, contact_phone, safe_time_display: str, timezone_label: str | None = None):
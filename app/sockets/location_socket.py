@@ -23,8 +23,7 @@ logger = logging.getLogger(__name__)
 async def connect(sid, environ, auth):
     """Authenticate the connecting client."""
     try:
-        from jose import jwt, JWTError
-        from app.config import settings
+        from app.utils.jwt_codec import decode_token
 
         token = None
         if auth and isinstance(auth, dict):
@@ -41,7 +40,7 @@ async def connect(sid, environ, auth):
             logger.warning(f"Socket connect rejected (no token): {sid}")
             return False  # reject
 
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
+        payload = decode_token(token)
         user_id = payload.get('sub')
         if not user_id:
             return False
@@ -0,0 +1,306 @@
+"""
+Span tracing for the SOS pipeline.
+
+The SOS operations (trigger, dispatch, cancel, mark-safe, auto-dispatch, the
+sensor auto-trigger) open an operation span; the stages inside them —
+cooldown check, user lookup, insert and commit, WhatsApp/SMS sends, the FCM
+batch — open child spans:
+
+    sos.trigger                                   41.8 ms
+    ├─ cooldown_check                              0.1 ms
+    ├─ user_lookup                                 2.3 ms
+    ├─ countdown_check                             0.9 ms
+    ├─ insert_commit                              36.2 ms
+    └─ sos.auto_dispatch  (12 s later, own thread)
+       └─ sos.dispatch
+          ├─ whatsapp.send  ×N
+          └─ commit
+
+The current span lives in a ContextVar, so it follows the request into its
+threadpool thread.  Work handed to other threads (the auto-dispatch timer,
+delivery-queue jobs) carries it explicitly via bind().  Sender spans are only
+recorded inside a trace — an OTP SMS is not traced.
+
+Finished spans go to a bounded queue drained by one background thread, which
+
+  • appends them as OTLP/JSON (an ExportTraceServiceRequest per batch) to
+    TRACE_EXPORT_PATH and/or POSTs them to the collector at TRACE_EXPORT_URL
+    (e.g. http://otel-collector:4318/v1/traces), and
+  • with TRACE_STAGE_TIMINGS on (default), inserts every span whose trace is
+    tied to an alert into sos_stage_timings, so the timings of an incident
+    can be read back per alert without a tracing backend.
+
+Nothing is written on the request path.  Span durations also feed the
+asfalis_sos_stage_seconds histogram on /metrics.  Attributes never include
+phone numbers, message bodies or tokens.
+"""
+
+import json
+import uuid
+import time
+import queue
+import logging
+import secrets
+import threading
+import functools
+from datetime import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.config import settings
+from app.metrics import sos_stage
+
+logger = logging.getLogger(__name__)
+
+_SERVICE_NAME = "asfalis-backend"
+_EXPORT_BATCH = 512
+
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent', 'root', 'operation',
+                 'attributes', 'start_ns', 'duration_ns', 'error', '_held')
+
+    def __init__(self, name, parent, operation, attributes):
+        self.name = name
+        self.parent = parent
+        self.root = parent.root if parent else self
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.operation = name if operation or parent is None else parent.operation
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.duration_ns = None
+        self.error = None
+        self._held = [] if parent is None else None   # root only: spans waiting for it to end
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self):
+        return self.duration_ns / 1e6
+
+
+_current = ContextVar("trace_span", default=None)
+
+
+def current_span():
+    return _current.get()
+
+
+def set_alert(alert_id):
+    """Tie the current trace to *alert_id* (its stages are then stored per alert)."""
+    span = _current.get()
+    if span is not None:
+        span.root.attributes["sos.alert_id"] = alert_id
+
+
+@contextmanager
+def span(name, operation=False, **attributes):
+    """
+    Time the enclosed block as a span named *name*.  operation=True marks an
+    SOS operation and may start a new trace; otherwise the block is only
+    traced inside an existing one (yields None outside a trace).
+    """
+    parent = _current.get()
+    if parent is None and not operation:
+        yield None
+        return
+    current = Span(name, parent, operation, attributes)
+    token = _current.set(current)
+    started = time.perf_counter_ns()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_ns = time.perf_counter_ns() - started
+        _current.reset(token)
+        _finish(current)
+
+
+def traced(name, operation=False):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, operation=operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(fn):
+    """Wrap *fn* so that, run on another thread, its spans join the current trace."""
+    parent = _current.get()
+    if parent is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+# ── Export ───────────────────────────────────────────────────────────────────
+
+_queue = queue.Queue(maxsize=10_000)
+_thread = None
+_thread_lock = threading.Lock()
+_stats = {"exported": 0, "stored": 0, "orphaned": 0, "dropped": 0, "export_errors": 0}
+
+
+def _enabled():
+    return bool(settings.TRACE_EXPORT_PATH or settings.TRACE_EXPORT_URL or settings.TRACE_STAGE_TIMINGS)
+
+
+def _finish(span):
+    sos_stage.observe((span.operation, span.name), span.duration_ns / 1e9)
+    if not _enabled():
+        return
+    root = span.root
+    if span is not root and root._held is not None:
+        root._held.append(span)    # root still open: its alert id may not be known yet
+        return
+    batch = [span]
+    if span is root:
+        batch, root._held = root._held + [span], None
+    _start_writer()
+    for finished in batch:
+        try:
+            _queue.put_nowait(finished)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+
+def _start_writer():
+    global _thread
+    if _thread is None:
+        with _thread_lock:
+            if _thread is None:
+                _thread = threading.Thread(target=_writer, name="trace-export", daemon=True)
+                _thread.start()
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        wrapped = {"boolValue": value}
+    elif isinstance(value, int):
+        wrapped = {"intValue": str(value)}
+    elif isinstance(value, float):
+        wrapped = {"doubleValue": value}
+    else:
+        wrapped = {"stringValue": str(value)}
+    return {"key": key, "value": wrapped}
+
+
+def _otlp_span(span):
+    attributes = dict(span.attributes)
+    if span.root is not span and "sos.alert_id" in span.root.attributes:
+        attributes.setdefault("sos.alert_id", span.root.attributes["sos.alert_id"])
+    attributes["sos.operation"] = span.operation
+    return {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "parentSpanId": span.parent.span_id if span.parent else "",
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.start_ns + span.duration_ns),
+        "attributes": [_attribute(k, v) for k, v in attributes.items()],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+
+
+def otlp_payload(spans) -> dict:
+    """An OTLP/JSON ExportTraceServiceRequest for *spans*."""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", _SERVICE_NAME)]},
+        "scopeSpans": [{"scope": {"name": "asfalis.sos"}, "spans": [_otlp_span(s) for s in spans]}],
+    }]}
+
+
+def _stage_rows(spans):
+    rows = []
+    for span in spans:
+        alert_id = span.root.attributes.get("sos.alert_id")
+        if alert_id:
+            rows.append({
+                "alert_id": alert_id, "trace_id": span.trace_id, "span_id": span.span_id,
+                "parent_span_id": span.parent.span_id if span.parent else None,
+                "operation": span.operation[:50], "stage": span.name[:50],
+                "started_at": datetime.utcfromtimestamp(span.start_ns / 1e9),
+                "duration_ms": round(span.duration_ms, 3), "status": "error" if span.error else "ok",
+            })
+    return rows
+
+
+def _export(spans):
+    if settings.TRACE_EXPORT_PATH or settings.TRACE_EXPORT_URL:
+        body = json.dumps(otlp_payload(spans), separators=(",", ":"))
+        try:
+            if settings.TRACE_EXPORT_PATH:
+                with open(settings.TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            if settings.TRACE_EXPORT_URL:
+                import httpx
+                httpx.post(settings.TRACE_EXPORT_URL, content=body, timeout=5.0,
+                           headers={"Content-Type": "application/json"}).raise_for_status()
+            _stats["exported"] += len(spans)
+        except Exception as e:
+            _stats["export_errors"] += 1
+            logger.warning(f"Trace export of {len(spans)} span(s) failed: {e}")
+
+    if settings.TRACE_STAGE_TIMINGS:
+        rows = _stage_rows(spans)
+        if rows:
+            from sqlalchemy import insert, select
+            from app.database import engine
+            from app.models.sos_alert import SOSAlert
+            from app.models.sos_stage_timing import SOSStageTiming
+            try:
+                with engine.begin() as conn:
+                    # Rows for an alert that was never inserted (a failed trigger
+                    # commit) would fail the foreign key and take the whole batch
+                    # with them, so only alerts that exist are stored.
+                    wanted = {row["alert_id"] for row in rows}
+                    existing = set(conn.scalars(select(SOSAlert.id).where(SOSAlert.id.in_(wanted))))
+                    kept = [row for row in rows if row["alert_id"] in existing]
+                    if kept:
+                        conn.execute(insert(SOSStageTiming), [{"id": str(uuid.uuid4()), **row} for row in kept])
+                _stats["stored"] += len(kept)
+                _stats["orphaned"] += len(rows) - len(kept)
+            except Exception as e:
+                logger.error(f"Storing {len(rows)} SOS stage timing(s) failed: {e}")
+
+
+def _writer():
+    while True:
+        spans = [_queue.get()]
+        while len(spans) < _EXPORT_BATCH:
+            try:
+                spans.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _export(spans)
+        finally:
+            for _ in spans:
+                _queue.task_done()
+
+
+def flush(timeout: float = 5.0) -> bool:
+    """Wait up to *timeout* seconds for queued spans to be written. True if drained."""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return not _queue.unfinished_tasks
+
+
+def tracing_stats() -> dict:
+    return {"queued": _queue.qsize(), **_stats}
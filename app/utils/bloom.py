@@ -0,0 +1,126 @@
+"""
+Bloom filter with an optional memory-mapped backing file.
+
+Each filter position is a whole byte ("cell") rather than a packed bit.  That
+costs 8× the memory of a bit array, but setting a cell is a single plain byte
+store with no read-modify-write — so any number of threads or processes
+sharing the same mmap can add items concurrently without ever losing an
+update.  A lost update would be a false negative, which the revocation check
+cannot tolerate.
+
+File layout (when file-backed):
+    header  — magic, cell count, hash count, watermark (see HEADER)
+    cells   — `cells` bytes, 0 or 1
+
+The watermark is an opaque integer stored by the builder (the revocation
+service records the highest revoked_tokens.id included in the build).
+"""
+
+import os
+import math
+import mmap
+import struct
+import hashlib
+import tempfile
+from typing import Optional, Tuple
+
+MAGIC = b'ASFBLM1\x00'
+HEADER = struct.Struct('<8sQI4xq')  # magic, cells, hashes, (pad), watermark
+
+
+def optimal_size(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """Return (cells, hashes) for *capacity* items at *error_rate* false positives."""
+    capacity = max(int(capacity), 1)
+    cells = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    hashes = max(int(round(cells / capacity * math.log(2))), 1)
+    return cells, hashes
+
+
+class BloomFilter:
+    """
+    Probabilistic set of strings: `item in bf` is never wrong when it says
+    False, and wrong with probability ≈ error_rate when it says True.
+    """
+
+    def __init__(self, cells: int, hashes: int, buffer=None, watermark: int = 0,
+                 mmap_obj: Optional[mmap.mmap] = None, path: Optional[str] = None):
+        self.cells = cells
+        self.hashes = hashes
+        self.watermark = watermark
+        self.path = path
+        self._mmap = mmap_obj
+        self._cells = buffer if buffer is not None else bytearray(cells)
+
+    # ── Construction ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float, watermark: int = 0) -> 'BloomFilter':
+        cells, hashes = optimal_size(capacity, error_rate)
+        return cls(cells, hashes, watermark=watermark)
+
+    @classmethod
+    def open_file(cls, path: str) -> 'BloomFilter':
+        """Map an existing filter file (shared, writable)."""
+        with open(path, 'r+b') as fh:
+            mm = mmap.mmap(fh.fileno(), 0)
+        magic, cells, hashes, watermark = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or len(mm) != HEADER.size + cells:
+            mm.close()
+            raise ValueError(f"{path} is not a valid Bloom filter file")
+        view = memoryview(mm)[HEADER.size:]
+        return cls(cells, hashes, buffer=view, watermark=watermark, mmap_obj=mm, path=path)
+
+    def save_as(self, path: str, replace: bool = True) -> bool:
+        """
+        Atomically write this filter to *path*.
+
+        With replace=False the file is only created if it does not exist yet
+        (os.link semantics) and False is returned when another process won.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix='.bloom-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(HEADER.pack(MAGIC, self.cells, self.hashes, self.watermark))
+                fh.write(bytes(self._cells))
+            if replace:
+                os.replace(tmp, path)
+                return True
+            try:
+                os.link(tmp, path)
+                return True
+            except FileExistsError:
+                return False
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._cells.release()
+            self._mmap.close()
+            self._mmap = None
+
+    # ── Set operations ───────────────────────────────────────────────────────
+
+    def _positions(self, item: str):
+        # Kirsch–Mitzenmacher double hashing over one 128-bit digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        cells = self.cells
+        return [(h1 + i * h2) % cells for i in range(self.hashes)]
+
+    def add(self, item: str) -> None:
+        cells = self._cells
+        for pos in self._positions(item):
+            cells[pos] = 1
+
+    def __contains__(self, item: str) -> bool:
+        cells = self._cells
+        return all(cells[pos] for pos in self._positions(item))
+
+    @property
+    def fill_ratio(self) -> float:
+        """Fraction of cells set — a rough saturation indicator."""
+        return bytes(self._cells).count(1) / self.cells if self.cells else 0.0
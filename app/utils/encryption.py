@@ -10,6 +10,11 @@ Architecture
 • compute_hmac     — Deterministic HMAC-SHA256 fingerprint used as a "search-safe" index
                      next to each encrypted phone/email/IMEI/MAC column so SQL equality
                      lookups still work without storing plaintext.
+                     Digests come from a pre-keyed HMAC template (copied, never rebuilt)
+                     and recent results are kept in a bounded LRU cache.
+• compute_hmac_many — Batch variant for migrations / bulk lookups; bypasses the cache.
+• HMACDigest       — TypeDecorator storing a compute_hmac() hex digest as 32 raw bytes,
+                     halving index width.  Binds/returns hex, so filter_by() is unchanged.
 
 Keys (loaded from environment via app.config)
 ─────────────────────────────────────────────
@@ -25,10 +30,11 @@ import json
 import hmac as _hmac
 import hashlib
 import logging
-from typing import Any, Optional
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional
 
 from cryptography.fernet import Fernet, InvalidToken
-from sqlalchemy import Text
+from sqlalchemy import LargeBinary, Text
 from sqlalchemy.types import TypeDecorator
 
 logger = logging.getLogger(__name__)
@@ -37,6 +43,8 @@ logger = logging.getLogger(__name__)
 
 _fernet: Optional[Fernet] = None
 _hmac_key: Optional[bytes] = None
+_hmac_template = None   # keyed HMAC-SHA256 object; copied per digest
+_cached_hmac = None     # lru_cache-wrapped digest function (sized from settings)
 
 
 def _get_fernet() -> Fernet:
@@ -81,6 +89,34 @@ def decrypt(token: str) -> str:
     return _get_fernet().decrypt(token.encode()).decode()
 
 
+def _get_hmac_template():
+    """
+    Lazily build the keyed HMAC-SHA256 template.
+
+    Keying an HMAC hashes the padded key into the inner/outer states; doing it
+    once and calling .copy() per digest skips that work on every lookup.
+    """
+    global _hmac_template
+    if _hmac_template is None:
+        _hmac_template = _hmac.new(_get_hmac_key(), digestmod=hashlib.sha256)
+    return _hmac_template
+
+
+def _hmac_digest(value: str) -> str:
+    h = _get_hmac_template().copy()
+    h.update(value.strip().lower().encode())
+    return h.hexdigest()
+
+
+def _get_cached_hmac():
+    """Lazily wrap _hmac_digest in an LRU cache sized by FIELD_HMAC_CACHE_SIZE."""
+    global _cached_hmac
+    if _cached_hmac is None:
+        from app.config import settings
+        _cached_hmac = lru_cache(maxsize=settings.FIELD_HMAC_CACHE_SIZE)(_hmac_digest)
+    return _cached_hmac
+
+
 def compute_hmac(value: str) -> str:
     """
     Return a hex-encoded HMAC-SHA256 of *value* using FIELD_HMAC_KEY.
@@ -88,9 +124,31 @@ def compute_hmac(value: str) -> str:
     Used to build deterministic search-index columns so we can do equality
     lookups on encrypted fields without storing plaintext.
     The value is lowercased + stripped before hashing for consistency.
+    Login, OTP resend and device button events hash the same phones / MACs
+    repeatedly, so recent results are served from a bounded LRU cache.
+    """
+    return _get_cached_hmac()(value)
+
+
+def compute_hmac_many(values: Iterable[str]) -> List[str]:
+    """
+    Batch variant of compute_hmac for migrations and bulk lookups.
+
+    Shares the keyed template but bypasses the LRU cache so a large one-off
+    batch does not evict the hot entries used by request handlers.
     """
-    normalised = value.strip().lower()
-    return _hmac.new(_get_hmac_key(), normalised.encode(), hashlib.sha256).hexdigest()
+    template = _get_hmac_template()
+    digests = []
+    for value in values:
+        h = template.copy()
+        h.update(value.strip().lower().encode())
+        digests.append(h.hexdigest())
+    return digests
+
+
+def hmac_cache_info():
+    """Return the compute_hmac LRU statistics (hits, misses, maxsize, currsize)."""
+    return _get_cached_hmac().cache_info()
 
 
 def is_encrypted(value: str) -> bool:
@@ -179,3 +237,31 @@ class EncryptedJSON(TypeDecorator):
         except (InvalidToken, json.JSONDecodeError, Exception) as exc:
             logger.error("EncryptedJSON: decryption failed — %s", exc)
             return None
+
+
+class HMACDigest(TypeDecorator):
+    """
+    Stores a compute_hmac() hex digest as 32 raw bytes (BYTEA / BLOB).
+
+    Binary halves the B-tree key width compared with the 64-character hex
+    string.  Bind values are accepted as hex (what compute_hmac returns) and
+    results are returned as hex, so call sites such as
+    ``User.query.filter_by(phone_hmac=compute_hmac(phone))`` are unchanged.
+
+    Usage in a model:
+        phone_hmac = Column(HMACDigest(), unique=True, nullable=True, index=True)
+    """
+    impl = LargeBinary(32)
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return bytes(value)
+        return bytes.fromhex(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return bytes(value).hex()
@@ -0,0 +1,197 @@
+"""
+Pluggable JWT codec for Asfalis access / refresh / SOS tokens.
+
+Architecture
+────────────
+• HS256Codec  — Fast path for compact HS256 tokens built on the stdlib (hmac,
+                base64, json) with a pre-keyed HMAC template.  Produces tokens
+                byte-for-byte identical to python-jose for the claims we issue.
+• JoseCodec   — The original python-jose implementation, kept as a fallback.
+• encode_token / decode_token — module-level helpers that route through the
+                codec selected by the JWT_CODEC setting ('hs256' by default).
+
+Both codecs raise the same two exceptions so callers map them onto the API
+error codes without caring which backend is active:
+
+  TokenExpired  → TOKEN_EXPIRED
+  TokenInvalid  → TOKEN_INVALID (bad signature, malformed, wrong alg, bad claims)
+
+Claim semantics follow python-jose: datetime values for exp / iat / nbf are
+converted to integer NumericDates, an expired `exp` is rejected unless
+verify_exp=False, and `nbf` in the future is rejected.
+"""
+
+import json
+import hmac as _hmac
+import hashlib
+import base64
+import binascii
+from calendar import timegm
+from datetime import datetime, timezone
+
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class TokenError(Exception):
+    """Base class for token codec failures."""
+
+
+class TokenExpired(TokenError):
+    """The token's `exp` claim is in the past."""
+
+
+class TokenInvalid(TokenError):
+    """The token is malformed, has a bad signature or invalid claims."""
+
+
+def _now() -> int:
+    return timegm(datetime.now(timezone.utc).utctimetuple())
+
+
+def _numeric_dates(claims: dict) -> dict:
+    """Return a copy of *claims* with datetime time-claims as integer NumericDates."""
+    out = dict(claims)
+    for name in _TIME_CLAIMS:
+        if isinstance(out.get(name), datetime):
+            out[name] = timegm(out[name].utctimetuple())
+    return out
+
+
+def _validate_time_claims(claims: dict, verify_exp: bool) -> None:
+    """Same checks (and order) as python-jose's _validate_iat/_nbf/_exp."""
+    if "iat" in claims:
+        try:
+            int(claims["iat"])
+        except (TypeError, ValueError):
+            raise TokenInvalid("Issued At claim (iat) must be an integer.")
+    now = None
+    if "nbf" in claims:
+        try:
+            nbf = int(claims["nbf"])
+        except (TypeError, ValueError):
+            raise TokenInvalid("Not Before claim (nbf) must be an integer.")
+        now = _now()
+        if nbf > now:
+            raise TokenInvalid("The token is not yet valid (nbf)")
+    if verify_exp and "exp" in claims:
+        try:
+            exp = int(claims["exp"])
+        except (TypeError, ValueError):
+            raise TokenInvalid("Expiration Time claim (exp) must be an integer.")
+        if exp < (now if now is not None else _now()):
+            raise TokenExpired("Signature has expired.")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+# ── Codecs ────────────────────────────────────────────────────────────────────
+
+class HS256Codec:
+    """Stdlib HS256 compact-serialisation codec with a pre-keyed HMAC template."""
+
+    name = "hs256"
+    # python-jose sorts header keys: {"alg":"HS256","typ":"JWT"}
+    _HEADER = _b64encode(json.dumps({"typ": "JWT", "alg": "HS256"},
+                                    separators=(",", ":"), sort_keys=True).encode())
+
+    def __init__(self, secret: str):
+        key = secret.encode() if isinstance(secret, str) else secret
+        self._template = _hmac.new(key, digestmod=hashlib.sha256)
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        h = self._template.copy()
+        h.update(signing_input)
+        return h.digest()
+
+    def encode(self, claims: dict) -> str:
+        payload = _b64encode(json.dumps(_numeric_dates(claims), separators=(",", ":")).encode())
+        signing_input = self._HEADER + b"." + payload
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str, verify_exp: bool = True) -> dict:
+        try:
+            raw = token.encode("ascii") if isinstance(token, str) else token
+            signing_input, _, crypto_segment = raw.rpartition(b".")
+            header_segment, _, payload_segment = signing_input.partition(b".")
+            if not header_segment or not payload_segment or b"." in payload_segment:
+                raise TokenInvalid("Not enough segments")
+            header = json.loads(_b64decode(header_segment))
+            signature = _b64decode(crypto_segment)
+        except TokenInvalid:
+            raise
+        except (UnicodeError, binascii.Error, ValueError) as exc:
+            raise TokenInvalid(f"Malformed token: {exc}")
+
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            raise TokenInvalid("The specified alg value is not allowed")
+        if not _hmac.compare_digest(self._sign(signing_input), signature):
+            raise TokenInvalid("Signature verification failed.")
+
+        try:
+            claims = json.loads(_b64decode(payload_segment))
+        except (binascii.Error, ValueError):
+            raise TokenInvalid("Invalid payload string")
+        if not isinstance(claims, dict):
+            raise TokenInvalid("Invalid payload string: must be a json object")
+
+        _validate_time_claims(claims, verify_exp)
+        return claims
+
+
+class JoseCodec:
+    """python-jose backend (the original implementation)."""
+
+    name = "jose"
+
+    def __init__(self, secret: str):
+        self._secret = secret
+
+    def encode(self, claims: dict) -> str:
+        from jose import jwt
+        return jwt.encode(dict(claims), self._secret, algorithm="HS256")
+
+    def decode(self, token: str, verify_exp: bool = True) -> dict:
+        from jose import jwt, JWTError, ExpiredSignatureError
+        options = None if verify_exp else {"verify_exp": False}
+        try:
+            return jwt.decode(token, self._secret, algorithms=["HS256"], options=options)
+        except ExpiredSignatureError as exc:
+            raise TokenExpired(str(exc))
+        except JWTError as exc:
+            raise TokenInvalid(str(exc))
+
+
+CODECS = {
+    HS256Codec.name: HS256Codec,
+    JoseCodec.name: JoseCodec,
+}
+
+_codec = None
+
+
+def get_codec():
+    """Lazily build the codec named by JWT_CODEC, keyed with JWT_SECRET_KEY."""
+    global _codec
+    if _codec is None:
+        from app.config import settings
+        name = (settings.JWT_CODEC or HS256Codec.name).lower()
+        if name not in CODECS:
+            raise RuntimeError(f"Unknown JWT_CODEC '{name}'. Choose one of: {', '.join(CODECS)}")
+        _codec = CODECS[name](settings.JWT_SECRET_KEY)
+    return _codec
+
+
+def encode_token(claims: dict) -> str:
+    """Sign *claims* as an HS256 JWT with the configured codec."""
+    return get_codec().encode(claims)
+
+
+def decode_token(token: str, verify_exp: bool = True) -> dict:
+    """Verify and decode *token*. Raises TokenExpired or TokenInvalid."""
+    return get_codec().decode(token, verify_exp=verify_exp)
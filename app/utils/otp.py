@@ -1,61 +1,320 @@
-"""OTP utility — uses SQLAlchemy scoped session directly (no Flask context needed)."""
+"""
+OTP issue / verification.
 
+Two stores, selected by OTP_STORE:
+
+• memory (default) — OTPs live in a per-process TTL map keyed by
+  (phone, purpose).  Issuing, attempt counting and expiry never touch the DB.
+  Only the outcome is persisted: when OTP_AUDIT is on, each verified or
+  locked-out OTP is queued for a background writer that batches the rows into
+  otp_records (write-behind, off the request path).  The map is per process,
+  so this store needs a single worker or sticky routing by phone.
+
+• db — the original behaviour: every issue invalidates earlier codes and
+  inserts a row, every verification reads and updates otp_records.  Use it
+  when several workers must share OTP state.
+
+run_otp_sweeper() (started from the app lifespan) drops expired entries from
+the memory store and deletes otp_records rows older than
+OTP_RECORD_RETENTION_DAYS in bounded batches.
+"""
+
+import hmac
+import queue
 import random
 import string
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
 from app.extensions import db
 from app.models.otp import OTPRecord
 from app.config import Config
 
+logger = logging.getLogger(__name__)
+
+# check_otp() outcomes
+OTP_VERIFIED = 'verified'
+OTP_NOT_FOUND = 'not_found'
+OTP_EXPIRED = 'expired'
+OTP_TOO_MANY_ATTEMPTS = 'too_many_attempts'
+OTP_INVALID = 'invalid'
+
+_MESSAGES = {
+    OTP_VERIFIED: "OTP verified",
+    OTP_NOT_FOUND: "OTP not found or expired",
+    OTP_EXPIRED: "OTP expired",
+    OTP_TOO_MANY_ATTEMPTS: "Too many attempts",
+    OTP_INVALID: "Invalid OTP",
+}
+
 
 def generate_otp(length=6):
     """Generate a numeric OTP of given length."""
     return ''.join(random.choices(string.digits, k=length))
 
 
-def store_otp(phone=None, otp_code=None, purpose=None):
-    """Store OTP in database (phone-based only)."""
+def _ttl():
+    return timedelta(seconds=int(Config.OTP_EXPIRY_SECONDS or 300))
+
+
+def _max_attempts():
+    return int(Config.MAX_OTP_ATTEMPTS or 5)
+
+
+# ── Write-behind audit ────────────────────────────────────────────────────────
+
+_audit_queue = queue.Queue(maxsize=10_000)
+_audit_thread = None
+_audit_lock = threading.Lock()
+_AUDIT_BATCH = 500
+
+
+def _audit_writer():
+    from app.database import engine
+    while True:
+        rows = [_audit_queue.get()]
+        while len(rows) < _AUDIT_BATCH:
+            try:
+                rows.append(_audit_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(OTPRecord), rows)
+        except Exception as e:
+            logger.error(f"OTP audit write of {len(rows)} row(s) failed: {e}")
+
+
+def _audit(phone, purpose, entry, used):
+    global _audit_thread
+    if not Config.OTP_AUDIT:
+        return
+    if _audit_thread is None:
+        with _audit_lock:
+            if _audit_thread is None:
+                _audit_thread = threading.Thread(target=_audit_writer, name="otp-audit", daemon=True)
+                _audit_thread.start()
+    try:
+        _audit_queue.put_nowait({
+            'phone': phone, 'otp_code': entry.code, 'purpose': purpose,
+            'attempts': entry.attempts, 'is_used': used,
+            'expires_at': entry.expires_at, 'created_at': entry.issued_at,
+        })
+    except queue.Full:
+        logger.warning("OTP audit queue full — dropping audit record")
+
+
+def audit_backlog() -> int:
+    """OTP audit records queued but not yet written."""
+    return _audit_queue.qsize()
+
+
+# ── Stores ────────────────────────────────────────────────────────────────────
+
+class _Entry:
+    __slots__ = ('code', 'expires_at', 'issued_at', 'attempts', 'audited')
+
+    def __init__(self, code, issued_at, expires_at):
+        self.code = code
+        self.issued_at = issued_at
+        self.expires_at = expires_at
+        self.attempts = 0
+        self.audited = False
+
+
+class MemoryOTPStore:
+    """TTL map of the live OTP per (phone, purpose), bounded to max_entries."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def issue(self, phone, otp_code, purpose, commit=True):
+        now = datetime.utcnow()
+        key = (phone, purpose)
+        with self._lock:
+            self._entries.pop(key, None)  # a new code supersedes the old one
+            if len(self._entries) >= self.max_entries:
+                self._sweep_locked(now)
+                while len(self._entries) >= self.max_entries:
+                    self._entries.popitem(last=False)  # oldest issued first
+            self._entries[key] = _Entry(otp_code, now, now + _ttl())
+
+    def check(self, phone, otp_code, purpose, commit=True):
+        key = (phone, purpose)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return OTP_NOT_FOUND
+            if entry.expires_at < datetime.utcnow():
+                del self._entries[key]
+                return OTP_EXPIRED
+            if entry.attempts >= _max_attempts():
+                return OTP_TOO_MANY_ATTEMPTS
+            # compare_digest raises TypeError on non-str or non-ASCII str
+            # input; the contacts route passes the raw JSON value through.
+            if not isinstance(otp_code, str) or not hmac.compare_digest(entry.code.encode(), otp_code.encode()):
+                entry.attempts += 1
+                if entry.attempts >= _max_attempts() and not entry.audited:
+                    entry.audited = True
+                    _audit(phone, purpose, entry, used=False)
+                return OTP_INVALID
+            del self._entries[key]
+        _audit(phone, purpose, entry, used=True)
+        return OTP_VERIFIED
+
+    def restore(self, phone, otp_code, purpose):
+        self.issue(phone, otp_code, purpose)
+
+    def _sweep_locked(self, now):
+        expired = [k for k, e in self._entries.items() if e.expires_at < now]
+        for k in expired:
+            del self._entries[k]
+        return len(expired)
+
+    def sweep(self):
+        """Drop expired entries; returns how many were removed."""
+        with self._lock:
+            return self._sweep_locked(datetime.utcnow())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _commit_or_flush(commit):
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+
+
+class DBOTPStore:
+    """The original otp_records-backed store (shared across workers)."""
+
+    def issue(self, phone, otp_code, purpose, commit=True):
+        OTPRecord.query.filter_by(phone=phone, purpose=purpose, is_used=False).update(
+            {'is_used': True}, synchronize_session=False)
+        db.session.add(OTPRecord(
+            phone=phone,
+            otp_code=otp_code,
+            purpose=purpose,
+            expires_at=datetime.utcnow() + _ttl(),
+        ))
+        _commit_or_flush(commit)
+
+    def check(self, phone, otp_code, purpose, commit=True):
+        otp_record = OTPRecord.query.filter_by(
+            phone=phone, purpose=purpose, is_used=False
+        ).order_by(OTPRecord.created_at.desc()).first()
+
+        if not otp_record:
+            return OTP_NOT_FOUND
+        if otp_record.expires_at < datetime.utcnow():
+            return OTP_EXPIRED
+        if otp_record.attempts >= _max_attempts():
+            return OTP_TOO_MANY_ATTEMPTS
+        if otp_record.otp_code != otp_code:
+            otp_record.attempts += 1
+            db.session.commit()
+            return OTP_INVALID
+
+        otp_record.is_used = True
+        _commit_or_flush(commit)
+        return OTP_VERIFIED
+
+    def restore(self, phone, otp_code, purpose):
+        pass  # the caller's rollback already un-used the row
+
+    def sweep(self):
+        return 0
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        if (Config.OTP_STORE or 'memory').lower() == 'db':
+            _store = DBOTPStore()
+        else:
+            _store = MemoryOTPStore(Config.OTP_CACHE_MAX_ENTRIES)
+    return _store
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+
+def store_otp(phone=None, otp_code=None, purpose=None, commit=True):
+    """
+    Issue *otp_code* for (phone, purpose), replacing any earlier code.
+
+    commit=False leaves the db store's writes in the caller's transaction, so
+    they commit (or roll back) together with the caller's own changes.
+    """
     if not phone:
         raise ValueError("Phone number must be provided")
+    get_store().issue(phone, otp_code, purpose, commit=commit)
 
-    OTPRecord.query.filter_by(phone=phone, purpose=purpose, is_used=False).update({'is_used': True})
 
-    expires_at = datetime.utcnow() + timedelta(seconds=int(Config.OTP_EXPIRY_SECONDS or 300))
+def check_otp(phone=None, otp_code=None, purpose=None, commit=True):
+    """
+    Verify an OTP and return one of the OTP_* outcome constants.
 
-    otp_record = OTPRecord(
-        phone=phone,
-        otp_code=otp_code,
-        purpose=purpose,
-        expires_at=expires_at
-    )
-    db.session.add(otp_record)
-    db.session.commit()
-    return otp_record
+    With commit=False the db store marks a verified OTP used in the caller's
+    transaction.  A failed attempt is always committed, because the caller
+    rejects the request.
+    """
+    if not phone:
+        return OTP_NOT_FOUND
+    return get_store().check(phone, otp_code, purpose, commit=commit)
 
 
 def verify_otp(phone=None, otp_code=None, purpose=None):
-    """Verify OTP (phone-based only)."""
+    """Verify OTP (phone-based only). Returns (ok, message)."""
     if not phone:
         return False, "Phone number required"
+    outcome = check_otp(phone, otp_code, purpose)
+    return outcome == OTP_VERIFIED, _MESSAGES[outcome]
 
-    otp_record = OTPRecord.query.filter_by(
-        phone=phone, purpose=purpose, is_used=False
-    ).order_by(OTPRecord.created_at.desc()).first()
 
-    if not otp_record:
-        return False, "OTP not found or expired"
+def restore_otp(phone, otp_code, purpose):
+    """
+    Undo check_otp(commit=False) after the caller's transaction failed, so
+    the user can retry with the same code.
+    """
+    get_store().restore(phone, otp_code, purpose)
 
-    if otp_record.expires_at < datetime.utcnow():
-        return False, "OTP expired"
 
-    if otp_record.attempts >= int(Config.MAX_OTP_ATTEMPTS or 5):
-        return False, "Too many attempts"
+# ── Sweeper ───────────────────────────────────────────────────────────────────
+
+def prune_otp_records():
+    """Drop expired in-memory OTPs and delete old otp_records rows in bounded batches."""
+    from app.utils.sweep import delete_in_batches
+    evicted = get_store().sweep()
+    cutoff = datetime.utcnow() - timedelta(days=Config.OTP_RECORD_RETENTION_DAYS)
+    deleted, latencies = delete_in_batches(
+        OTPRecord, OTPRecord.expires_at < cutoff,
+        Config.OTP_SWEEP_BATCH_SIZE, Config.OTP_SWEEP_MAX_BATCHES,
+    )
+    return evicted, deleted, latencies
 
-    if otp_record.otp_code != otp_code:
-        otp_record.attempts += 1
-        db.session.commit()
-        return False, "Invalid OTP"
 
-    otp_record.is_used = True
-    db.session.commit()
-    return True, "OTP verified"
+async def run_otp_sweeper():
+    """Run prune_otp_records() every OTP_SWEEP_INTERVAL_SECONDS."""
+    while True:
+        try:
+            evicted, deleted, latencies = await asyncio.to_thread(prune_otp_records)
+            if evicted or deleted:
+                logger.info(
+                    f"OTP sweep: {evicted} expired in memory, {deleted} otp_records row(s) deleted "
+                    f"in {len(latencies)} batch(es) (max {max(latencies):.1f} ms)"
+                )
+        except Exception as e:
+            logger.warning(f"OTP sweep failed: {e}")
+        await asyncio.sleep(Config.OTP_SWEEP_INTERVAL_SECONDS)
@@ -0,0 +1,149 @@
+"""
+bcrypt password hashing on a dedicated, bounded process pool.
+
+Auth routes are sync handlers running on the shared AnyIO thread pool, the
+same pool SOS and location routes depend on.  bcrypt is deliberately slow
+(~250 ms at cost 12), so a burst of logins or registrations would otherwise
+occupy most of those threads.  Here hashing runs in BCRYPT_POOL_WORKERS
+separate processes, and admission is capped at workers + BCRYPT_MAX_PENDING
+calls in flight: beyond that, hash_password / check_password raise
+PasswordHasherBusy immediately so the route can answer 503 instead of
+parking yet another thread.  At most that many request threads are ever
+tied up waiting on password hashing.
+
+BCRYPT_ROUNDS sets the cost factor for new hashes; needs_rehash() reports
+hashes made with a different cost so login can transparently upgrade them.
+
+BCRYPT_POOL_WORKERS=0 hashes inline in the calling thread (admission
+control still applies) — handy for local development.
+"""
+
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasherBusy(Exception):
+    """Too many password hashes already running or queued."""
+
+
+# ── Work functions (run in the pool processes; must be picklable) ───────────
+
+def _hashpw(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds=rounds))
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+# ── Pool ─────────────────────────────────────────────────────────────────────
+
+_executor = None
+_executor_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(max(settings.BCRYPT_POOL_WORKERS, 1) + settings.BCRYPT_MAX_PENDING)
+_stats = {"completed": 0, "rejected": 0, "in_flight": 0, "total_ms": 0.0}
+_stats_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None and settings.BCRYPT_POOL_WORKERS > 0:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: the server process has live threads and DB handles.
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.BCRYPT_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        with _stats_lock:
+            _stats["rejected"] += 1
+        raise PasswordHasherBusy("Password hashing capacity exhausted")
+    with _stats_lock:
+        _stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        executor = _get_executor()
+        if executor is None:
+            return fn(*args)
+        try:
+            return executor.submit(fn, *args).result()
+        except BrokenProcessPool:
+            _discard(executor)  # a worker died; the next call starts a fresh pool
+            raise
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        with _stats_lock:
+            _stats["in_flight"] -= 1
+            _stats["completed"] += 1
+            _stats["total_ms"] += elapsed
+        _slots.release()
+
+
+def _discard(executor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def hash_password(password: str) -> str:
+    """bcrypt hash of *password* at BCRYPT_ROUNDS. Raises PasswordHasherBusy."""
+    return _run(_hashpw, password.encode(), settings.BCRYPT_ROUNDS).decode()
+
+
+def check_password(password: str, hashed: str) -> bool:
+    """True if *password* matches *hashed*. Raises PasswordHasherBusy."""
+    return _run(_checkpw, password.encode(), hashed.encode())
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True if *hashed* was made with a cost factor other than BCRYPT_ROUNDS."""
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False  # not a bcrypt hash we understand — leave it alone
+
+
+def warm_up() -> None:
+    """Start the pool processes now rather than on the first login."""
+    try:
+        _run(_hashpw, b"warm-up", 4)
+    except Exception as e:
+        logger.warning(f"bcrypt pool warm-up failed: {e}")
+
+
+def shutdown() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def pool_stats() -> dict:
+    with _stats_lock:
+        done = _stats["completed"]
+        return {
+            "workers": settings.BCRYPT_POOL_WORKERS,
+            "max_in_flight": max(settings.BCRYPT_POOL_WORKERS, 1) + settings.BCRYPT_MAX_PENDING,
+            "in_flight": _stats["in_flight"],
+            "completed": done,
+            "rejected": _stats["rejected"],
+            "avg_ms": round(_stats["total_ms"] / done, 1) if done else 0.0,
+        }
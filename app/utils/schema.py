@@ -0,0 +1,111 @@
+"""
+Startup schema check without reflecting the whole database.
+
+Base.metadata.create_all() inspects every table on each boot — a dozen
+catalog round-trips over a fresh NullPool SSL connection — although
+db_init.py and `alembic upgrade head` already brought the schema up to date
+in the pre-deploy step.
+
+Instead, ensure_schema() compares a fingerprint of the code's schema with
+the one recorded in the single-row schema_fingerprint table, in one query:
+
+    fingerprint = sha256(alembic head revision + DDL of every model table)
+
+If they match, create_all is skipped.  Otherwise (first boot, new migration,
+changed model, table missing) it runs create_all as before and records the
+new fingerprint.  SCHEMA_FINGERPRINT_CHECK=false always runs create_all.
+"""
+
+import os
+import re
+import hashlib
+import logging
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.config import Config
+from app.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+_VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'migrations', 'versions')
+_REVISION = re.compile(r"^revision\s*=\s*['\"](\w+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision\s*=\s*(.+)$", re.M)
+
+
+def alembic_head(versions_dir=_VERSIONS_DIR):
+    """Head revision(s) of the migration scripts, read without importing Alembic."""
+    revisions, parents = set(), set()
+    try:
+        names = os.listdir(versions_dir)
+    except OSError:
+        return None
+    for name in names:
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, name), encoding='utf-8') as f:
+            source = f.read()
+        rev = _REVISION.search(source)
+        if not rev:
+            continue
+        revisions.add(rev.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down:
+            parents.update(re.findall(r"['\"](\w+)['\"]", down.group(1)))
+    heads = sorted(revisions - parents)
+    return ','.join(heads) or None
+
+
+def metadata_hash(metadata=Base.metadata, dialect=None):
+    """sha256 of the CREATE TABLE / CREATE INDEX DDL for every model table."""
+    dialect = dialect or engine.dialect
+    digest = hashlib.sha256()
+    for table in sorted(metadata.tables.values(), key=lambda t: t.name):
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ''):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()
+
+
+def schema_fingerprint():
+    head = alembic_head()
+    return head, hashlib.sha256(f"{head}:{metadata_hash()}".encode()).hexdigest()
+
+
+def _stored_fingerprint():
+    from app.models.schema_fingerprint import SchemaFingerprint
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(SchemaFingerprint.fingerprint).where(SchemaFingerprint.id == 1)
+            ).scalar()
+    except SQLAlchemyError:
+        return None  # table not created yet
+
+
+def _record_fingerprint(head, fingerprint):
+    from app.models.schema_fingerprint import SchemaFingerprint
+    try:
+        with engine.begin() as conn:
+            conn.execute(delete(SchemaFingerprint).where(SchemaFingerprint.id == 1))
+            conn.execute(insert(SchemaFingerprint).values(id=1, fingerprint=fingerprint, alembic_head=head))
+    except SQLAlchemyError as e:
+        # Another worker recorded it at the same moment; either row is correct.
+        logger.info(f"Schema fingerprint not recorded: {e}")
+
+
+def ensure_schema():
+    """Run create_all unless the stored fingerprint matches. Returns 'current' or 'created'."""
+    if not Config.SCHEMA_FINGERPRINT_CHECK:
+        Base.metadata.create_all(bind=engine)
+        return 'created'
+    head, fingerprint = schema_fingerprint()
+    if _stored_fingerprint() == fingerprint:
+        return 'current'
+    Base.metadata.create_all(bind=engine)
+    _record_fingerprint(head, fingerprint)
+    logger.info(f"Schema fingerprint recorded: {fingerprint[:12]} (alembic head {head})")
+    return 'created'
@@ -0,0 +1,47 @@
+"""
+Bounded batch deletes and updates for the background sweepers.
+
+Sweepers prune tables that can be large (revoked_tokens, otp_records), so a
+single DELETE could hold locks and bloat the transaction log for a long
+time.  delete_in_batches() removes at most *batch_size* rows per short
+transaction (picked by primary key through a LIMITed subquery, which works on
+both PostgreSQL and SQLite) and stops after *max_batches*, leaving the rest
+for the next run.  update_in_batches() does the same for UPDATEs (e.g.
+expiring stale SOS countdowns); its whereclause must stop matching a row
+once *values* are applied, or the same rows would be picked again.
+"""
+
+import time
+from typing import List, Tuple
+
+from sqlalchemy import delete, select, update
+
+from app.database import engine
+
+
+def delete_in_batches(model, whereclause, batch_size: int, max_batches: int) -> Tuple[int, List[float]]:
+    """Delete rows of *model* matching *whereclause*. Returns (rows deleted, batch latencies in ms)."""
+    pk = model.__mapper__.primary_key[0]
+    doomed = select(pk).where(whereclause).order_by(pk).limit(batch_size).scalar_subquery()
+    return _run_batches(delete(model).where(pk.in_(doomed)), batch_size, max_batches)
+
+
+def update_in_batches(model, whereclause, values: dict, batch_size: int,
+                      max_batches: int) -> Tuple[int, List[float]]:
+    """Apply *values* to rows of *model* matching *whereclause*. Returns (rows updated, batch latencies in ms)."""
+    pk = model.__mapper__.primary_key[0]
+    picked = select(pk).where(whereclause).limit(batch_size).scalar_subquery()
+    return _run_batches(update(model).where(pk.in_(picked)).values(**values), batch_size, max_batches)
+
+
+def _run_batches(stmt, batch_size, max_batches):
+    done, latencies = 0, []
+    for _ in range(max_batches):
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            count = conn.execute(stmt).rowcount
+        latencies.append((time.perf_counter() - started) * 1000)
+        done += count
+        if count < batch_size:
+            break
+    return done, latencies
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Index size and lookup latency: hex VARCHAR(64) vs binary HMACDigest columns.
+
+Builds two scratch tables with N random HMAC digests each — one stored the
+old way (64-char hex string) and one through the HMACDigest TypeDecorator
+(32 raw bytes) — indexes both, then reports the index size and the latency
+of indexed equality lookups.  The scratch tables are dropped afterwards.
+
+    PYTHONPATH=. python3 benchmarks/bench_hmac_index.py [--rows 200000] [--lookups 5000]
+
+Uses DATABASE_URL when --url is not given; defaults to a temporary SQLite
+file so the benchmark never touches a real database by accident.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select, text  # noqa: E402
+
+from app.utils.encryption import HMACDigest  # noqa: E402
+
+INSERT_CHUNK = 5000
+
+
+def _index_size(conn, index_name):
+    """Best-effort on-disk size of *index_name* in bytes (None if unavailable)."""
+    dialect = conn.dialect.name
+    if dialect == 'postgresql':
+        return conn.execute(text("SELECT pg_relation_size(:n)"), {'n': index_name}).scalar()
+    if dialect == 'sqlite':
+        try:
+            return conn.execute(
+                text("SELECT SUM(pgsize) FROM dbstat WHERE name = :n"), {'n': index_name}
+            ).scalar()
+        except Exception:
+            return None  # SQLite built without SQLITE_ENABLE_DBSTAT_VTAB
+    return None
+
+
+def _run(engine, table, digests, probes):
+    metadata = table.metadata
+    with engine.begin() as conn:
+        table.drop(conn, checkfirst=True)
+        table.create(conn)
+        for i in range(0, len(digests), INSERT_CHUNK):
+            conn.execute(table.insert(), [{'digest': d} for d in digests[i:i + INSERT_CHUNK]])
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text(f"ANALYZE {table.name}"))
+
+    index_name = next(iter(table.indexes)).name
+    with engine.connect() as conn:
+        size = _index_size(conn, index_name)
+        timings = []
+        for probe in probes:
+            q = select(table.c.id).where(table.c.digest == probe)
+            started = time.perf_counter()
+            conn.execute(q).first()
+            timings.append(time.perf_counter() - started)
+
+    with engine.begin() as conn:
+        metadata.drop_all(conn, tables=[table])
+    return size, timings
+
+
+def _fmt_size(size):
+    return f"{size / 1024:10.1f} KiB" if size is not None else "       n/a    "
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--lookups', type=int, default=5_000)
+    parser.add_argument('--url', default=None, help="database URL (default: temp SQLite)")
+    args = parser.parse_args(argv)
+
+    url = args.url
+    if not url:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_hmac_index.db')}"
+    engine = create_engine(url)
+
+    rng = random.Random(42)
+    digests = [rng.randbytes(32).hex() for _ in range(args.rows)]
+    probes = [rng.choice(digests) for _ in range(args.lookups)]
+
+    metadata = MetaData()
+    hex_table = Table('_bench_hmac_hex', metadata,
+                      Column('id', Integer, primary_key=True),
+                      Column('digest', String(64), index=True))
+    bin_table = Table('_bench_hmac_bin', metadata,
+                      Column('id', Integer, primary_key=True),
+                      Column('digest', HMACDigest(), index=True))
+
+    print(f"{engine.dialect.name}: rows={args.rows:,} lookups={args.lookups:,}")
+    print(f"{'column type':<18} {'index size':>14} {'p50 µs':>9} {'p99 µs':>9} {'mean µs':>9}")
+    results = {}
+    for label, table in (("VARCHAR(64) hex", hex_table), ("HMACDigest bytes", bin_table)):
+        size, timings = _run(engine, table, digests, probes)
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1e6
+        p99 = timings[int(len(timings) * 0.99) - 1] * 1e6
+        mean = statistics.fmean(timings) * 1e6
+        results[label] = (size, mean)
+        print(f"{label:<18} {_fmt_size(size)} {p50:9.1f} {p99:9.1f} {mean:9.1f}")
+
+    (hex_size, hex_mean), (bin_size, bin_mean) = results.values()
+    if hex_size and bin_size:
+        print(f"\nindex size ratio (binary / hex): {bin_size / hex_size:.2f}")
+    print(f"mean lookup ratio (binary / hex): {bin_mean / hex_mean:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the ASGI entry point.
+
+Runs `python -X importtime -c "import wsgi"` in a fresh interpreter, prints
+the slowest modules by cumulative import time, and exits non-zero when
+
+  • importing wsgi takes longer than --budget-ms, or
+  • a provider SDK that should load lazily (firebase_admin, google.auth,
+    twilio.rest) is imported at startup.
+
+    PYTHONPATH=. python3 benchmarks/bench_import_time.py [--budget-ms 1500] [--top 15] [--runs 3]
+
+The best of --runs is used, since the first run also pays for writing .pyc
+files and a cold page cache.  Wire it into CI as a cold-start regression gate.
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use (fcm_service / twilio_client); must not appear at startup.
+LAZY_MODULES = ("firebase_admin", "google.auth", "twilio.rest")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(target):
+    """Return {module: (self_us, cumulative_us, depth)} for one cold import of *target*."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            modules[name] = (int(self_us), int(cum_us), len(indent) // 2)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", default="wsgi")
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure(args.target) for _ in range(max(args.runs, 1))]
+    modules = min(runs, key=lambda r: r.get(args.target, (0, 0))[1])
+    total_ms = modules[args.target][1] / 1000
+
+    print(f"import {args.target}: {total_ms:.1f} ms (best of {len(runs)}, budget {args.budget_ms:.0f} ms)\n")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    slowest = sorted(modules.items(), key=lambda kv: kv[1][1], reverse=True)
+    for name, (self_us, cum_us, _) in [kv for kv in slowest if kv[0] != args.target][:args.top]:
+        print(f"{cum_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import {args.target} took {total_ms:.1f} ms (> {args.budget_ms:.0f} ms)")
+    for lazy in LAZY_MODULES:
+        if lazy in modules:
+            failures.append(f"{lazy} is imported at startup ({modules[lazy][1] / 1000:.1f} ms) — it should load lazily")
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("OK: within budget, no eager provider imports")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
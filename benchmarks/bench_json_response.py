@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Response serialization: stock FastAPI JSON path vs FastJSONResponse/FastJSONRoute.
+
+Builds /sos/history- and /contacts-shaped envelopes and measures
+
+  render    — jsonable_encoder + JSONResponse (what FastAPI does for a dict
+              returned without a response_model) vs FastJSONResponse alone
+  end-to-end — the same payload returned by a route on a plain APIRouter vs
+              one using FastJSONRoute, requested through the ASGI stack
+
+and checks both produce the same JSON.
+
+    PYTHONPATH=. python3 benchmarks/bench_json_response.py [--alerts 100 1000 10000] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson  # noqa: E402
+from fastapi import APIRouter, FastAPI  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.responses import FastJSONResponse, FastJSONRoute  # noqa: E402
+
+
+def history_payload(n, raw_datetimes=False):
+    """Envelope shaped like GET /api/sos/history with *n* alerts."""
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    alerts = []
+    for i in range(n):
+        at = now - timedelta(minutes=i * 7, microseconds=i)
+        alerts.append({
+            'alert_id': str(uuid.UUID(int=i)),
+            'trigger_type': ('manual', 'iot_button', 'auto_fall')[i % 3],
+            'address': f"{i} MG Road, Bengaluru, Karnataka 5600{i % 100:02d}, India",
+            'status': ('sent', 'cancelled', 'resolved')[i % 3],
+            'triggered_at': at if raw_datetimes else at.strftime('%d %b %Y, %I:%M %p IST'),
+            'resolved_at': (at + timedelta(minutes=5)) if raw_datetimes else (at + timedelta(minutes=5)).isoformat(),
+            'resolution_type': (None, 'user_cancelled', 'marked_safe')[i % 3],
+        })
+    return {"success": True, "data": alerts}
+
+
+def contacts_payload(n):
+    return {"success": True, "data": [{
+        'id': str(uuid.UUID(int=i)), 'name': f"Contact {i}", 'phone': f"+9198765{i:05d}",
+        'email': f"contact{i}@example.com", 'relationship': 'Friend', 'is_primary': i == 0,
+        'is_verified': bool(i % 2), 'verified_at': datetime(2026, 1, 1).isoformat(),
+    } for i in range(n)]}
+
+
+def _median_ms(fn, repeat):
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def _client(payload, route_class):
+    router = APIRouter(route_class=route_class)
+
+    @router.get("/payload")
+    def get_payload():
+        return payload
+
+    app = FastAPI(default_response_class=FastJSONResponse if route_class is FastJSONRoute else JSONResponse)
+    app.include_router(router)
+    return TestClient(app)
+
+
+def _row(label, before, after):
+    print(f"{label:<34} {before:9.2f} ms {after:9.2f} ms {before / after:7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--alerts', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'payload':<34} {'stock':>12} {'fast':>12} {'speedup':>8}")
+    for n in args.alerts:
+        cases = [
+            (f"history {n} (render)", history_payload(n)),
+            (f"history {n}, datetimes (render)", history_payload(n, raw_datetimes=True)),
+            (f"contacts {n} (render)", contacts_payload(n)),
+        ]
+        for label, payload in cases:
+            stock = JSONResponse(jsonable_encoder(payload)).body
+            fast = FastJSONResponse(payload).body
+            assert orjson.loads(stock) == orjson.loads(fast), f"{label}: outputs differ"
+            _row(label,
+                 _median_ms(lambda: JSONResponse(jsonable_encoder(payload)), args.repeat),
+                 _median_ms(lambda: FastJSONResponse(payload), args.repeat))
+
+        payload = history_payload(n)
+        stock_client, fast_client = _client(payload, APIRouter().route_class), _client(payload, FastJSONRoute)
+        assert stock_client.get("/payload").json() == fast_client.get("/payload").json()
+        _row(f"history {n} (end-to-end)",
+             _median_ms(lambda: stock_client.get("/payload"), args.repeat),
+             _median_ms(lambda: fast_client.get("/payload"), args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Issue / verify throughput of the JWT codecs in app.utils.jwt_codec.
+
+Mirrors what the auth routes do: _make_tokens issues three tokens per login
+or refresh (access, refresh, SOS) and every authenticated request verifies
+one.  Each registered codec is benchmarked and cross-checked against the
+others (a token issued by one must verify with every other).
+
+    PYTHONPATH=. python3 benchmarks/bench_jwt.py [--n 20000]
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.jwt_codec import CODECS, TokenExpired, TokenInvalid  # noqa: E402
+
+SECRET = "benchmark-jwt-secret"
+
+
+def _claims():
+    now = datetime.now(timezone.utc)
+    return {"sub": str(uuid.uuid4()), "type": "access", "jti": str(uuid.uuid4()),
+            "iat": now, "exp": now + timedelta(minutes=15)}
+
+
+def _rate(fn, n):
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    return n / elapsed, elapsed / n * 1e6
+
+
+def _check_compat(codecs):
+    """Every codec must accept every other codec's tokens and agree on errors."""
+    claims = _claims()
+    tokens = {name: c.encode(claims) for name, c in codecs.items()}
+    expired = {name: c.encode({**claims, "exp": datetime.now(timezone.utc) - timedelta(seconds=5)})
+               for name, c in codecs.items()}
+    for issuer, token in tokens.items():
+        for name, codec in codecs.items():
+            assert codec.decode(token)["sub"] == claims["sub"], (issuer, name)
+            try:
+                codec.decode(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
+                raise AssertionError(f"{name} accepted a tampered {issuer} token")
+            except TokenInvalid:
+                pass
+            try:
+                codec.decode(expired[issuer])
+                raise AssertionError(f"{name} accepted an expired {issuer} token")
+            except TokenExpired:
+                pass
+            assert codec.decode(expired[issuer], verify_exp=False)["jti"] == claims["jti"]
+    identical = len(set(tokens.values())) == 1
+    print(f"compatibility: OK (tokens byte-identical across codecs: {identical})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--n', type=int, default=20_000)
+    args = parser.parse_args(argv)
+
+    codecs = {name: cls(SECRET) for name, cls in CODECS.items()}
+    _check_compat(codecs)
+
+    claims = [_claims() for _ in range(args.n)]
+    print(f"\nn={args.n:,}")
+    print(f"{'codec':<8} {'issue ops/s':>12} {'µs/op':>8} {'verify ops/s':>13} {'µs/op':>8}")
+    results = {}
+    for name, codec in codecs.items():
+        issue_rate, issue_us = _rate(lambda: [codec.encode(c) for c in claims], args.n)
+        tokens = [codec.encode(c) for c in claims]
+        verify_rate, verify_us = _rate(lambda: [codec.decode(t) for t in tokens], args.n)
+        results[name] = (issue_rate, verify_rate)
+        print(f"{name:<8} {issue_rate:12,.0f} {issue_us:8.1f} {verify_rate:13,.0f} {verify_us:8.1f}")
+
+    if "jose" in results and "hs256" in results:
+        (ji, jv), (hi, hv) = results["jose"], results["hs256"]
+        print(f"\nhs256 vs jose: issue {hi / ji:.1f}x, verify {hv / jv:.1f}x "
+              f"(login issues 3 tokens: {3e6 / hi:.0f} µs vs {3e6 / ji:.0f} µs)")
+
+
+if __name__ == '__main__':
+    main()
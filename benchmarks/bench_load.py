@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Load test for the SOS, location and sensor endpoints.
+
+Boots wsgi:app under uvicorn in a child process, against a temporary SQLite
+database with fake Twilio and FCM clients that answer after
+--provider-latency-ms, registers the virtual users over HTTP and then
+drives a mix of
+
+  armed    — Auto SOS on, POSTing accelerometer windows to
+             /api/protection/sensor-data every --sensor-interval seconds
+             (a --danger-rate fraction spikes, auto-triggers and is cancelled)
+  sharers  — live location sharing, POSTing GPS fixes to /api/location/update
+             every --gps-interval seconds (and reading /current now and then)
+  sos      — every --burst-interval seconds all of them trigger at once,
+             poll the countdown, and cancel — after a send-now (WhatsApp
+             fan-out) for a --dispatch-rate fraction
+
+for --duration seconds after a --warmup.  Reports count, errors, req/s and
+p50/p90/p99/max latency per endpoint:
+
+    PYTHONPATH=. python3 benchmarks/bench_load.py [--scenario mixed] [--scale 1] [--duration 30]
+        [--json out.json] [--compare baseline.json --tolerance 0.2]
+
+Scenarios: sensors, gps, sos, mixed (see SCENARIOS).  --json writes the
+results with the run parameters for later comparison; --compare prints the
+change against such a file and exits non-zero when an endpoint's p99 grew,
+or its throughput fell, by more than --tolerance.  Compare runs of the same
+scenario on the same machine — SQLite numbers say nothing about production
+capacity, only whether a change made things better or worse.
+
+--url targets an already running server instead (it must run with
+DEBUG=true so registration returns the OTP; no fakes are installed).
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from types import SimpleNamespace
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Virtual users per scenario at --scale 1.
+SCENARIOS = {
+    "sensors": {"armed": 40},
+    "gps": {"sharers": 40},
+    "sos": {"sos": 20},
+    "mixed": {"armed": 20, "sharers": 20, "sos": 10},
+}
+
+_FAKE_TWILIO = {"sid": "ACbenchmark", "token": "benchmark-token"}
+
+
+# ── Server side (child process) ──────────────────────────────────────────────
+
+def _install_fakes(latency):
+    """Fake Twilio REST client and firebase_admin.messaging, both answering after *latency* s."""
+    from app.services import fcm_service, twilio_client
+
+    def create(**kwargs):
+        time.sleep(latency)
+        return SimpleNamespace(sid=f"SM{uuid.uuid4().hex}", status="queued")
+
+    twilio_client._clients[(_FAKE_TWILIO["sid"], _FAKE_TWILIO["token"])] = SimpleNamespace(
+        messages=SimpleNamespace(create=create))
+
+    def send_each(messages):
+        time.sleep(latency)
+        return SimpleNamespace(success_count=len(messages),
+                               responses=[SimpleNamespace(success=True, exception=None)] * len(messages))
+
+    fcm_service._messaging = SimpleNamespace(
+        Message=dict, Notification=dict, AndroidConfig=dict, AndroidNotification=dict, send_each=send_each)
+    fcm_service._firebase_ready = True
+
+
+def serve(args):
+    import uvicorn
+    _install_fakes(args.provider_latency_ms / 1000)
+    from wsgi import app
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args):
+    """Spawn the server; returns (process, base url, log path)."""
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT, DEBUG="true", LOG_LEVEL="WARNING",
+               DATABASE_URL=f"sqlite:///{workdir}/bench_load.db",
+               FIELD_HMAC_KEY=os.environ.get("FIELD_HMAC_KEY", "benchmark-hmac-key"),
+               TWILIO_ACCOUNT_SID=_FAKE_TWILIO["sid"], TWILIO_AUTH_TOKEN=_FAKE_TWILIO["token"],
+               TWILIO_PHONE_NUMBER="+15550000000", TWILIO_WHATSAPP_FROM="whatsapp:+15550000000")
+    for key in ("DATABASE_REPLICA_URL", "TWILIO_WA_ACCOUNT_SID", "TWILIO_WA_AUTH_TOKEN",
+                "TRACE_EXPORT_PATH", "TRACE_EXPORT_URL", "RENDER_EXTERNAL_URL"):
+        env.pop(key, None)
+    if not env.get("FIELD_ENCRYPTION_KEY"):
+        from cryptography.fernet import Fernet
+        env["FIELD_ENCRYPTION_KEY"] = Fernet.generate_key().decode()
+    log_path = os.path.join(workdir, "server.log")
+    proc = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+         "--provider-latency-ms", str(args.provider_latency_ms)],
+        cwd=workdir, env=env, stdout=open(log_path, "w"), stderr=subprocess.STDOUT,
+    )
+    return proc, f"http://127.0.0.1:{port}", log_path
+
+
+# ── Measurements ─────────────────────────────────────────────────────────────
+
+class Recorder:
+    def __init__(self):
+        self.recording = False
+        self.latencies = {}   # endpoint → [seconds]
+        self.errors = {}      # endpoint → {status: count}
+
+    async def request(self, client, label, method, path, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.latencies.setdefault(label, []).append(elapsed)
+            if not isinstance(status, int) or status >= 400:
+                errors = self.errors.setdefault(label, {})
+                errors[str(status)] = errors.get(str(status), 0) + 1
+        return response if isinstance(status, int) and status < 400 else None
+
+
+def _percentile(ordered, q):
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+def summarize(latencies, errors, seconds):
+    ordered = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2)
+    return {
+        "count": len(ordered),
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "rps": round(len(ordered) / seconds, 2),
+        "p50_ms": ms(_percentile(ordered, 0.50)),
+        "p90_ms": ms(_percentile(ordered, 0.90)),
+        "p99_ms": ms(_percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+# ── Virtual users ────────────────────────────────────────────────────────────
+
+async def setup_user(client, index, role):
+    phone = f"+1555{index:07d}"
+    password = "bench-pass-123"
+    r = await client.post("/api/auth/register/phone", json={
+        "full_name": f"Load User {index}", "phone_number": phone, "password": password, "country": "India"})
+    r.raise_for_status()
+    r = await client.post("/api/auth/verify-phone-otp", json={
+        "phone_number": phone, "otp_code": r.json()["data"]["otp_code"]})
+    r.raise_for_status()
+    r = await client.post("/api/auth/login/phone", json={"phone_number": phone, "password": password})
+    r.raise_for_status()
+    headers = {"Authorization": f"Bearer {r.json()['data']['access_token']}"}
+    (await client.post("/api/contacts", headers=headers, json={
+        "name": f"Contact {index}", "phone": f"+1666{index:07d}", "relationship": "friend"})).raise_for_status()
+    (await client.put("/api/user/fcm-token", headers=headers,
+                      json={"fcm_token": f"bench-fcm-{uuid.uuid4().hex}"})).raise_for_status()
+    if role == "armed":
+        (await client.post("/api/protection/toggle", headers=headers, json={"is_active": True})).raise_for_status()
+    elif role == "sharers":
+        (await client.post("/api/location/share/start", headers=headers)).raise_for_status()
+    return headers
+
+
+def _sensor_window(spike):
+    now = int(time.time() * 1000)
+    peak = 25.0 if spike else 0.0
+    return [{"x": random.gauss(0, 0.3) + (peak if spike and i == 25 else 0.0),
+             "y": random.gauss(0, 0.3), "z": random.gauss(9.81, 0.3), "timestamp": now + i * 20}
+            for i in range(50)]
+
+
+async def armed_user(client, rec, headers, args, stop_at):
+    await asyncio.sleep(random.uniform(0, args.sensor_interval))
+    while time.monotonic() < stop_at:
+        spike = random.random() < args.danger_rate
+        r = await rec.request(client, "POST /api/protection/sensor-data", "POST", "/api/protection/sensor-data",
+                              headers=headers, json={"sensor_type": "accelerometer",
+                                                     "data": _sensor_window(spike), "sensitivity": "medium"})
+        alert_id = r.json()["data"].get("alert_id") if r is not None else None
+        if alert_id:
+            await rec.request(client, "POST /api/sos/cancel", "POST", "/api/sos/cancel",
+                              headers=headers, json={"alert_id": alert_id})
+        await asyncio.sleep(args.sensor_interval)
+
+
+async def sharer(client, rec, headers, args, stop_at):
+    lat, lng = 12.97 + random.uniform(-0.05, 0.05), 77.59 + random.uniform(-0.05, 0.05)
+    await asyncio.sleep(random.uniform(0, args.gps_interval))
+    fixes = 0
+    while time.monotonic() < stop_at:
+        lat += random.gauss(0, 0.0001)
+        lng += random.gauss(0, 0.0001)
+        await rec.request(client, "POST /api/location/update", "POST", "/api/location/update", headers=headers,
+                          json={"latitude": lat, "longitude": lng, "accuracy": 8.0, "is_sharing": True})
+        fixes += 1
+        if fixes % 10 == 0:
+            await rec.request(client, "GET /api/location/current", "GET", "/api/location/current", headers=headers)
+        await asyncio.sleep(args.gps_interval)
+
+
+async def sos_user(client, rec, headers, args, stop_at, started):
+    burst = 0
+    while True:
+        burst += 1
+        next_burst = started + burst * args.burst_interval
+        if next_burst >= stop_at:
+            return
+        await asyncio.sleep(max(0.0, next_burst - time.monotonic()))
+        r = await rec.request(client, "POST /api/sos/trigger", "POST", "/api/sos/trigger", headers=headers,
+                              json={"latitude": 12.97, "longitude": 77.59, "trigger_type": "manual"})
+        if r is None:
+            continue
+        alert_id = r.json()["data"]["alert_id"]
+        await asyncio.sleep(random.uniform(0.2, 1.0))
+        await rec.request(client, "GET /api/sos/countdown/{id}", "GET", f"/api/sos/countdown/{alert_id}",
+                          headers=headers)
+        if random.random() < args.dispatch_rate:
+            await rec.request(client, "POST /api/sos/send-now", "POST", "/api/sos/send-now",
+                              headers=headers, json={"alert_id": alert_id})
+        await asyncio.sleep(random.uniform(0.2, 1.0))
+        await rec.request(client, "POST /api/sos/cancel", "POST", "/api/sos/cancel",
+                          headers=headers, json={"alert_id": alert_id})
+
+
+async def run(args, base_url):
+    import httpx
+
+    counts = {role: max(1, round(n * args.scale)) for role, n in SCENARIOS[args.scenario].items()}
+    total_users = sum(counts.values())
+    limits = httpx.Limits(max_connections=total_users + 10, max_keepalive_connections=total_users + 10)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        print(f"Registering {total_users} users ({', '.join(f'{n} {r}' for r, n in counts.items())})...")
+        setup_gate = asyncio.Semaphore(8)
+        offset = random.randrange(10**6) if args.url else 0   # fresh phone numbers on a shared server
+
+        async def setup(index, role):
+            async with setup_gate:
+                return role, await setup_user(client, offset + index, role)
+
+        roles = [role for role, n in counts.items() for _ in range(n)]
+        users = await asyncio.gather(*(setup(i, role) for i, role in enumerate(roles)))
+
+        rec = Recorder()
+        started = time.monotonic()
+        stop_at = started + args.warmup + args.duration
+        tasks = []
+        for role, headers in users:
+            if role == "armed":
+                tasks.append(armed_user(client, rec, headers, args, stop_at))
+            elif role == "sharers":
+                tasks.append(sharer(client, rec, headers, args, stop_at))
+            else:
+                tasks.append(sos_user(client, rec, headers, args, stop_at, started))
+
+        async def measure():
+            await asyncio.sleep(args.warmup)
+            rec.recording = True
+            await asyncio.sleep(args.duration)
+            rec.recording = False
+
+        print(f"Running '{args.scenario}' for {args.warmup:g}s warmup + {args.duration:g}s...")
+        await asyncio.gather(measure(), *tasks)
+
+        server = None
+        try:
+            health = (await client.get("/health")).json()
+            server = {key: health.get(key) for key in ("queries", "lanes", "user_snapshots")}
+        except Exception:
+            pass
+
+    results = {label: summarize(lat, rec.errors.get(label, {}), args.duration)
+               for label, lat in sorted(rec.latencies.items())}
+    everything = [v for lat in rec.latencies.values() for v in lat]
+    all_errors = {}
+    for errors in rec.errors.values():
+        for status, n in errors.items():
+            all_errors[status] = all_errors.get(status, 0) + n
+    return {
+        "meta": {
+            "scenario": args.scenario, "users": counts, "scale": args.scale,
+            "duration_s": args.duration, "warmup_s": args.warmup,
+            "provider_latency_ms": args.provider_latency_ms,
+            "target": args.url or "local sqlite",
+            "git": _git_revision(), "python": platform.python_version(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "endpoints": results,
+        "total": summarize(everything, all_errors, args.duration),
+        "server": server,
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+# ── Reporting ────────────────────────────────────────────────────────────────
+
+def print_report(report):
+    print(f"\n{'endpoint':<34} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} "
+          f"{'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for label, s in rows:
+        print(f"{label:<34} {s['count']:7d} {s['errors']:5d} {s['rps']:8.1f} {s['p50_ms']:8.1f} "
+              f"{s['p90_ms']:8.1f} {s['p99_ms']:8.1f} {s['max_ms']:8.1f}")
+
+
+def compare(report, baseline, tolerance):
+    """Print the change against *baseline*; return the regressed endpoints."""
+    regressed = []
+    print(f"\nvs baseline {baseline['meta'].get('git') or '?'} ({baseline['meta'].get('started_at')}), "
+          f"tolerance {tolerance:.0%}")
+    for key in ("scenario", "users", "duration_s", "provider_latency_ms"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            print(f"  note: {key} differs ({baseline['meta'].get(key)} → {report['meta'][key]})")
+    print(f"{'endpoint':<34} {'p50':>9} {'p99':>9} {'req/s':>9}")
+    rows = [(label, s, baseline["endpoints"].get(label)) for label, s in report["endpoints"].items()]
+    rows.append(("TOTAL", report["total"], baseline.get("total")))
+    change = lambda new, old: (new - old) / old if old else 0.0
+    for label, s, base in rows:
+        if not base:
+            print(f"{label:<34} {'(new)':>9}")
+            continue
+        p50, p99, rps = (change(s["p50_ms"], base["p50_ms"]), change(s["p99_ms"], base["p99_ms"]),
+                         change(s["rps"], base["rps"]))
+        flag = ""
+        if p99 > tolerance or rps < -tolerance:
+            regressed.append(label)
+            flag = "  REGRESSED"
+        print(f"{label:<34} {p50:+9.1%} {p99:+9.1%} {rps:+9.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the scenario's user counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before that")
+    parser.add_argument("--sensor-interval", type=float, default=0.5)
+    parser.add_argument("--danger-rate", type=float, default=0.002, help="fraction of sensor windows that spike")
+    parser.add_argument("--gps-interval", type=float, default=1.0)
+    parser.add_argument("--burst-interval", type=float, default=5.0)
+    parser.add_argument("--dispatch-rate", type=float, default=0.2, help="fraction of SOS bursts sent before cancel")
+    parser.add_argument("--provider-latency-ms", type=float, default=150.0, help="fake Twilio/FCM response time")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="baseline report (from --json) to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    import httpx
+
+    proc = None
+    base_url = args.url
+    if not base_url:
+        proc, base_url, log_path = start_server(args)
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health/live", timeout=1.0).status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                sys.exit(f"Server did not start; see {log_path}")
+            time.sleep(0.2)
+    try:
+        report = asyncio.run(run(args, base_url))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f), args.tolerance)
+        if regressed:
+            print(f"\n{len(regressed)} endpoint(s) regressed")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
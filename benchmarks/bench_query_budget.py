@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+SQL statements per request on the SOS and profile paths, as a table.
+
+Runs the lifecycle walk from tests/test_query_budget.py (where BUDGETS and
+the assertions live) against a temporary SQLite database and prints every
+request's cold and warm statement count next to its budget.  Exits non-zero
+if any request is over; `pytest tests/test_query_budget.py` is the gate,
+this is the report.
+
+    PYTHONPATH=. python3 benchmarks/bench_query_budget.py [--verbose]
+
+Always uses a temporary SQLite file, never DATABASE_URL.
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_queries.db"
+os.environ['DATABASE_REPLICA_URL'] = ''
+if not os.environ.get('FIELD_ENCRYPTION_KEY'):
+    from cryptography.fernet import Fernet
+    os.environ['FIELD_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+os.environ.setdefault('FIELD_HMAC_KEY', 'benchmark-hmac-key')
+os.environ['DEBUG'] = 'true'  # registration returns the OTP in the response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--verbose', action='store_true', help="print every counted statement")
+    args = parser.parse_args()
+
+    from tests.test_query_budget import BUDGETS, walk
+
+    results = walk()
+    over = 0
+    print(f"\n{'request':<30} {'mode':<5} {'statements':>10} {'budget':>7}")
+    for (label, mode), statements in results.items():
+        budget = BUDGETS.get(label)
+        flag = "  OVER" if budget is not None and len(statements) > budget else ""
+        over += bool(flag)
+        print(f"{label:<30} {mode:<5} {len(statements):10d} {budget if budget is not None else '-':>7}{flag}")
+        if args.verbose:
+            for statement in statements:
+                print(f"    {statement}")
+    if over:
+        print(f"\n{over} request(s) over budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Startup schema check: create_all vs the schema fingerprint fast path.
+
+Creates the schema once, then times --runs repetitions of
+
+  • Base.metadata.create_all()      — what lifespan used to run on every boot
+  • app.utils.schema.ensure_schema() — fingerprint lookup, skipping create_all
+
+and counts the SQL statements each sends.  On a hosted database every
+statement is at least one network round trip, so --rtt-ms adds that much
+simulated latency per statement to estimate the saving on e.g. Render →
+Supabase.
+
+    PYTHONPATH=. python3 benchmarks/bench_schema_startup.py [--runs 20] [--rtt-ms 0]
+
+Uses DATABASE_URL when set; defaults to a temporary SQLite file.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not os.environ.get('DATABASE_URL'):
+    os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_schema.db"
+
+from sqlalchemy import event  # noqa: E402
+
+from app.database import Base, engine  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.utils.schema import ensure_schema  # noqa: E402
+
+
+def _bench(label, fn, runs, counter, rtt):
+    timings, statements = [], 0
+    for _ in range(runs):
+        counter[0] = 0
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+        statements = counter[0]
+    median = statistics.median(timings)
+    print(f"{label:<16} {median:8.2f} ms median  {min(timings):8.2f} ms min  "
+          f"{statements:3d} statement(s)  ≈{median + statements * rtt:8.1f} ms at {rtt:g} ms RTT")
+    return median + statements * rtt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--rtt-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    counter = [0]
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(*_):
+        counter[0] += 1
+
+    print(f"database: {engine.url.render_as_string(hide_password=True)}  "
+          f"({len(Base.metadata.tables)} tables)\n")
+    ensure_schema()  # create tables and record the fingerprint
+
+    before = _bench("create_all", lambda: Base.metadata.create_all(bind=engine), args.runs, counter, args.rtt_ms)
+    after = _bench("ensure_schema", ensure_schema, args.runs, counter, args.rtt_ms)
+    print(f"\nsaved per boot: {before - after:.1f} ms ({before / after:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
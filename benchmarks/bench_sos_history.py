@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+GET /api/sos/history: full load vs keyset pages with field projection.
+
+Seeds one user with --alerts SOS alerts in a scratch database, then times
+
+  • legacy        — the old handler: every alert as an ORM object, all
+                    encrypted columns decrypted, every timestamp localized
+  • first page    — get_sos_history_page() with the default page size
+  • projected     — first page with fields=alert_id,status,triggered_at
+                    (no encrypted column read)
+  • walk          — every page at SOS_HISTORY_MAX_PAGE_SIZE, following
+                    next_cursor to the end
+
+    PYTHONPATH=. python3 benchmarks/bench_sos_history.py [--alerts 10000] [--repeat 10]
+
+Always uses a temporary SQLite file, never DATABASE_URL.
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/bench_history.db"
+if not os.environ.get('FIELD_ENCRYPTION_KEY'):
+    from cryptography.fernet import Fernet
+    os.environ['FIELD_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+os.environ.setdefault('FIELD_HMAC_KEY', 'benchmark-hmac-key')
+
+from app.config import settings  # noqa: E402
+from app.database import Base, ScopedSession, engine  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app import models  # noqa: E402,F401
+from app.models.sos_alert import SOSAlert  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.sos_service import get_sos_history_page  # noqa: E402
+from app.utils.timezone_utils import format_datetime_for_response  # noqa: E402
+
+
+def seed(n):
+    Base.metadata.create_all(bind=engine)
+    user_id = str(uuid.uuid4())
+    db.session.add(User(id=user_id, full_name="Bench User", phone="+919800000000",
+                        country="India", auth_provider="phone"))
+    now = datetime.utcnow()
+    for i in range(n):
+        db.session.add(SOSAlert(
+            user_id=user_id, trigger_type='manual', status=('sent', 'cancelled', 'resolved')[i % 3],
+            triggered_at=now - timedelta(minutes=i), resolved_at=now - timedelta(minutes=i - 2),
+            resolution_type='marked_safe', latitude=12.97 + i * 1e-5, longitude=77.59,
+            address=f"{i} MG Road, Bengaluru", sos_message="Help!", contacted_numbers=["+919811111111"],
+        ))
+        if i % 2000 == 1999:
+            db.session.commit()
+    db.session.commit()
+    ScopedSession.remove()
+    return user_id
+
+
+def legacy(user_id):
+    alerts = SOSAlert.query.filter_by(user_id=user_id).order_by(SOSAlert.triggered_at.desc()).all()
+    user = db.session.get(User, user_id)
+    country = user.country if user else None
+    return [{**a.to_dict(), "triggered_at": format_datetime_for_response(a.triggered_at, country)} for a in alerts]
+
+
+def walk(user_id):
+    items, cursor = [], None
+    while True:
+        page, cursor = get_sos_history_page(user_id, settings.SOS_HISTORY_MAX_PAGE_SIZE, cursor)
+        items.extend(page)
+        if cursor is None:
+            return items
+
+
+def _bench(label, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+        ScopedSession.remove()  # fresh identity map each run, as per request
+    rows = len(result[0]) if isinstance(result, tuple) else len(result)
+    print(f"{label:<28} {statistics.median(samples):9.2f} ms median {min(samples):9.2f} ms min  {rows:6d} alerts")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--alerts', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    user_id = seed(args.alerts)
+    print(f"seeded {args.alerts} alerts in {time.perf_counter() - started:.1f} s\n")
+
+    old = _bench("legacy (all, ORM)", lambda: legacy(user_id), args.repeat)
+    _bench(f"first page ({settings.SOS_HISTORY_PAGE_SIZE})", lambda: get_sos_history_page(user_id), args.repeat)
+    _bench("first page, 3 fields", lambda: get_sos_history_page(
+        user_id, fields=['alert_id', 'status', 'triggered_at']), args.repeat)
+    new = _bench(f"walk all ({settings.SOS_HISTORY_MAX_PAGE_SIZE}/page)", lambda: walk(user_id), args.repeat)
+    assert new == old, "paginated walk differs from the legacy response"
+
+
+if __name__ == '__main__':
+    main()
@@ -49,6 +49,8 @@ with engine.connect() as conn:
         import app.models.support         # noqa
         import app.models.revoked_token   # noqa
         import app.models.device_security # noqa
+        import app.models.schema_fingerprint  # noqa
+        import app.models.sos_stage_timing  # noqa
 
         Base.metadata.create_all(engine)
         print("[db_init] Tables created.")
@@ -45,6 +45,8 @@ import app.models.support       # noqa: F401
 
 import app.models.revoked_token # noqa: F401
 import app.models.device_security  # noqa: F401
+import app.models.schema_fingerprint  # noqa: F401
+import app.models.sos_stage_timing  # noqa: F401
 
 target_metadata = Base.metadata
 
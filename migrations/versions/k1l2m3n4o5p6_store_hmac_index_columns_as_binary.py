@@ -0,0 +1,126 @@
+"""Store HMAC index columns as 32-byte binary instead of 64-char hex
+
+Revision ID: k1l2m3n4o5p6
+Revises: j1k2l3m4n5o6
+Create Date: 2026-10-19 00:00:00.000000
+
+Background
+----------
+The HMAC index columns added in j1k2l3m4n5o6 hold HMAC-SHA256 digests as
+64-character hex strings (VARCHAR 64).  Hex doubles the key width of every
+B-tree entry and makes each equality comparison a 64-byte string compare.
+
+Change
+------
+Every HMAC column is converted to raw 32-byte binary (BYTEA on PostgreSQL,
+BLOB on SQLite).  The models use the ``HMACDigest`` TypeDecorator, which
+still accepts and returns the hex string produced by ``compute_hmac`` — so
+``filter_by(phone_hmac=compute_hmac(...))`` call sites are unchanged.
+
+The full digest is kept (no truncation), so uniqueness semantics are exactly
+those of the old hex columns and no collision handling is needed.
+
+    users                    — phone_hmac, email_hmac (unique)
+    trusted_contacts         — phone_hmac
+    connected_devices        — mac_hmac
+    user_device_bindings     — imei_hmac
+    handset_change_requests  — new_imei_hmac
+
+PostgreSQL converts in place with ``USING decode(col, 'hex')``; indexes are
+rebuilt automatically by ALTER COLUMN TYPE.  SQLite has no ALTER COLUMN TYPE
+and no portable unhex(), so the column is retyped with batch mode and the
+values are converted row by row in Python.
+
+Use ``benchmarks/bench_hmac_index.py`` to compare index size and lookup
+latency of the two representations on the target database.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'k1l2m3n4o5p6'
+down_revision = 'j1k2l3m4n5o6'
+branch_labels = None
+depends_on = None
+
+HMAC_COLUMNS = [
+    ('users', 'phone_hmac'),
+    ('users', 'email_hmac'),
+    ('trusted_contacts', 'phone_hmac'),
+    ('connected_devices', 'mac_hmac'),
+    ('user_device_bindings', 'imei_hmac'),
+    ('handset_change_requests', 'new_imei_hmac'),
+]
+
+
+def _convert_rows(connection, table, column, to_binary):
+    """Rewrite *column* value by value (hex ↔ bytes) for non-PostgreSQL dialects."""
+    rows = connection.execute(
+        sa.text(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL")
+    ).fetchall()
+    updates = []
+    for row_id, value in rows:
+        if to_binary:
+            # Batch mode copies the old TEXT values as-is (or via CAST AS BLOB,
+            # which yields the ASCII bytes of the hex string) — decode both.
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                value = bytes(value)
+                if len(value) != 64:
+                    continue  # already a 32-byte digest
+                value = value.decode()
+            updates.append({'id': row_id, 'v': bytes.fromhex(value)})
+        else:
+            if isinstance(value, str):
+                continue  # already hex
+            updates.append({'id': row_id, 'v': bytes(value).hex()})
+    if updates:
+        connection.execute(
+            sa.text(f"UPDATE {table} SET {column} = :v WHERE id = :id"), updates
+        )
+
+
+def upgrade():
+    connection = op.get_bind()
+
+    if connection.dialect.name == 'postgresql':
+        for table, column in HMAC_COLUMNS:
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE BYTEA USING decode({column}, 'hex')"
+            )
+        return
+
+    for table, column in HMAC_COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.String(64),
+                type_=sa.LargeBinary(32),
+                existing_nullable=True,
+            )
+        _convert_rows(connection, table, column, to_binary=True)
+
+
+def downgrade():
+    connection = op.get_bind()
+
+    if connection.dialect.name == 'postgresql':
+        for table, column in HMAC_COLUMNS:
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE VARCHAR(64) USING encode({column}, 'hex')"
+            )
+        return
+
+    for table, column in HMAC_COLUMNS:
+        _convert_rows(connection, table, column, to_binary=False)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.LargeBinary(32),
+                type_=sa.String(64),
+                existing_nullable=True,
+            )
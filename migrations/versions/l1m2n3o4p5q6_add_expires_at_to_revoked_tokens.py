@@ -0,0 +1,64 @@
+"""Add expires_at to revoked_tokens so expired JTIs can be pruned
+
+Revision ID: l1m2n3o4p5q6
+Revises: k1l2m3n4o5p6
+Create Date: 2026-10-19 00:00:00.000000
+
+Background
+----------
+A revoked_tokens row is written on every refresh-token rotation and logout
+and was never deleted, so the table (and the unique index on jti consulted by
+every revocation check) grew without bound.
+
+Change
+------
+    revoked_tokens — expires_at (DATETIME, nullable, indexed)
+
+expires_at is the revoked token's own `exp`.  Once it is further in the past
+than REVOKED_TOKEN_GRACE_SECONDS the token is rejected by /auth/refresh on
+age alone, so its row no longer protects anything and the sweeper in
+app/services/revocation_service.py deletes it in bounded batches.
+
+Existing rows are backfilled with revoked_at + JWT_REFRESH_TOKEN_EXPIRES.
+A token is always issued before it is revoked, so this is an upper bound on
+its real `exp` and never prunes a row early.
+"""
+
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'l1m2n3o4p5q6'
+down_revision = 'k1l2m3n4o5p6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    lifetime = int(os.environ.get('JWT_REFRESH_TOKEN_EXPIRES', 2592000))
+
+    with op.batch_alter_table('revoked_tokens') as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_revoked_tokens_expires_at', ['expires_at'])
+
+    if connection.dialect.name == 'postgresql':
+        op.execute(
+            f"UPDATE revoked_tokens SET expires_at = revoked_at + interval '{lifetime} seconds' "
+            f"WHERE expires_at IS NULL"
+        )
+    else:
+        op.execute(
+            f"UPDATE revoked_tokens SET expires_at = datetime(revoked_at, '+{lifetime} seconds') "
+            f"WHERE expires_at IS NULL"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens') as batch_op:
+        batch_op.drop_index('ix_revoked_tokens_expires_at')
+        batch_op.drop_column('expires_at')
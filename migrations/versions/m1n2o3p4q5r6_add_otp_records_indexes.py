@@ -0,0 +1,34 @@
+"""Index otp_records for OTP lookup and the retention sweeper
+
+Revision ID: m1n2o3p4q5r6
+Revises: l1m2n3o4p5q6
+Create Date: 2026-10-19 00:00:00.000000
+
+otp_records had no index besides its primary key, so both the latest-OTP
+lookup (phone, purpose, is_used ORDER BY created_at DESC) and the sweeper's
+expires_at range delete scanned the whole table.
+
+    otp_records — ix_otp_records_phone_purpose_created (phone, purpose, created_at)
+                  ix_otp_records_expires_at (expires_at)
+"""
+
+from alembic import op
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'm1n2o3p4q5r6'
+down_revision = 'l1m2n3o4p5q6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_otp_records_phone_purpose_created', 'otp_records',
+                    ['phone', 'purpose', 'created_at'])
+    op.create_index('ix_otp_records_expires_at', 'otp_records', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_otp_records_expires_at', table_name='otp_records')
+    op.drop_index('ix_otp_records_phone_purpose_created', table_name='otp_records')
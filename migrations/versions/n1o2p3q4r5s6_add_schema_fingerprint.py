@@ -0,0 +1,37 @@
+"""Add schema_fingerprint so startup can skip create_all
+
+Revision ID: n1o2p3q4r5s6
+Revises: m1n2o3p4q5r6
+Create Date: 2026-10-19 00:00:00.000000
+
+Single-row table written by app.utils.schema.ensure_schema(): the sha256 of
+the alembic head plus the model DDL the database was last verified against.
+When it matches the running code, the lifespan hook skips create_all.
+
+    schema_fingerprint — id, fingerprint, alembic_head, recorded_at
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'n1o2p3q4r5s6'
+down_revision = 'm1n2o3p4q5r6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'schema_fingerprint',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('alembic_head', sa.String(length=64), nullable=True),
+        sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('schema_fingerprint')
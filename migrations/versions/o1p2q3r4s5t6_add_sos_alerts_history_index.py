@@ -0,0 +1,32 @@
+"""Index sos_alerts for keyset-paginated history
+
+Revision ID: o1p2q3r4s5t6
+Revises: n1o2p3q4r5s6
+Create Date: 2026-10-19 00:00:00.000000
+
+GET /api/sos/history pages through a user's alerts with
+user_id = ? AND (triggered_at, id) < (?, ?) ORDER BY triggered_at DESC, id DESC.
+sos_alerts had no index besides its primary key, so every page scanned and
+sorted the whole table.
+
+    sos_alerts — ix_sos_alerts_user_triggered (user_id, triggered_at, id)
+"""
+
+from alembic import op
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'o1p2q3r4s5t6'
+down_revision = 'n1o2p3q4r5s6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sos_alerts_user_triggered', 'sos_alerts',
+                    ['user_id', 'triggered_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_sos_alerts_user_triggered', table_name='sos_alerts')
@@ -0,0 +1,30 @@
+"""Index sos_alerts for the stale-countdown sweeper
+
+Revision ID: p1q2r3s4t5u6
+Revises: o1p2q3r4s5t6
+Create Date: 2026-10-19 00:00:00.000000
+
+The countdown sweeper (sos_service.expire_stale_countdowns) looks for
+status = 'countdown' AND triggered_at < cutoff across all users every few
+seconds; without an index that is a full scan of sos_alerts each time.
+
+    sos_alerts — ix_sos_alerts_status_triggered (status, triggered_at)
+"""
+
+from alembic import op
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'p1q2r3s4t5u6'
+down_revision = 'o1p2q3r4s5t6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_sos_alerts_status_triggered', 'sos_alerts', ['status', 'triggered_at'])
+
+
+def downgrade():
+    op.drop_index('ix_sos_alerts_status_triggered', table_name='sos_alerts')
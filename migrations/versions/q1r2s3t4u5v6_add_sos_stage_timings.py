@@ -0,0 +1,48 @@
+"""Add sos_stage_timings for per-stage SOS pipeline timings
+
+Revision ID: q1r2s3t4u5v6
+Revises: p1q2r3s4t5u6
+Create Date: 2026-10-19 00:00:00.000000
+
+Written in the background by app/tracing.py: one row per timed stage
+(cooldown check, user lookup, insert, WhatsApp send per contact, …) of each
+SOS trigger, dispatch, cancel and mark-safe, keyed by alert for post-incident
+review.  Rows go with their alert (ON DELETE CASCADE).
+
+    sos_stage_timings — id, alert_id, trace_id, span_id, parent_span_id,
+                        operation, stage, started_at, duration_ms, status
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# ---------------------------------------------------------------------------
+# Revision identifiers
+# ---------------------------------------------------------------------------
+revision = 'q1r2s3t4u5v6'
+down_revision = 'p1q2r3s4t5u6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sos_stage_timings',
+        sa.Column('id', sa.String(length=36), primary_key=True),
+        sa.Column('alert_id', sa.String(length=36),
+                  sa.ForeignKey('sos_alerts.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('trace_id', sa.String(length=32), nullable=False),
+        sa.Column('span_id', sa.String(length=16), nullable=False),
+        sa.Column('parent_span_id', sa.String(length=16), nullable=True),
+        sa.Column('operation', sa.String(length=50), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('duration_ms', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+    )
+    op.create_index('ix_sos_stage_timings_alert_started', 'sos_stage_timings', ['alert_id', 'started_at'])
+
+
+def downgrade():
+    op.drop_index('ix_sos_stage_timings_alert_started', table_name='sos_stage_timings')
+    op.drop_table('sos_stage_timings')
@@ -8,13 +8,38 @@ Run this ONCE after deploying the Alembic migration:
 Prerequisites:
   • FIELD_ENCRYPTION_KEY and FIELD_HMAC_KEY must be set in .env (or the environment).
   • DATABASE_URL must point to the live database (or SQLite default is used).
-  • The Alembic migration j1k2l3m4n5o6 must already have been applied.
+  • Alembic must be at head (j1k2l3m4n5o6 adds the HMAC columns, k1l2m3n4o5p6
+    stores them as 32-byte binary — this script writes raw digest bytes).
+
+Pipeline
+────────
+  1. Rows are read in keyset batches (WHERE id > :last ORDER BY id LIMIT :n), so
+     memory stays bounded by --batch-size no matter how large the table is.
+  2. Each batch is encrypted in a ProcessPoolExecutor (Fernet is CPU-bound);
+     up to 2 × --workers batches are in flight while the next one is fetched.
+  3. Results are written back in order with one bulk statement per batch —
+     UPDATE ... FROM (VALUES ...) on PostgreSQL, executemany elsewhere — and
+     committed.  Rows that are already fully encrypted are not rewritten.
+  4. After every commit the last processed id is saved to a JSON checkpoint
+     file, so an interrupted run resumes where it stopped.  Re-processing a
+     batch is harmless: already-encrypted values are left untouched.
+
+Options:
+    --batch-size N     rows per batch (default 500)
+    --workers N        encryption processes (default: CPU count)
+    --tables a,b       only migrate the named tables
+    --checkpoint PATH  checkpoint file (default .encrypt_migration_checkpoint.json)
+    --reset            ignore and overwrite any existing checkpoint
 """
 
 import sys
 import os
 import json
+import time
+import argparse
 import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -30,6 +55,8 @@ logger = logging.getLogger('encrypt_migration')
 enc_key = os.environ.get('FIELD_ENCRYPTION_KEY')
 hmac_key_val = os.environ.get('FIELD_HMAC_KEY')
 db_url = os.environ.get('DATABASE_URL', 'sqlite:///Asfalis.db')
+if db_url.startswith("postgres://"):
+    db_url = db_url.replace("postgres://", "postgresql://", 1)
 
 if not enc_key:
     logger.error("FIELD_ENCRYPTION_KEY is not set. Aborting.")
@@ -42,9 +69,10 @@ if not hmac_key_val:
     sys.exit(1)
 
 from sqlalchemy import create_engine, text
-from app.utils.encryption import encrypt, compute_hmac, is_encrypted
+from app.utils.encryption import encrypt, compute_hmac_many, is_encrypted
 
-BATCH_SIZE = 100
+BATCH_SIZE = 500
+DEFAULT_CHECKPOINT = '.encrypt_migration_checkpoint.json'
 
 
 def _safe_encrypt(value):
@@ -76,226 +104,266 @@ def _encrypt_json(value):
     return s if is_encrypted(s) else encrypt(s)
 
 
-# ── Per-table migration functions ─────────────────────────────────────────────
-# SQLAlchemy 2.x: use with conn.begin() as a context manager for explicit txns.
-
-def migrate_users(engine):
-    logger.info("Migrating 'users' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, full_name, email, phone, sos_message, fcm_token, profile_image_url FROM users"
-        )).fetchall()
-
-        for i, row in enumerate(rows):
-            uid, full_name, email, phone, sos_msg, fcm, pic = row
-            p_hmac = compute_hmac(phone) if (phone and not is_encrypted(str(phone))) else None
-            e_hmac = compute_hmac(email) if (email and not is_encrypted(str(email))) else None
-            conn.execute(text(
-                """UPDATE users SET
-                    full_name=:fn, email=:em, phone=:ph, sos_message=:sm,
-                    fcm_token=:ft, profile_image_url=:pi,
-                    phone_hmac=COALESCE(:phm, phone_hmac),
-                    email_hmac=COALESCE(:ehm, email_hmac)
-                   WHERE id=:id"""
-            ), {
-                'fn': _safe_encrypt(full_name), 'em': _safe_encrypt(email),
-                'ph': _safe_encrypt(phone), 'sm': _safe_encrypt(sos_msg),
-                'ft': _safe_encrypt(fcm), 'pi': _safe_encrypt(pic),
-                'phm': p_hmac, 'ehm': e_hmac, 'id': uid,
-            })
-            updated += 1
-            if updated % BATCH_SIZE == 0:
-                conn.commit()
-                logger.info("  users: %d rows committed", updated)
-
-        conn.commit()
-    logger.info("  users: %d rows total", updated)
-
-
-def migrate_trusted_contacts(engine):
-    logger.info("Migrating 'trusted_contacts' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, name, phone, email FROM trusted_contacts"
-        )).fetchall()
-        for row in rows:
-            cid, name, phone, email = row
-            p_hmac = compute_hmac(phone) if (phone and not is_encrypted(str(phone))) else None
-            conn.execute(text(
-                """UPDATE trusted_contacts SET
-                    name=:nm, phone=:ph, email=:em,
-                    phone_hmac=COALESCE(:phm, phone_hmac)
-                   WHERE id=:id"""
-            ), {'nm': _safe_encrypt(name), 'ph': _safe_encrypt(phone),
-                'em': _safe_encrypt(email), 'phm': p_hmac, 'id': cid})
-            updated += 1
-            if updated % BATCH_SIZE == 0:
-                conn.commit()
-        conn.commit()
-    logger.info("  trusted_contacts: %d rows", updated)
-
-
-def migrate_connected_devices(engine):
-    logger.info("Migrating 'connected_devices' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, device_name, device_mac FROM connected_devices"
-        )).fetchall()
-        for row in rows:
-            did, dname, dmac = row
-            m_hmac = compute_hmac(dmac) if (dmac and not is_encrypted(str(dmac))) else None
-            conn.execute(text(
-                """UPDATE connected_devices SET
-                    device_name=:dn, device_mac=:dm,
-                    mac_hmac=COALESCE(:mh, mac_hmac)
-                   WHERE id=:id"""
-            ), {'dn': _safe_encrypt(dname), 'dm': _safe_encrypt(dmac),
-                'mh': m_hmac, 'id': did})
-            updated += 1
-            if updated % BATCH_SIZE == 0:
-                conn.commit()
-        conn.commit()
-    logger.info("  connected_devices: %d rows", updated)
-
-
-def migrate_device_bindings(engine):
-    logger.info("Migrating 'user_device_bindings' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, device_imei FROM user_device_bindings"
-        )).fetchall()
-        for row in rows:
-            bid, imei = row
-            i_hmac = compute_hmac(imei) if (imei and not is_encrypted(str(imei))) else None
-            conn.execute(text(
-                "UPDATE user_device_bindings SET device_imei=:im, imei_hmac=COALESCE(:ih, imei_hmac) WHERE id=:id"
-            ), {'im': _safe_encrypt(imei), 'ih': i_hmac, 'id': bid})
-            updated += 1
-        conn.commit()
-    logger.info("  user_device_bindings: %d rows", updated)
-
-
-def migrate_handset_requests(engine):
-    logger.info("Migrating 'handset_change_requests' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, old_device_imei, new_device_imei FROM handset_change_requests"
-        )).fetchall()
-        for row in rows:
-            hid, old_imei, new_imei = row
-            ni_hmac = compute_hmac(new_imei) if (new_imei and not is_encrypted(str(new_imei))) else None
-            conn.execute(text(
-                """UPDATE handset_change_requests SET
-                    old_device_imei=:oi, new_device_imei=:ni,
-                    new_imei_hmac=COALESCE(:nih, new_imei_hmac)
-                   WHERE id=:id"""
-            ), {'oi': _safe_encrypt(old_imei), 'ni': _safe_encrypt(new_imei),
-                'nih': ni_hmac, 'id': hid})
-            updated += 1
-        conn.commit()
-    logger.info("  handset_change_requests: %d rows", updated)
-
-
-def migrate_location_history(engine):
-    logger.info("Migrating 'location_history' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, latitude, longitude, address, accuracy FROM location_history"
-        )).fetchall()
-        for row in rows:
-            lid, lat, lng, addr, acc = row
-            conn.execute(text(
-                "UPDATE location_history SET latitude=:la, longitude=:lo, address=:ad, accuracy=:ac WHERE id=:id"
-            ), {'la': _encrypt_float(lat), 'lo': _encrypt_float(lng),
-                'ad': _safe_encrypt(addr), 'ac': _encrypt_float(acc), 'id': lid})
-            updated += 1
-            if updated % BATCH_SIZE == 0:
-                conn.commit()
-        conn.commit()
-    logger.info("  location_history: %d rows", updated)
-
+_ENCRYPTORS = {
+    'str': _safe_encrypt,
+    'float': _encrypt_float,
+    'json': _encrypt_json,
+}
+
+
+# ── Table specs ───────────────────────────────────────────────────────────────
+# table → (encrypted columns with their kind, {plaintext column: hmac column}).
+# HMAC columns are only filled when the source value is still plaintext and are
+# written with COALESCE so an existing fingerprint is never cleared.
+# Order matches the original script so dependent tables migrate after users.
+
+TABLES = {
+    'users': (
+        [('full_name', 'str'), ('email', 'str'), ('phone', 'str'),
+         ('sos_message', 'str'), ('fcm_token', 'str'), ('profile_image_url', 'str')],
+        {'phone': 'phone_hmac', 'email': 'email_hmac'},
+    ),
+    'trusted_contacts': (
+        [('name', 'str'), ('phone', 'str'), ('email', 'str')],
+        {'phone': 'phone_hmac'},
+    ),
+    'connected_devices': (
+        [('device_name', 'str'), ('device_mac', 'str')],
+        {'device_mac': 'mac_hmac'},
+    ),
+    'user_device_bindings': (
+        [('device_imei', 'str')],
+        {'device_imei': 'imei_hmac'},
+    ),
+    'handset_change_requests': (
+        [('old_device_imei', 'str'), ('new_device_imei', 'str')],
+        {'new_device_imei': 'new_imei_hmac'},
+    ),
+    'location_history': (
+        [('latitude', 'float'), ('longitude', 'float'), ('address', 'str'), ('accuracy', 'float')],
+        {},
+    ),
+    'sos_alerts': (
+        [('latitude', 'float'), ('longitude', 'float'), ('address', 'str'),
+         ('sos_message', 'str'), ('contacted_numbers', 'json')],
+        {},
+    ),
+    'user_settings': (
+        [('emergency_number', 'str'), ('sos_message', 'str')],
+        {},
+    ),
+    'support_tickets': (
+        [('subject', 'str'), ('message', 'str')],
+        {},
+    ),
+}
+
+
+# ── Worker (runs in a child process) ─────────────────────────────────────────
+
+def _encrypt_batch(table, rows):
+    """
+    Encrypt one batch of ``(id, *values)`` tuples for *table*.
+
+    Returns ``(last_id, updates)`` where *updates* holds a parameter dict for
+    every row that actually changed.  Rows whose values are all encrypted
+    already (and need no HMAC) are dropped so they are not rewritten.
+    """
+    columns, hmacs = TABLES[table]
+    updates = []
+    pending = []  # (params, hmac column, plaintext) — hashed in one batch below
+    for row in rows:
+        row_id, values = row[0], row[1:]
+        params = {'id': row_id}
+        changed = False
+        for (col, kind), value in zip(columns, values):
+            new_value = _ENCRYPTORS[kind](value)
+            params[col] = new_value
+            if new_value != value:
+                changed = True
+            if col in hmacs:
+                params[hmacs[col]] = None
+                if value is not None and value != '' and not is_encrypted(str(value)):
+                    pending.append((params, hmacs[col], str(value)))
+                    changed = True
+        if changed:
+            updates.append(params)
+    digests = compute_hmac_many(plain for _, _, plain in pending)
+    for (params, hcol, _), digest in zip(pending, digests):
+        params[hcol] = bytes.fromhex(digest)  # HMAC columns are binary (k1l2m3n4o5p6)
+    return (rows[-1][0] if rows else None), updates
+
+
+# ── Checkpoints ───────────────────────────────────────────────────────────────
+
+def _load_checkpoint(path, reset):
+    if reset or not os.path.exists(path):
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def _save_checkpoint(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as fh:
+        json.dump(state, fh, indent=2)
+    os.replace(tmp, path)  # atomic — a crash never leaves a truncated file
+
+
+# ── Bulk writers ──────────────────────────────────────────────────────────────
+
+def _write_batch(conn, table, updates):
+    """Write back one batch of encrypted rows with a single bulk statement."""
+    if not updates:
+        return
+    columns, hmacs = TABLES[table]
+    cols = [c for c, _ in columns]
+    hcols = list(hmacs.values())
+
+    if conn.dialect.name == 'postgresql':
+        # UPDATE ... FROM (VALUES ...) — one round trip for the whole batch.
+        # Values are bound per row; every value gets an explicit cast (TEXT,
+        # or BYTEA for HMAC digests) so PostgreSQL can type NULLs in VALUES.
+        names = ['id'] + cols + hcols
+        value_rows, params = [], {}
+        for i, row in enumerate(updates):
+            placeholders = []
+            for name in names:
+                key = f"{name}_{i}"
+                params[key] = row[name]
+                pg_type = 'BYTEA' if name in hcols else 'TEXT'
+                placeholders.append(f"CAST(:{key} AS {pg_type})")
+            value_rows.append(f"({', '.join(placeholders)})")
+        assignments = [f"{c} = v.{c}" for c in cols]
+        assignments += [f"{h} = COALESCE(v.{h}, t.{h})" for h in hcols]
+        conn.execute(text(
+            f"UPDATE {table} AS t SET {', '.join(assignments)} "
+            f"FROM (VALUES {', '.join(value_rows)}) AS v({', '.join(names)}) "
+            f"WHERE t.id = v.id"
+        ), params)
+    else:
+        assignments = [f"{c}=:{c}" for c in cols]
+        assignments += [f"{h}=COALESCE(:{h}, {h})" for h in hcols]
+        conn.execute(text(
+            f"UPDATE {table} SET {', '.join(assignments)} WHERE id=:id"
+        ), updates)
+
+
+# ── Per-table pipeline ────────────────────────────────────────────────────────
+
+def migrate_table(engine, pool, table, state, checkpoint_path, batch_size, max_in_flight):
+    entry = state.setdefault(table, {'last_id': None, 'rows': 0, 'updated': 0, 'done': False})
+    if entry['done']:
+        logger.info("Skipping '%s' (checkpoint marks it complete)", table)
+        return entry
+
+    columns, _ = TABLES[table]
+    select_cols = ', '.join(['id'] + [c for c, _ in columns])
+    if entry['last_id'] is not None:
+        logger.info("Resuming '%s' after id %s (%d rows already processed) ...",
+                    table, entry['last_id'], entry['rows'])
+    else:
+        logger.info("Migrating '%s' table ...", table)
 
-def migrate_sos_alerts(engine):
-    logger.info("Migrating 'sos_alerts' table ...")
-    updated = 0
     with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, latitude, longitude, address, sos_message, contacted_numbers FROM sos_alerts"
-        )).fetchall()
-        for row in rows:
-            sid, lat, lng, addr, msg, contacts = row
-            conn.execute(text(
-                """UPDATE sos_alerts SET
-                    latitude=:la, longitude=:lo, address=:ad, sos_message=:sm, contacted_numbers=:cn
-                   WHERE id=:id"""
-            ), {'la': _encrypt_float(lat), 'lo': _encrypt_float(lng),
-                'ad': _safe_encrypt(addr), 'sm': _safe_encrypt(msg),
-                'cn': _encrypt_json(contacts), 'id': sid})
-            updated += 1
-            if updated % BATCH_SIZE == 0:
+        total = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar() or 0
+        started = time.monotonic()
+        session_rows = 0
+        in_flight = deque()
+        last_id = entry['last_id']
+        exhausted = False
+
+        def _drain_one():
+            nonlocal session_rows
+            future, n_rows = in_flight.popleft()
+            batch_last_id, updates = future.result()
+            _write_batch(conn, table, updates)
+            conn.commit()
+            entry['last_id'] = batch_last_id
+            entry['rows'] += n_rows
+            entry['updated'] += len(updates)
+            _save_checkpoint(checkpoint_path, state)
+            session_rows += n_rows
+            elapsed = max(time.monotonic() - started, 1e-9)
+            logger.info("  %s: %d/%d rows (%d rewritten) — %.0f rows/s",
+                        table, entry['rows'], total, entry['updated'], session_rows / elapsed)
+
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < max_in_flight:
+                if last_id is None:
+                    rows = conn.execute(text(
+                        f"SELECT {select_cols} FROM {table} ORDER BY id LIMIT :n"
+                    ), {'n': batch_size}).fetchall()
+                else:
+                    rows = conn.execute(text(
+                        f"SELECT {select_cols} FROM {table} WHERE id > :last ORDER BY id LIMIT :n"
+                    ), {'last': last_id, 'n': batch_size}).fetchall()
+                # End the read transaction so SQLite writers are not blocked.
                 conn.commit()
-        conn.commit()
-    logger.info("  sos_alerts: %d rows", updated)
-
+                if not rows:
+                    exhausted = True
+                    break
+                rows = [tuple(r) for r in rows]
+                last_id = rows[-1][0]
+                in_flight.append((pool.submit(_encrypt_batch, table, rows), len(rows)))
+                if len(rows) < batch_size:
+                    exhausted = True
+            if in_flight:
+                _drain_one()
+
+    entry['done'] = True
+    entry['seconds'] = round(time.monotonic() - started, 2)
+    _save_checkpoint(checkpoint_path, state)
+    logger.info("  %s: %d rows total, %d rewritten in %.1fs",
+                table, entry['rows'], entry['updated'], entry['seconds'])
+    return entry
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Encrypt existing plaintext rows in place.")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--tables', default=None,
+                        help="Comma-separated subset of: " + ', '.join(TABLES))
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    parser.add_argument('--reset', action='store_true', help="Start over, ignoring the checkpoint.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    tables = list(TABLES)
+    if args.tables:
+        tables = [t.strip() for t in args.tables.split(',') if t.strip()]
+        unknown = [t for t in tables if t not in TABLES]
+        if unknown:
+            logger.error("Unknown table(s): %s", ', '.join(unknown))
+            sys.exit(2)
 
-def migrate_user_settings(engine):
-    logger.info("Migrating 'user_settings' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, emergency_number, sos_message FROM user_settings"
-        )).fetchall()
-        for row in rows:
-            sid, enum_, smsg = row
-            conn.execute(text(
-                "UPDATE user_settings SET emergency_number=:en, sos_message=:sm WHERE id=:id"
-            ), {'en': _safe_encrypt(enum_), 'sm': _safe_encrypt(smsg), 'id': sid})
-            updated += 1
-        conn.commit()
-    logger.info("  user_settings: %d rows", updated)
-
-
-def migrate_support_tickets(engine):
-    logger.info("Migrating 'support_tickets' table ...")
-    updated = 0
-    with engine.connect() as conn:
-        rows = conn.execute(text(
-            "SELECT id, subject, message FROM support_tickets"
-        )).fetchall()
-        for row in rows:
-            tid, subj, msg = row
-            conn.execute(text(
-                "UPDATE support_tickets SET subject=:su, message=:ms WHERE id=:id"
-            ), {'su': _safe_encrypt(subj), 'ms': _safe_encrypt(msg), 'id': tid})
-            updated += 1
-        conn.commit()
-    logger.info("  support_tickets: %d rows", updated)
-
-
-def main():
     logger.info("Starting plaintext → encrypted data migration ...")
     logger.info("Database: %s", db_url.split('@')[-1] if '@' in db_url else db_url)
+    logger.info("Batch size: %d, workers: %d, checkpoint: %s",
+                args.batch_size, args.workers, args.checkpoint)
 
     engine = create_engine(db_url)
+    state = _load_checkpoint(args.checkpoint, args.reset)
 
-    migrate_users(engine)
-    migrate_trusted_contacts(engine)
-    migrate_connected_devices(engine)
-    migrate_device_bindings(engine)
-    migrate_handset_requests(engine)
-    migrate_location_history(engine)
-    migrate_sos_alerts(engine)
-    migrate_user_settings(engine)
-    migrate_support_tickets(engine)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=max(args.workers, 1)) as pool:
+        for table in tables:
+            migrate_table(engine, pool, table, state, args.checkpoint,
+                          args.batch_size, max_in_flight=max(args.workers, 1) * 2)
+    elapsed = time.monotonic() - started
 
     logger.info("")
-    logger.info("✅  Migration complete — all rows encrypted.")
+    logger.info("%-26s %10s %10s %10s", "table", "rows", "rewritten", "rows/s")
+    for table in tables:
+        entry = state[table]
+        secs = entry.get('seconds') or 0
+        rate = f"{entry['rows'] / secs:.0f}" if secs else '-'
+        logger.info("%-26s %10d %10d %10s", table, entry['rows'], entry['updated'], rate)
+    logger.info("")
+    logger.info("✅  Migration complete — all rows encrypted (%.1fs).", elapsed)
 
 
 if __name__ == '__main__':
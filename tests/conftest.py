@@ -0,0 +1,28 @@
+"""
+Test environment: a temporary SQLite primary, no replica, throwaway field keys.
+
+Config and the engines are built when app modules are first imported, so the
+environment is set here, before any test module imports them.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+os.environ['DATABASE_URL'] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ['DATABASE_REPLICA_URL'] = ''  # tests that need one patch in their own engine
+if not os.environ.get('FIELD_ENCRYPTION_KEY'):
+    from cryptography.fernet import Fernet
+    os.environ['FIELD_ENCRYPTION_KEY'] = Fernet.generate_key().decode()
+os.environ.setdefault('FIELD_HMAC_KEY', 'test-hmac-key')
+os.environ['DEBUG'] = 'true'  # registration returns the OTP in the response
+
+
+@pytest.fixture(scope="session")
+def schema():
+    """Create every table in the temporary database."""
+    from app import models  # noqa: F401 — registers the models on Base.metadata
+    from app.database import Base, engine
+    Base.metadata.create_all(bind=engine)
+    return engine
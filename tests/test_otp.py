@@ -0,0 +1,52 @@
+"""MemoryOTPStore.check with malformed codes from untyped request bodies."""
+
+import pytest
+
+from app.config import Config
+from app.utils.otp import MemoryOTPStore, OTP_INVALID, OTP_VERIFIED
+
+PHONE = "+15550001111"
+PURPOSE = "trusted_contact_verification"
+
+
+@pytest.fixture(autouse=True)
+def _no_audit(monkeypatch):
+    monkeypatch.setattr(Config, "OTP_AUDIT", False)  # no write-behind to a real database
+
+
+def _store():
+    store = MemoryOTPStore(max_entries=10)
+    store.issue(PHONE, "123456", PURPOSE)
+    return store
+
+
+def _attempts(store):
+    return store._entries[(PHONE, PURPOSE)].attempts
+
+
+def test_numeric_code_is_invalid_and_counts_attempt():
+    store = _store()
+    assert store.check(PHONE, 123456, PURPOSE) == OTP_INVALID
+    assert _attempts(store) == 1
+
+
+def test_non_ascii_code_is_invalid_and_counts_attempt():
+    store = _store()
+    assert store.check(PHONE, "12345é", PURPOSE) == OTP_INVALID
+    assert _attempts(store) == 1
+
+
+def test_none_code_is_invalid():
+    store = _store()
+    assert store.check(PHONE, None, PURPOSE) == OTP_INVALID
+
+
+def test_correct_code_still_verifies():
+    assert _store().check(PHONE, "123456", PURPOSE) == OTP_VERIFIED
+
+
+def test_restore_after_failed_caller_commit():
+    store = _store()
+    assert store.check(PHONE, "123456", PURPOSE, commit=False) == OTP_VERIFIED
+    store.restore(PHONE, "123456", PURPOSE)
+    assert store.check(PHONE, "123456", PURPOSE) == OTP_VERIFIED
@@ -0,0 +1,130 @@
+"""
+SQL statements per request on the SOS and profile paths, checked against a budget.
+
+Registers a user with one trusted contact and walks the SOS lifecycle
+
+    trigger → countdown → active → cancel → trigger → send-now → safe → history
+
+plus the profile/contacts/settings reads.  Every GET is measured twice:
+
+  • cold — the user's snapshot (services/user_snapshot.py) is dropped first,
+           so user, settings and contacts are loaded from the database
+  • warm — the snapshot is cached, as on the second request of a session
+
+Statements are counted per request through a ContextVar set around the ASGI
+call, so background sweepers running meanwhile are not attributed to it.
+benchmarks/bench_query_budget.py prints the same walk as a table.
+"""
+
+import contextvars
+
+import pytest
+
+# Maximum statements per request (cold snapshot; warm must not exceed it).
+# Transaction control (BEGIN/COMMIT) is not sent as a statement and not counted.
+BUDGETS = {
+    "POST /api/sos/trigger": 5,
+    "GET /api/sos/countdown/{id}": 1,
+    "GET /api/sos/active": 3,
+    "POST /api/sos/cancel": 4,
+    "POST /api/sos/send-now": 4,
+    "POST /api/sos/safe": 4,
+    "GET /api/sos/history": 2,
+    "GET /api/user/profile": 2,
+    "GET /api/contacts": 2,
+    "GET /api/settings": 2,
+}
+
+_statements = contextvars.ContextVar('query_budget_statements', default=None)
+
+
+def _counted(app, last_request):
+    """Wrap the ASGI app so each HTTP request's statements end up in *last_request*."""
+    async def wrapper(scope, receive, send):
+        if scope["type"] != "http":
+            return await app(scope, receive, send)
+        bucket = []
+        token = _statements.set(bucket)
+        try:
+            await app(scope, receive, send)
+        finally:
+            _statements.reset(token)
+            last_request[:] = bucket
+    return wrapper
+
+
+def walk():
+    """
+    Run the lifecycle against the app and return {(label, mode): [statement, …]}.
+    The environment (a scratch database, DEBUG=true) must be set before app import.
+    """
+    from sqlalchemy import event
+    from fastapi.testclient import TestClient
+
+    from app.database import engine
+    from app.main import app
+    from app.services.user_snapshot import invalidate_user
+
+    def count(conn, cursor, statement, *_):
+        bucket = _statements.get()
+        if bucket is not None:
+            bucket.append(" ".join(statement.split())[:160])
+
+    event.listen(engine, "before_cursor_execute", count)
+    results = {}
+    last_request = []
+    try:
+        with TestClient(_counted(app, last_request)) as client:
+            def call(label, method, path, user_id=None, **kwargs):
+                for mode in ("cold", "warm"):
+                    if mode == "warm" and method != "GET":
+                        break  # writes change state; only measured once
+                    if mode == "cold" and user_id:
+                        invalidate_user(user_id)
+                    response = client.request(method, path, **kwargs)
+                    assert response.status_code < 400, f"{label}: {response.status_code} {response.text}"
+                    results[(label, mode)] = list(last_request)
+                return response
+
+            phone = "+15550001111"
+            r = client.post("/api/auth/register/phone", json={
+                "full_name": "Budget User", "phone_number": phone, "password": "budget123x", "country": "India"})
+            client.post("/api/auth/verify-phone-otp", json={"phone_number": phone, "otp_code": r.json()["data"]["otp_code"]})
+            r = client.post("/api/auth/login/phone", json={"phone_number": phone, "password": "budget123x"})
+            auth = {"Authorization": f"Bearer {r.json()['data']['access_token']}"}
+            user_id = client.get("/api/user/profile", headers=auth).json()["data"]["user_id"]
+            client.post("/api/contacts", headers=auth, json={
+                "name": "Contact", "phone": "+15550002222", "relationship": "friend"})
+
+            sos = {"latitude": 12.97, "longitude": 77.59, "trigger_type": "manual"}
+            alert_id = call("POST /api/sos/trigger", "POST", "/api/sos/trigger", user_id, headers=auth,
+                            json=sos).json()["data"]["alert_id"]
+            call("GET /api/sos/countdown/{id}", "GET", f"/api/sos/countdown/{alert_id}", user_id, headers=auth)
+            call("GET /api/sos/active", "GET", "/api/sos/active", user_id, headers=auth)
+            call("POST /api/sos/cancel", "POST", "/api/sos/cancel", user_id, headers=auth, json={"alert_id": alert_id})
+
+            alert_id = client.post("/api/sos/trigger", headers=auth, json=sos).json()["data"]["alert_id"]
+            call("POST /api/sos/send-now", "POST", "/api/sos/send-now", user_id, headers=auth, json={"alert_id": alert_id})
+            call("POST /api/sos/safe", "POST", "/api/sos/safe", user_id, headers=auth, json={"alert_id": alert_id})
+            call("GET /api/sos/history", "GET", "/api/sos/history", user_id, headers=auth)
+
+            for path in ("/api/user/profile", "/api/contacts", "/api/settings"):
+                call(f"GET {path}", "GET", path, user_id, headers=auth)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    return results
+
+
+@pytest.fixture(scope="module")
+def measured(schema):
+    return walk()
+
+
+MEASURED = [(label, mode) for label in BUDGETS
+            for mode in (("cold", "warm") if label.startswith("GET ") else ("cold",))]
+
+
+@pytest.mark.parametrize("label, mode", MEASURED)
+def test_request_within_budget(measured, label, mode):
+    statements = measured[(label, mode)]
+    assert len(statements) <= BUDGETS[label], "\n".join(statements)
@@ -0,0 +1,113 @@
+"""Replica routing against two SQLite files standing in for the primary and the replica."""
+
+import json
+import time
+import uuid
+import base64
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+import app.database as database
+import app.read_replica as read_replica
+from app.config import settings
+from app.database import Base, ScopedSession
+from app.models.revoked_token import RevokedToken
+from app.read_replica import route_request
+
+
+@pytest.fixture
+def replica(schema, tmp_path, monkeypatch):
+    """A second database as the replica; each file knows which one it is."""
+    replica = create_engine(f"sqlite:///{tmp_path}/replica.db",
+                            connect_args={"check_same_thread": False}, poolclass=NullPool)
+    Base.metadata.create_all(bind=replica)
+    for name, engine in (("primary", schema), ("replica", replica)):
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE IF NOT EXISTS which_db (name TEXT)"))
+            conn.execute(text("DELETE FROM which_db"))
+            conn.execute(text("INSERT INTO which_db VALUES (:name)"), {"name": name})
+    monkeypatch.setattr(database, "replica_engine", replica)
+    monkeypatch.setattr(read_replica, "replica_engine", replica)
+    database._recent_writers.clear()
+    yield replica
+    ScopedSession.remove()
+    database._recent_writers.clear()
+
+
+def _bearer(user_id):
+    claims = base64.urlsafe_b64encode(json.dumps({"sub": user_id}).encode()).decode().rstrip("=")
+    return f"Bearer header.{claims}.signature"
+
+
+@contextmanager
+def _request(method, path, user_id):
+    """Route like the session middleware does and yield this request's session."""
+    use_replica, user = route_request(method, path, _bearer(user_id))
+    replica_token = database._use_replica.set(use_replica)
+    user_token = database._request_user.set(user)
+    try:
+        yield ScopedSession
+    finally:
+        ScopedSession.remove()
+        database._request_user.reset(user_token)
+        database._use_replica.reset(replica_token)
+
+
+def _read(session):
+    return session.execute(text("SELECT name FROM which_db")).scalar()
+
+
+def _write(session):
+    session.add(RevokedToken(jti=str(uuid.uuid4())))
+    session.commit()
+
+
+def test_allowlisted_get_reads_the_replica(replica):
+    with _request("GET", "/api/user/profile", "reader") as session:
+        assert _read(session) == "replica"
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/api/settings"),
+    ("GET", "/api/sos/active"),
+    ("GET", "/api/sos/countdown/abc"),
+])
+def test_writes_and_other_routes_use_the_primary(replica, method, path):
+    with _request(method, path, "reader") as session:
+        assert _read(session) == "primary"
+
+
+def test_writer_stays_on_the_primary_for_the_sticky_window(replica, monkeypatch):
+    monkeypatch.setattr(settings, "REPLICA_STICKY_SECONDS", 0.2)
+    with _request("POST", "/api/settings", "writer") as session:
+        _write(session)
+    with _request("GET", "/api/settings", "writer") as session:
+        assert _read(session) == "primary"
+    with _request("GET", "/api/settings", "someone-else") as session:
+        assert _read(session) == "replica"
+    time.sleep(0.25)
+    with _request("GET", "/api/settings", "writer") as session:
+        assert _read(session) == "replica"
+
+
+def test_session_that_flushed_never_returns_to_the_replica(replica):
+    with _request("GET", "/api/contacts", "reader") as session:
+        assert _read(session) == "replica"
+        session.add(RevokedToken(jti=str(uuid.uuid4())))
+        session.flush()
+        assert _read(session) == "primary"
+        session.commit()
+        assert _read(session) == "primary"
+
+
+def test_full_writer_table_evicts_only_the_oldest(replica, monkeypatch):
+    monkeypatch.setattr(database, "_RECENT_WRITERS_MAX", 3)
+    for user_id in ("a", "b", "c", "a", "d"):
+        database._mark_write(user_id)
+    window = settings.REPLICA_STICKY_SECONDS
+    assert list(database._recent_writers) == ["c", "a", "d"]
+    assert not database.wrote_recently("b", window)
+    assert all(database.wrote_recently(user_id, window) for user_id in ("a", "c", "d"))
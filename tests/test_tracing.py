@@ -0,0 +1,54 @@
+"""SOS stage timings are only stored for alerts that exist."""
+
+import uuid
+
+import pytest
+
+from app.database import ScopedSession
+from app.models.sos_alert import SOSAlert
+from app.models.sos_stage_timing import SOSStageTiming
+from app.services.sos_service import cancel_sos
+from app.tracing import flush, set_alert, span, tracing_stats
+
+
+@pytest.fixture
+def alert(schema):
+    alert = SOSAlert(id=str(uuid.uuid4()), user_id=str(uuid.uuid4()), trigger_type='manual',
+                     status='countdown', latitude=12.97, longitude=77.59,
+                     sos_message='test', contacted_numbers=[])
+    ScopedSession.add(alert)
+    ScopedSession.commit()
+    yield alert.id
+    ScopedSession.remove()
+
+
+def _timings(alert_id):
+    try:
+        return ScopedSession.query(SOSStageTiming).filter_by(alert_id=alert_id).count()
+    finally:
+        ScopedSession.remove()
+
+
+def test_unknown_alert_id_is_not_tied_to_the_trace(schema):
+    bogus = "no-such-alert-" + "x" * 40  # longer than sos_alerts.id
+    try:
+        assert cancel_sos(bogus) == (False, "Alert not found")
+    finally:
+        ScopedSession.remove()
+    assert flush()
+    assert _timings(bogus) == 0
+
+
+def test_orphaned_rows_do_not_fail_the_batch(alert):
+    orphaned = tracing_stats()["orphaned"]
+    with span('sos.cancel', operation=True):
+        set_alert(alert)
+        with span('alert_lookup'):
+            pass
+    with span('sos.cancel', operation=True):
+        set_alert(str(uuid.uuid4()))  # e.g. a trigger whose insert never committed
+        with span('alert_lookup'):
+            pass
+    assert flush()
+    assert _timings(alert) == 2
+    assert tracing_stats()["orphaned"] == orphaned + 2